@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -59,6 +60,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.middleware.BranchRoleMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -90,19 +92,6 @@ TEMPLATES = [
 ASGI_APPLICATION = "config.asgi.application"
 
 
-# ==========================================================
-# CHANNEL LAYERS (LOCAL SEM REDIS / PRODUÇÃO COM REDIS)
-# ==========================================================
-
-
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer",
-    },
-}
-
-
-
 WSGI_APPLICATION = "config.wsgi.application"
 
 # ======================
@@ -111,14 +100,38 @@ WSGI_APPLICATION = "config.wsgi.application"
 
 db_url = os.environ.get("DATABASE_URL", "").strip()
 
+# Modo de conexão com o Postgres:
+#   pool       -> pool do psycopg 3 (padrão; seguro no ASGI/daphne)
+#   persistent -> CONN_MAX_AGE por thread (só WSGI/gunicorn)
+#   none       -> conexão nova a cada request (comportamento antigo)
+DB_CONN_MODE = os.environ.get("DB_CONN_MODE", "pool").strip().lower()
+
+if DB_CONN_MODE not in ("pool", "persistent", "none"):
+    raise ImproperlyConfigured(f"DB_CONN_MODE inválido: {DB_CONN_MODE}")
+
 if db_url:
     DATABASES = {
         "default": dj_database_url.parse(
             db_url,
-            conn_max_age=0,
-            ssl_require=True,
+            conn_max_age=(
+                int(os.environ.get("DB_CONN_MAX_AGE", "60"))
+                if DB_CONN_MODE == "persistent" else 0
+            ),
+            # pool: o Django usa ConnectionPool.check_connection
+            conn_health_checks=DB_CONN_MODE != "none",
+            ssl_require=os.environ.get("DB_SSL_REQUIRE", "1") == "1",
         )
     }
+
+    if DB_CONN_MODE == "pool" and "postgresql" in DATABASES["default"]["ENGINE"]:
+        # 🔥 Um pool por processo, compartilhado pelas threads do daphne
+        DATABASES["default"].setdefault("OPTIONS", {})["pool"] = {
+            "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", "10")),
+            "timeout": float(os.environ.get("DB_POOL_TIMEOUT", "10")),
+            "max_idle": float(os.environ.get("DB_POOL_MAX_IDLE", "300")),
+            "max_lifetime": float(os.environ.get("DB_POOL_MAX_LIFETIME", "1800")),
+        }
 else:
     DATABASES = {
         "default": {
@@ -127,6 +140,99 @@ else:
         }
     }
 
+# ==========================================================
+# CHANNEL LAYERS (LOCAL EM MEMÓRIA / PRODUÇÃO COM POSTGRES)
+# ==========================================================
+# Com Postgres os eventos cruzam processos e nós via LISTEN/NOTIFY;
+# o InMemoryChannelLayer só enxerga o próprio processo.
+
+if "postgresql" in DATABASES["default"]["ENGINE"]:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "core.channel_layers.PostgresChannelLayer",
+            "CONFIG": {
+                "channel": os.environ.get("CHANNEL_LAYER_NOTIFY_CHANNEL", "channels_layer"),
+            },
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer",
+        },
+    }
+
+# ======================
+# EVENTOS (OUTBOX)
+# ======================
+# thread: publica fora do request (produção) / inline: no próprio on_commit
+
+OUTBOX_DISPATCH = os.environ.get(
+    "OUTBOX_DISPATCH",
+    "thread" if "postgresql" in DATABASES["default"]["ENGINE"] else "inline",
+)
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_RETRY_DELAY = int(os.environ.get("OUTBOX_RETRY_DELAY", "10"))
+OUTBOX_SWEEP_INTERVAL = int(os.environ.get("OUTBOX_SWEEP_INTERVAL", "5"))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", "10"))
+OUTBOX_RETENTION = int(os.environ.get("OUTBOX_RETENTION", str(24 * 3600)))
+# A thread do dispatcher apaga os antigos a cada tanto (segundos);
+# em modo inline, só o comando dispatch_outbox apaga
+OUTBOX_PRUNE_INTERVAL = int(os.environ.get("OUTBOX_PRUNE_INTERVAL", "3600"))
+
+# ======================
+# LONG-POLL (/pedido/<id>/poll/?since=)
+# ======================
+# Teto da espera (abaixo do timeout de conexão ociosa dos proxies) e
+# intervalo de releitura do banco para mudanças que não publicam evento.
+
+LONGPOLL_TIMEOUT = int(os.environ.get("LONGPOLL_TIMEOUT", "25"))
+LONGPOLL_RECHECK = int(os.environ.get("LONGPOLL_RECHECK", "10"))
+
+# ======================
+# ROLLUP DIÁRIO (build_daily_rollup)
+# ======================
+# Folga (segundos) ao reler pedidos alterados desde a última execução:
+# cobre transações que commitaram depois de a execução anterior ler.
+
+ROLLUP_LAG = int(os.environ.get("ROLLUP_LAG", "300"))
+
+# ======================
+# PAGINAÇÃO (listas de pedidos e relatórios)
+# ======================
+# Tamanho padrão e teto do ?size= (cursor em core/pagination.py)
+
+PAGE_SIZE = int(os.environ.get("PAGE_SIZE", "50"))
+PAGE_SIZE_MAX = int(os.environ.get("PAGE_SIZE_MAX", "200"))
+
+# ======================
+# CACHE
+# ======================
+# Sem REDIS_URL usa memória local (um cache por processo): serve para
+# um processo só. Com mais de um (workers do daphne/gunicorn, réplicas)
+# REDIS_URL é obrigatório — contador do badge, papéis da sessão e
+# versão do catálogo precisam ser os mesmos em todos.
+
+redis_url = os.environ.get("REDIS_URL", "").strip()
+
+if redis_url:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": redis_url,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "xodo",
+        }
+    }
+
+CATALOG_CACHE_TIMEOUT = int(os.environ.get("CATALOG_CACHE_TIMEOUT", "300"))
+AUSTIN_BADGE_TIMEOUT = int(os.environ.get("AUSTIN_BADGE_TIMEOUT", "300"))
+
 # ======================
 # PASSWORD VALIDATION
 # ======================
@@ -164,6 +270,28 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# ======================
+# RELATÓRIOS (PDF)
+# ======================
+
+REPORT_CHUNK_SIZE = int(os.environ.get("REPORT_CHUNK_SIZE", "100"))
+
+# Processos que montam os blocos de páginas dos relatórios grandes.
+# 1 = sem pool; cada processo (daphne) com mais de 1 sobe os seus.
+PDF_RENDER_WORKERS = int(os.environ.get("PDF_RENDER_WORKERS", "1"))
+
+# Relatório maior que isso não vai para o pool (concatenação em memória)
+PDF_PARALLEL_MAX_ORDERS = int(os.environ.get("PDF_PARALLEL_MAX_ORDERS", "2000"))
+
+# PDFs gerados em segundo plano (disco local, fora do Cloudinary)
+REPORT_JOBS_DIR = os.environ.get("REPORT_JOBS_DIR", str(BASE_DIR / "var" / "reports"))
+REPORT_JOB_WORKERS = int(os.environ.get("REPORT_JOB_WORKERS", "1"))
+REPORT_JOB_TIMEOUT = int(os.environ.get("REPORT_JOB_TIMEOUT", "600"))
+REPORT_JOB_TTL = int(os.environ.get("REPORT_JOB_TTL", str(24 * 3600)))
+
+# PDF e detalhe de pedidos fechados, gerados uma vez (core/artifacts.py)
+ORDER_ARTIFACTS_DIR = os.environ.get("ORDER_ARTIFACTS_DIR", str(BASE_DIR / "var" / "artifacts"))
+
 # ======================
 # CLOUDINARY STORAGE
 # ======================
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Category, Product, TransferOrder, TransferOrderItem
+from .models import Category, Product, TransferOrder, TransferOrderItem, OutboxEvent
+from .artifacts import invalidate_order_artifacts
+from .orders import refresh_order_totals
 
 
 # ==========================================================
@@ -46,4 +48,26 @@ class TransferOrderItemInline(admin.TabularInline):
 class TransferOrderAdmin(admin.ModelAdmin):
     list_display = ("id", "from_branch", "to_branch", "status", "created_at")
     list_filter = ("status", "from_branch", "to_branch")
-    inlines = [TransferOrderItemInline]
\ No newline at end of file
+    inlines = [TransferOrderItemInline]
+    actions = ["discard_artifacts"]
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # itens editados pelo inline: recalcula os totais do pedido
+        refresh_order_totals(form.instance)
+
+    @admin.action(description="Descartar PDF/detalhe gerados (pedidos fechados)")
+    def discard_artifacts(self, request, queryset):
+        invalidate_order_artifacts(queryset.values_list("pk", flat=True))
+        self.message_user(request, "Documentos descartados; serão gerados de novo no próximo acesso.")
+
+
+# ==========================================================
+# OUTBOX (EVENTOS EM TEMPO REAL)
+# ==========================================================
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ("id", "created_at", "sent_at", "attempts", "next_attempt_at")
+    list_filter = (("sent_at", admin.EmptyFieldListFilter),)
+    readonly_fields = ("groups", "payload", "created_at", "sent_at", "attempts", "last_error")
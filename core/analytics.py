@@ -0,0 +1,252 @@
+from datetime import timedelta
+from functools import partial, reduce
+from operator import or_
+
+from django.conf import settings
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, Least, TruncDate
+from django.utils import timezone
+
+from core.models import (
+    DailyProductTransfer,
+    OrderStatus,
+    RollupDirtyDay,
+    RollupWatermark,
+    TransferOrder,
+    TransferOrderItem,
+)
+from core.report_query import day_bounds
+
+
+# ==========================================================
+# ATENDIMENTO POR PRODUTO (AGREGADO NO BANCO)
+# ==========================================================
+#
+# GROUP BY produto, só pedidos que já saíram de Austin
+# (DISPATCHED/RECEIVED). Nenhum item passa pelo Python: cada linha do
+# resultado já é um produto.
+#
+#   pedido    = soma de qty_requested
+#   enviado   = soma de qty_sent
+#   atendido  = soma de min(enviado, pedido)
+#   faltou    = pedido - atendido   (nunca compensado por excesso)
+#   excesso   = enviado - atendido
+#   fill_rate = atendido / pedido (%)
+#
+# Dias fechados vêm do rollup (DailyProductTransfer, core/rollup.py);
+# só o que o rollup ainda não cobre (hoje, ou mais se o comando
+# atrasou) é agregado sobre TransferOrderItem JOIN TransferOrder.
+#
+# 🔥 Dia antigo também pode estar velho no rollup: pedido criado antes
+# do corte e despachado/recebido/editado depois da última execução, ou
+# pedido apagado (RollupDirtyDay). Esses dias são lidos ao vivo até o
+# próximo build_daily_rollup.
+
+SHIPPED_STATUSES = (OrderStatus.DISPATCHED, OrderStatus.RECEIVED)
+
+SUM_FIELDS = ("orders", "short_orders", "requested", "sent", "fulfilled")
+
+SORTS = {
+    "missing": ("-missing", "product_name"),
+    "fill_rate": ("fill_rate", "-requested"),
+    "requested": ("-requested", "product_name"),
+    "short_orders": ("-short_orders", "-missing"),
+    "product": ("product_name",),
+}
+
+ROLLUP_WATERMARK = "daily_product_transfer"
+
+# folga para transações que gravaram updated_at antes e commitaram
+# depois da leitura do watermark
+ROLLUP_LAG = timedelta(seconds=getattr(settings, "ROLLUP_LAG", 300))
+
+PRODUCT_COLUMNS = {
+    "product_name": F("product__name"),
+    "product_sku": F("product__sku"),
+    "unit": F("product__unit"),
+}
+
+
+def item_sums():
+    """Somas por grupo sobre TransferOrderItem (mesmas colunas do rollup)."""
+    return {
+        # (pedido, produto) é único: uma linha de item = um pedido
+        "orders": Count("id"),
+        "short_orders": Count("id", filter=Q(qty_sent__lt=F("qty_requested"))),
+        "requested": Coalesce(Sum("qty_requested"), 0),
+        "sent": Coalesce(Sum("qty_sent"), 0),
+        "fulfilled": Coalesce(Sum(Least("qty_sent", "qty_requested")), 0),
+    }
+
+
+def _rollup_sums():
+    return {
+        "orders": Sum("orders"),
+        "short_orders": Sum("short_orders"),
+        "requested": Sum("qty_requested"),
+        "sent": Sum("qty_sent"),
+        "fulfilled": Sum("qty_fulfilled"),
+    }
+
+
+# ======================
+# ATÉ ONDE O ROLLUP VALE
+# ======================
+
+def get_rollup_watermark():
+    return (
+        RollupWatermark.objects.filter(name=ROLLUP_WATERMARK)
+        .values_list("value", flat=True)
+        .first()
+    )
+
+
+def rollup_cutoff():
+    """Primeiro dia que NÃO vem do rollup (None: rollup nunca rodou).
+
+    Hoje, ou o dia do último build_daily_rollup se ele estiver atrasado.
+    """
+    watermark = get_rollup_watermark()
+
+    if watermark is None:
+        return None
+
+    return min(timezone.localdate(), timezone.localdate(watermark))
+
+
+def affected_days_query(since=None):
+    """Dias (locais) de criação dos pedidos alterados desde ``since``."""
+    orders = TransferOrder.objects.all()
+
+    if since is not None:
+        orders = orders.filter(updated_at__gte=since - ROLLUP_LAG)
+
+    return (
+        orders.annotate(day=TruncDate("created_at", tzinfo=timezone.get_current_timezone()))
+        .order_by()
+        .values_list("day", flat=True)
+        .distinct()
+    )
+
+
+def stale_rollup_days(start, end):
+    """Dias do período que o rollup ainda não reflete (alterados ou apagados)."""
+    lower, upper = day_bounds(start, end)
+
+    changed = affected_days_query(get_rollup_watermark())
+    dirty = RollupDirtyDay.objects.values_list("day", flat=True)
+
+    if lower:
+        changed = changed.filter(created_at__gte=lower)
+        dirty = dirty.filter(day__gte=start)
+    if upper:
+        changed = changed.filter(created_at__lt=upper)
+        dirty = dirty.filter(day__lte=end)
+
+    return sorted(set(changed) | set(dirty))
+
+
+def live_product_rows(start, end, days=None):
+    """``days``: só esses dias (dentro de start..end)."""
+    lower, upper = day_bounds(start, end)
+
+    items = TransferOrderItem.objects.filter(order__status__in=SHIPPED_STATUSES)
+
+    if lower:
+        items = items.filter(order__created_at__gte=lower)
+    if upper:
+        items = items.filter(order__created_at__lt=upper)
+    if days is not None:
+        items = items.filter(reduce(or_, (
+            Q(order__created_at__gte=day_lower, order__created_at__lt=day_upper)
+            for day_lower, day_upper in (day_bounds(day, day) for day in days)
+        )))
+
+    return items.order_by().values("product_id").annotate(**PRODUCT_COLUMNS, **item_sums())
+
+
+def rollup_product_rows(start, end, exclude=()):
+    days = DailyProductTransfer.objects.all()
+
+    if start:
+        days = days.filter(day__gte=start)
+    if end:
+        days = days.filter(day__lte=end)
+    if exclude:
+        days = days.exclude(day__in=exclude)
+
+    return days.order_by().values("product_id").annotate(**PRODUCT_COLUMNS, **_rollup_sums())
+
+
+def _sources(start, end):
+    """[(consulta, início, fim)]: rollup até a véspera do corte (menos os
+    dias velhos, lidos ao vivo), vivo do corte em diante."""
+    cutoff = rollup_cutoff()
+
+    if cutoff is None or (start and start >= cutoff):
+        return [(live_product_rows, start, end)]
+
+    rollup_end = min(end, cutoff - timedelta(days=1)) if end else cutoff - timedelta(days=1)
+    stale = stale_rollup_days(start, rollup_end)
+
+    sources = [(partial(rollup_product_rows, exclude=stale), start, rollup_end)]
+
+    if stale:
+        sources.append((partial(live_product_rows, days=stale), start, rollup_end))
+    if not end or end >= cutoff:
+        sources.append((live_product_rows, cutoff, end))
+
+    return sources
+
+
+# ======================
+# RESULTADO
+# ======================
+
+def _with_derived(row):
+    row["missing"] = row["requested"] - row["fulfilled"]
+    row["extra"] = row["sent"] - row["fulfilled"]
+    row["fill_rate"] = (
+        100 * row["fulfilled"] / row["requested"] if row["requested"] else None
+    )
+    return row
+
+
+def _sort(rows, keys):
+    # estável: aplica da última chave para a primeira; None sempre no fim
+    for key in reversed(keys):
+        name = key.lstrip("-")
+        present = [row for row in rows if row[name] is not None]
+        present.sort(key=lambda row: row[name], reverse=key.startswith("-"))
+        rows = present + [row for row in rows if row[name] is None]
+    return rows
+
+
+def product_fulfillment(start=None, end=None, sort="missing"):
+    """Uma linha (dict) por produto no período, já ordenada."""
+    products = {}
+
+    # no máximo três consultas agrupadas (rollup + dias velhos + dias vivos)
+    for query, lower, upper in _sources(start, end):
+        for row in query(lower, upper):
+            current = products.get(row["product_id"])
+
+            if current is None:
+                products[row["product_id"]] = row
+            else:
+                for key in SUM_FIELDS:
+                    current[key] += row[key]
+
+    return _sort([_with_derived(row) for row in products.values()], SORTS[sort])
+
+
+def fulfillment_totals(rows):
+    """Total do período a partir das linhas por produto (sem 2ª consulta)."""
+    # contagens de pedidos não se somam entre produtos (ficam de fora)
+    totals = dict.fromkeys(("requested", "sent", "fulfilled"), 0)
+
+    for row in rows:
+        for key in totals:
+            totals[key] += row[key]
+
+    return _with_derived(totals)
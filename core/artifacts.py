@@ -0,0 +1,142 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.db.models import Max
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from core.conditional import weak_etag
+from core.models import OrderStatus, Product
+
+
+# ==========================================================
+# ARTEFATOS IMUTÁVEIS DE PEDIDOS FECHADOS (PDF / DETALHE)
+# ==========================================================
+#
+# Pedido RECEIVED ou CANCELLED não muda mais: o PDF do pedido e o
+# trecho de HTML do detalhe (itens, observação, histórico) são gerados
+# uma vez e servidos do disco local nas próximas vezes.
+#
+#   <ORDER_ARTIFACTS_DIR>/<id do pedido>/<nome>-v<versão>-p<produtos>.<ext>
+#
+# A versão do pedido sobe a cada edição (admin inclusive) e o carimbo
+# dos produtos (maior Product.updated_at, lido do banco) a cada produto
+# alterado (nomes aparecem nos documentos): qualquer mudança cai numa
+# chave nova. Os arquivos antigos do pedido são apagados ao gravar o
+# novo ou por invalidate_order_artifacts().
+#
+# 🔥 Não usa a versão do catálogo (core/catalog.py): com cache local
+# cada processo tem a sua, e um apagaria os arquivos do outro.
+
+FINAL_STATUSES = (OrderStatus.RECEIVED, OrderStatus.CANCELLED)
+
+# Cache-Control das URLs versionadas (?v=<chave do artefato>)
+ARTIFACT_MAX_AGE = 365 * 24 * 3600
+
+
+def artifacts_dir():
+    # lido a cada uso: os benchmarks trocam por um diretório temporário
+    return getattr(
+        settings,
+        "ORDER_ARTIFACTS_DIR",
+        os.path.join(settings.BASE_DIR, "var", "artifacts"),
+    )
+
+
+def is_final(order):
+    return order.status in FINAL_STATUSES
+
+
+def catalog_stamp():
+    """Última alteração de produto, em microssegundos (0: sem produtos)."""
+    stamp = Product.objects.aggregate(stamp=Max("updated_at"))["stamp"]
+    return int(stamp.timestamp() * 1_000_000) if stamp else 0
+
+
+def artifact_key(order, stamp=None):
+    """``stamp``: catalog_stamp() já lido (listas de pedidos)."""
+    if stamp is None:
+        # um request pode pedir a chave várias vezes (ETag, arquivo)
+        stamp = getattr(order, "_catalog_stamp", None)
+        if stamp is None:
+            stamp = order._catalog_stamp = catalog_stamp()
+
+    return f"v{order.version}-p{stamp}"
+
+
+def artifact_etag(order, name):
+    return weak_etag("a", name, order.id, artifact_key(order))
+
+
+def _order_dir(order_id):
+    return os.path.join(artifacts_dir(), str(order_id))
+
+
+def _prune(directory, name, keep):
+    """Apaga as versões anteriores do mesmo artefato."""
+    for entry in os.listdir(directory):
+        if entry.startswith(f"{name}-") and entry != keep and not entry.endswith(".tmp"):
+            try:
+                os.remove(os.path.join(directory, entry))
+            except FileNotFoundError:
+                pass
+
+
+def order_artifact(order, name, ext, build):
+    """Caminho do artefato; ``build(out)`` grava o arquivo se ainda não existe."""
+    directory = _order_dir(order.id)
+    filename = f"{name}-{artifact_key(order)}.{ext}"
+    path = os.path.join(directory, filename)
+
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(directory, exist_ok=True)
+
+    # temporário único + rename: dois requests simultâneos não se atrapalham
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+
+    try:
+        with os.fdopen(fd, "wb") as out:
+            build(out)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    _prune(directory, name, filename)
+    return path
+
+
+def order_fragment(order, name, template, context):
+    """HTML do template (sem request) guardado como artefato do pedido."""
+    def build(out):
+        out.write(render_to_string(template, context).encode("utf-8"))
+
+    with open(order_artifact(order, name, "html", build), encoding="utf-8") as f:
+        return mark_safe(f.read())
+
+
+def invalidate_order_artifacts(order_ids):
+    """Apaga tudo o que foi gerado para os pedidos (admin / pedido apagado)."""
+    for order_id in order_ids:
+        shutil.rmtree(_order_dir(order_id), ignore_errors=True)
+
+
+# ======================
+# CABEÇALHOS
+# ======================
+
+def set_artifact_validators(response, etag, immutable=False):
+    """``immutable``: URL com a chave do artefato, o navegador guarda por um
+    ano sem revalidar; sem ela, revalida (ETag -> 304) a cada acesso."""
+    response.headers["ETag"] = etag
+
+    if immutable:
+        response.headers["Cache-Control"] = f"private, max-age={ARTIFACT_MAX_AGE}, immutable"
+    else:
+        response.headers["Cache-Control"] = "private, no-cache"
+    return response
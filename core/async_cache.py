@@ -0,0 +1,45 @@
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+# ==========================================================
+# CACHE EM VIEWS ASYNC
+# ==========================================================
+#
+# O aget()/aset() padrão do Django roda o get()/set() síncrono numa
+# thread. Com LocMem (um dict do processo) a leitura direta não bloqueia
+# o event loop, então pulamos a thread; Redis continua pelo caminho
+# async do Django.
+
+def _in_process():
+    return isinstance(caches["default"], LocMemCache)
+
+
+def is_shared():
+    """Cache visto por todos os processos (Redis)? LocMem é um por processo."""
+    return not _in_process()
+
+
+async def aget(key, default=None):
+    if _in_process():
+        return cache.get(key, default)
+    return await cache.aget(key, default)
+
+
+async def aget_many(keys):
+    if _in_process():
+        return cache.get_many(keys)
+    return await cache.aget_many(keys)
+
+
+async def aset(key, value, timeout):
+    if _in_process():
+        cache.set(key, value, timeout)
+    else:
+        await cache.aset(key, value, timeout)
+
+
+async def aadd(key, value, timeout):
+    if _in_process():
+        return cache.add(key, value, timeout)
+    return await cache.aadd(key, value, timeout)
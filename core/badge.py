@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from core.async_cache import aget, aset, is_shared
+from core.models import OrderStatus, TransferOrder
+from core.realtime import publish_badge_update
+
+
+# ==========================================================
+# CONTADOR DE PEDIDOS PENDENTES (BADGE AUSTIN)
+# ==========================================================
+#
+# Mantido no cache e ajustado a cada entrada/saída de SUBMITTED.
+# O TTL faz a contagem ser refeita de tempos em tempos (autocorreção).
+#
+# Só vale com cache compartilhado (REDIS_URL): com LocMem cada processo
+# teria o seu contador e só veria os próprios ajustes. Sem ele a
+# contagem vem sempre do banco (COUNT no índice de status).
+
+PENDING_COUNT_KEY = "austin:pending_count"
+PENDING_COUNT_TIMEOUT = getattr(settings, "AUSTIN_BADGE_TIMEOUT", 300)
+
+
+def recount_pending():
+    count = TransferOrder.objects.filter(status=OrderStatus.SUBMITTED).count()
+    cache.set(PENDING_COUNT_KEY, count, PENDING_COUNT_TIMEOUT)
+    return count
+
+
+def pending_count():
+    if not is_shared():
+        return recount_pending()
+
+    count = cache.get(PENDING_COUNT_KEY)
+
+    if count is None:
+        count = recount_pending()
+
+    return count
+
+
+async def apending_count():
+    if not is_shared():
+        return await TransferOrder.objects.filter(status=OrderStatus.SUBMITTED).acount()
+
+    count = await aget(PENDING_COUNT_KEY)
+
+    if count is None:
+        count = await TransferOrder.objects.filter(status=OrderStatus.SUBMITTED).acount()
+        await aset(PENDING_COUNT_KEY, count, PENDING_COUNT_TIMEOUT)
+
+    return count
+
+
+def adjust_pending_count(delta):
+    if not is_shared():
+        count = recount_pending()
+    else:
+        try:
+            count = cache.incr(PENDING_COUNT_KEY, delta)
+        except ValueError:
+            count = recount_pending()
+
+        if count < 0:
+            count = recount_pending()
+
+    # 🔥 Outbox: falha no channel layer vira reenvio, não erro aqui
+    publish_badge_update(count)
+
+    return count
@@ -0,0 +1,63 @@
+import tempfile
+from contextlib import contextmanager
+
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+
+# ==========================================================
+# AMBIENTE ISOLADO PARA BENCHMARKS
+# ==========================================================
+#
+# Os benchmarks rodam sempre num banco de teste descartável (mesmo
+# engine do DATABASES configurado), nunca nos dados reais.
+
+BENCH_STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
+
+@contextmanager
+def benchmark_environment(keepdb=False):
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0, interactive=False, keepdb=keepdb)
+    old_config = runner.setup_databases()
+
+    try:
+        # PDFs/detalhes de pedidos fechados (core.artifacts) também descartáveis
+        with tempfile.TemporaryDirectory() as artifacts, override_settings(
+            STORAGES=BENCH_STORAGES, ORDER_ARTIFACTS_DIR=artifacts,
+        ):
+            yield
+    finally:
+        runner.teardown_databases(old_config)
+        teardown_test_environment()
+
+
+def make_client(username, group_name):
+    user, _ = User.objects.get_or_create(username=username)
+    group, _ = Group.objects.get_or_create(name=group_name)
+    user.groups.add(group)
+
+    client = Client()
+    client.force_login(user)
+    return user, client
+
+
+@contextmanager
+def count_queries():
+    with CaptureQueriesContext(connection) as ctx:
+        yield ctx
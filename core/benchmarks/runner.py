@@ -0,0 +1,270 @@
+import json
+import math
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+from core.benchmarks.env import count_queries
+from core.models import Product, TransferOrder, OrderStatus
+from core.pagination import encode_cursor, page_size
+from core.report_query import day_bounds
+
+
+# ==========================================================
+# CENÁRIOS — uma entrada por view (via test client)
+# ==========================================================
+#
+# Transições de estado (enviar, separar, despachar, receber) só valem
+# uma vez por pedido e ficam de fora; os POSTs medidos aqui são
+# repetíveis (adicionar ao carrinho, salvar quantidades iguais).
+
+def _range(days):
+    end = timezone.localdate()
+    return {"start": (end - timedelta(days=days)).isoformat(), "end": end.isoformat()}
+
+
+def build_scenarios(ctx):
+    order = ctx["order"]
+    received = ctx["received"]
+    cart = ctx["cart"]
+    week, quarter = _range(7), _range(ctx["days"])
+
+    return [
+        # ---------- QUEIMADOS ----------
+        ("q_products", "q", "get", reverse("q_products"), None),
+        ("q_products_add", "q", "post", reverse("q_products"),
+         {"product_id": ctx["product"].id, "qty": 1}),
+        ("q_categories", "q", "get", reverse("q_categories"), None),
+        ("q_cart", "q", "get", reverse("q_cart"), None),
+        ("q_cart_save", "q", "post", reverse("q_cart"),
+         {f"qty_{i.id}": i.qty_requested for i in cart.items.all()}),
+        ("q_orders", "q", "get", reverse("q_orders"), None),
+        ("q_order_detail", "q", "get", reverse("q_order_detail", args=[order.id]), None),
+        ("q_report_week", "q", "get", reverse("q_report"), week),
+        ("q_report_quarter", "q", "get", reverse("q_report"), quarter),
+        ("q_report_pdf_single", "q", "get", reverse("q_report_pdf_single", args=[order.id]), None),
+        ("q_report_pdf_week", "q", "get", reverse("q_report_pdf"), week),
+        # pedido fechado: PDF/detalhe saem do disco (core.artifacts)
+        ("q_order_detail_received", "q", "get", reverse("q_order_detail", args=[received.id]), None),
+        ("q_report_pdf_single_received", "q", "get",
+         reverse("q_report_pdf_single", args=[received.id]), None),
+        ("order_status_poll", "q", "get", reverse("order_status_poll", args=[order.id]), None),
+
+        # ---------- AUSTIN ----------
+        ("a_orders", "a", "get", reverse("a_orders"), None),
+        ("a_order_detail", "a", "get", reverse("a_order_detail", args=[order.id]), None),
+        ("a_order_detail_save", "a", "post", reverse("a_order_detail", args=[order.id]),
+         {**{f"sent_{i.id}": i.qty_sent for i in order.items.all()},
+          "notes_from_austin": order.notes_from_austin or ""}),
+        ("a_report_week", "a", "get", reverse("a_report"), week),
+        ("a_report_quarter", "a", "get", reverse("a_report"), quarter),
+        # última página do trimestre: com cursor custa o mesmo que a primeira
+        ("a_report_quarter_deep", "a", "get", reverse("a_report"),
+         {**quarter, "cursor": ctx["deep_cursor"]}),
+        ("a_report_pdf_single", "a", "get", reverse("a_report_pdf_single", args=[order.id]), None),
+        ("a_order_detail_received", "a", "get", reverse("a_order_detail", args=[received.id]), None),
+        ("a_report_pdf_single_received", "a", "get",
+         reverse("a_report_pdf_single", args=[received.id]), None),
+        ("a_report_pdf_week", "a", "get", reverse("a_report_pdf"), week),
+        ("a_report_csv_quarter", "a", "get", reverse("a_report_export"), {**quarter, "format": "csv"}),
+        ("a_report_xlsx_quarter", "a", "get", reverse("a_report_export"), {**quarter, "format": "xlsx"}),
+        ("a_product_report_quarter", "a", "get", reverse("a_product_report"), quarter),
+        ("austin_badge", "a", "get", reverse("austin_badge"), None),
+    ]
+
+
+def scenario_context(summary, days):
+    q_user = User.objects.get(username=summary["queimados_users"][0])
+
+    # pedido "típico" já despachado do usuário medido, com mais itens
+    order = (
+        TransferOrder.objects
+        .filter(created_by=q_user, status=OrderStatus.DISPATCHED)
+        .order_by("-item_count", "-id")
+        .first()
+    ) or TransferOrder.objects.filter(created_by=q_user).exclude(
+        status=OrderStatus.DRAFT
+    ).order_by("-item_count", "-id").first()
+
+    # pedido fechado do mesmo usuário, com mais itens
+    received = (
+        TransferOrder.objects
+        .filter(created_by=q_user, status=OrderStatus.RECEIVED)
+        .order_by("-item_count", "-id")
+        .first()
+    ) or order
+
+    # cursor que leva à última página do período (mais antiga)
+    oldest = (
+        TransferOrder.objects.exclude(status=OrderStatus.DRAFT)
+        .filter(created_at__gte=day_bounds(timezone.localdate() - timedelta(days=days), None)[0])
+        .order_by("created_at", "id")[page_size({}):]
+        .first()
+    )
+
+    return {
+        "q_user": q_user,
+        "a_user": User.objects.get(username=summary["austin_users"][0]),
+        "order": order,
+        "received": received,
+        "cart": TransferOrder.objects.get(created_by=q_user, status=OrderStatus.DRAFT),
+        "product": Product.objects.filter(active=True).order_by("id").first(),
+        "days": days,
+        "deep_cursor": encode_cursor(oldest) if oldest else "",
+    }
+
+
+# ==========================================================
+# MEDIÇÃO
+# ==========================================================
+
+def _consume(response):
+    # FileResponse/StreamingHttpResponse só geram o corpo quando lidos
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    response.close()
+
+
+def _request(client, method, url, data):
+    response = getattr(client, method)(url, data or {})
+    _consume(response)
+    return response
+
+
+def percentile(values, p):
+    """Percentil por posição mais próxima (valores já ordenados)."""
+    if not values:
+        return None
+    k = max(0, math.ceil(p / 100 * len(values)) - 1)
+    return values[k]
+
+
+def measure(client, method, url, data, iterations, warmup):
+    for _ in range(warmup):
+        _request(client, method, url, data)
+
+    # queries: uma execução isolada (deve ser igual em todas)
+    with count_queries() as ctx:
+        response = _request(client, method, url, data)
+    queries = len(ctx.captured_queries)
+
+    # memória: uma execução com tracemalloc (distorce o tempo, por isso à parte)
+    tracemalloc.start()
+    try:
+        _request(client, method, url, data)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        _request(client, method, url, data)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    timings.sort()
+
+    return {
+        "method": method.upper(),
+        "url": url,
+        "status": response.status_code,
+        "iterations": iterations,
+        "min_ms": round(timings[0], 3),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p90_ms": round(percentile(timings, 90), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+        "max_ms": round(timings[-1], 3),
+        "mean_ms": round(sum(timings) / len(timings), 3),
+        "queries": queries,
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def run_scenarios(scenarios, clients, iterations=30, warmup=3, only=None, progress=None):
+    results = {}
+
+    for name, who, method, url, data in scenarios:
+        if only and name not in only:
+            continue
+
+        results[name] = measure(clients[who], method, url, data, iterations, warmup)
+
+        if progress:
+            progress(name, results[name])
+
+    return results
+
+
+# ==========================================================
+# RESULTADO (JSON) E COMPARAÇÃO ENTRE COMMITS
+# ==========================================================
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata(seed_options, iterations, warmup):
+    return {
+        "revision": _git_revision(),
+        "created_at": timezone.now().isoformat(),
+        "database": connection.vendor,
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "seed": seed_options,
+        "iterations": iterations,
+        "warmup": warmup,
+    }
+
+
+def write_results(path, meta, results):
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump({"meta": meta, "results": results}, fh, indent=2, ensure_ascii=False)
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+COMPARE_METRICS = ("p50_ms", "p95_ms", "queries", "peak_kb")
+
+
+def compare_results(baseline, current):
+    """Linhas (view, métrica, antes, depois, variação %) das views em comum."""
+    rows = []
+
+    for name, now in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+
+        for metric in COMPARE_METRICS:
+            old, new = before.get(metric), now.get(metric)
+            if old is None or new is None:
+                continue
+
+            change = ((new - old) / old * 100) if old else None
+            rows.append((name, metric, old, new, change))
+
+    return rows
@@ -0,0 +1,231 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.models import Group, User
+from django.utils import timezone
+
+from core.catalog import bump_catalog_version
+from core.models import (
+    Category,
+    Product,
+    TransferOrder,
+    TransferOrderItem,
+    OrderLog,
+    OrderStatus,
+)
+from core.orders import TOTAL_FIELDS, order_totals
+
+
+# ==========================================================
+# MASSA DE DADOS SINTÉTICA (bulk_create)
+# ==========================================================
+
+BATCH_SIZE = 1000
+
+# Distribuição de status dos pedidos (fora o rascunho de cada usuário)
+STATUS_WEIGHTS = [
+    (OrderStatus.RECEIVED, 80),
+    (OrderStatus.DISPATCHED, 8),
+    (OrderStatus.PICKING, 4),
+    (OrderStatus.SUBMITTED, 6),
+    (OrderStatus.CANCELLED, 2),
+]
+
+
+def _users(prefix, group_name, count, password=None):
+    """Sem ``password`` os usuários não fazem login (só force_login)."""
+    group, _ = Group.objects.get_or_create(name=group_name)
+    users = []
+
+    for n in range(count):
+        user, created = User.objects.get_or_create(username=f"{prefix}{n}")
+        if created:
+            user.seeded = True
+            if password:
+                user.set_password(password)
+            else:
+                user.set_unusable_password()
+            user.save(update_fields=["password"])
+        user.groups.add(group)
+        users.append(user)
+
+    return users
+
+
+def seed_data(
+    categories=10,
+    products=200,
+    orders=2000,
+    max_items=20,
+    days=90,
+    queimados_users=10,
+    austin_users=3,
+    seed=42,
+    password=None,
+):
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    q_users = _users("bench_q", "QUEIMADOS", queimados_users, password)
+    a_users = _users("bench_a", "AUSTIN", austin_users, password)
+
+    # ---------- CATÁLOGO ----------
+    # nome é único: rodar de novo com a mesma semente reaproveita as categorias
+    names = [f"Categoria {n:03d} #{seed}" for n in range(categories)]
+    Category.objects.bulk_create([Category(name=name) for name in names], ignore_conflicts=True)
+    cats = list(Category.objects.filter(name__in=names).order_by("name"))
+
+    # sku identifica o produto: rodar de novo só cria os que faltam
+    skus = [f"SKU{n:05d}" for n in range(products)]
+    existing = set(Product.objects.filter(sku__in=skus).values_list("sku", flat=True))
+    actives = [rng.random() > 0.05 for _ in skus]
+
+    Product.objects.bulk_create([
+        Product(
+            sku=sku,
+            name=f"Produto {n:05d}",
+            unit="un",
+            category=cats[n % len(cats)],
+            active=active,
+        )
+        for n, (sku, active) in enumerate(zip(skus, actives))
+        if sku not in existing
+    ], batch_size=BATCH_SIZE)
+
+    # um por sku (bases antigas podem ter repetidos)
+    prods = list({
+        product.sku: product
+        for product in Product.objects.filter(sku__in=skus).order_by("-id")
+    }.values())
+    prods.sort(key=lambda product: product.sku)
+
+    statuses = [s for s, _ in STATUS_WEIGHTS]
+    weights = [w for _, w in STATUS_WEIGHTS]
+
+    # ---------- PEDIDOS (em lotes) ----------
+    created = 0
+
+    while created < orders:
+        size = min(BATCH_SIZE, orders - created)
+        batch = []
+
+        for _ in range(size):
+            status = rng.choices(statuses, weights)[0]
+            created_at = now - timedelta(seconds=rng.randint(0, days * 86400))
+
+            order = TransferOrder(
+                created_by=rng.choice(q_users),
+                status=status,
+                submitted_at=created_at + timedelta(minutes=rng.randint(1, 30)),
+            )
+
+            if status != OrderStatus.SUBMITTED:
+                order.picking_by = rng.choice(a_users)
+                order.picking_at = order.submitted_at + timedelta(minutes=rng.randint(1, 120))
+
+            if status in (OrderStatus.DISPATCHED, OrderStatus.RECEIVED):
+                order.dispatched_at = order.picking_at + timedelta(minutes=rng.randint(10, 120))
+
+            if status == OrderStatus.RECEIVED:
+                order.received_at = order.dispatched_at + timedelta(minutes=rng.randint(20, 240))
+
+            order._seed_created_at = created_at
+            batch.append(order)
+
+        batch = TransferOrder.objects.bulk_create(batch)
+
+        items, logs = [], []
+
+        for order in batch:
+            lines = rng.sample(prods, k=rng.randint(1, min(max_items, len(prods))))
+            shipped = order.status in (OrderStatus.DISPATCHED, OrderStatus.RECEIVED)
+
+            for product in lines:
+                requested = rng.randint(1, 20)
+                sent = max(0, requested + rng.choice([0, 0, 0, -1, -2, 1])) if shipped else 0
+
+                items.append(TransferOrderItem(
+                    order=order,
+                    product=product,
+                    qty_requested=requested,
+                    qty_sent=sent,
+                ))
+
+            for name, value in order_totals(items[-len(lines):]).items():
+                setattr(order, name, value)
+
+            # auto_now/auto_now_add: datas reais aplicadas via bulk_update
+            order.created_at = order._seed_created_at
+            order.updated_at = order.received_at or order.dispatched_at or order.created_at
+
+            for action in ("Enviou o pedido para Austin", "Iniciou separação", "Despachou o pedido"):
+                logs.append(OrderLog(order=order, user=order.created_by, action=action))
+
+        TransferOrderItem.objects.bulk_create(items, batch_size=BATCH_SIZE)
+        TransferOrder.objects.bulk_update(
+            batch,
+            ["created_at", "updated_at", *TOTAL_FIELDS],
+            batch_size=BATCH_SIZE,
+        )
+
+        logs = OrderLog.objects.bulk_create(logs, batch_size=BATCH_SIZE)
+        for log in logs:
+            log.created_at = log.order.created_at
+        OrderLog.objects.bulk_update(logs, ["created_at"], batch_size=BATCH_SIZE)
+
+        created += size
+
+    # ---------- UM CARRINHO ABERTO POR USUÁRIO ----------
+    for user in q_users:
+        if TransferOrder.objects.filter(created_by=user, status=OrderStatus.DRAFT).exists():
+            continue
+
+        cart = TransferOrder.objects.create(created_by=user, status=OrderStatus.DRAFT)
+        lines = rng.sample(prods, k=min(5, len(prods)))
+        cart_items = TransferOrderItem.objects.bulk_create([
+            TransferOrderItem(order=cart, product=p, qty_requested=2) for p in lines
+        ])
+        TransferOrder.objects.filter(pk=cart.pk).update(**order_totals(cart_items))
+
+    # bulk_create não dispara os signals do catálogo
+    bump_catalog_version()
+
+    return {
+        "categories": len(cats),
+        "products": len(prods),
+        "orders": orders,
+        "queimados_users": [u.username for u in q_users],
+        "austin_users": [u.username for u in a_users],
+        "new_users": [u.username for u in q_users + a_users if getattr(u, "seeded", False)],
+    }
+
+
+# ==========================================================
+# OPÇÕES DE LINHA DE COMANDO (seed_benchmark_data / run_benchmarks)
+# ==========================================================
+
+SEED_OPTIONS = (
+    ("categories", 10, "Número de categorias."),
+    ("products", 200, "Número de produtos."),
+    ("orders", 2000, "Número de pedidos (fora os carrinhos)."),
+    ("max_items", 20, "Máximo de itens por pedido."),
+    ("days", 90, "Janela (em dias) das datas de criação."),
+    ("queimados_users", 10, "Usuários de Queimados."),
+    ("austin_users", 3, "Usuários de Austin."),
+    ("seed", 42, "Semente do gerador aleatório."),
+)
+
+
+def add_seed_arguments(parser):
+    for name, default, help_text in SEED_OPTIONS:
+        parser.add_argument(
+            "--" + name.replace("_", "-"),
+            dest=name,
+            type=int,
+            default=default,
+            help=f"{help_text} (padrão: {default})",
+        )
+
+
+def seed_options(options):
+    return {name: options[name] for name, _, _ in SEED_OPTIONS}
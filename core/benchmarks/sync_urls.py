@@ -0,0 +1,39 @@
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path
+from django.views.decorators.http import require_GET
+
+from config.urls import urlpatterns as project_urlpatterns
+from core.badge import pending_count
+from core.models import TransferOrder
+from core.permissions import require_austin
+
+
+# ==========================================================
+# VERSÕES SÍNCRONAS DE REFERÊNCIA (SÓ PARA BENCHMARK)
+# ==========================================================
+#
+# Iguais às views de antes do ETag/long-poll, montadas em /sync/ para o
+# bench_async_endpoints comparar as duas no mesmo processo.
+
+@require_austin
+@require_GET
+def sync_austin_badge(request):
+    return JsonResponse({"count": pending_count()})
+
+
+@login_required
+def sync_order_status_poll(request, order_id):
+    order = get_object_or_404(TransferOrder, id=order_id)
+
+    return JsonResponse({
+        "status": order.status,
+        "status_display": order.get_status_display(),
+    })
+
+
+urlpatterns = [
+    path("sync/badge/", sync_austin_badge, name="sync_austin_badge"),
+    path("sync/poll/<int:order_id>/", sync_order_status_poll, name="sync_order_status_poll"),
+] + project_urlpatterns
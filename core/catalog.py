@@ -0,0 +1,103 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+from core.models import Category, Product
+
+
+# ==========================================================
+# SNAPSHOT DO CATÁLOGO (CATEGORIAS + PRODUTOS ATIVOS)
+# ==========================================================
+#
+# A árvore de categorias/produtos fica serializada no cache, com uma
+# chave por versão. Os signals de Category/Product sobem a versão e o
+# próximo acesso reconstrói o snapshot. Em regime normal a página de
+# produtos não faz nenhuma query de catálogo.
+
+CATALOG_VERSION_KEY = "catalog:version"
+CATALOG_SNAPSHOT_KEY = "catalog:snapshot:{version}"
+
+# TTL de segurança (caches locais por processo não enxergam o bump
+# feito em outro processo)
+CATALOG_CACHE_TIMEOUT = getattr(settings, "CATALOG_CACHE_TIMEOUT", 300)
+
+
+def _new_version():
+    return int(time.time() * 1000)
+
+
+def get_catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, _new_version(), None)
+        version = cache.get(CATALOG_VERSION_KEY)
+
+    return version
+
+
+def bump_catalog_version():
+    try:
+        return cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        # chave expirou/foi limpa: recomeça de um valor sempre maior
+        version = _new_version()
+        cache.set(CATALOG_VERSION_KEY, version, None)
+        return version
+
+
+def _image_url(field):
+    if not field:
+        return None
+    try:
+        return field.url
+    except Exception:
+        return None
+
+
+def build_catalog_snapshot():
+    products = Product.objects.filter(active=True).order_by("name")
+
+    categories = (
+        Category.objects
+        .filter(active=True)
+        .prefetch_related(Prefetch("products", queryset=products))
+        .order_by("name")
+    )
+
+    snapshot = []
+
+    for cat in categories:
+        items = [
+            {
+                "id": p.id,
+                "name": p.name,
+                "sku": p.sku or "",
+                "unit": p.unit,
+                "image_url": _image_url(p.image),
+            }
+            for p in cat.products.all()
+        ]
+
+        snapshot.append({
+            "id": cat.id,
+            "name": cat.name,
+            "image_url": _image_url(cat.image),
+            "product_count": len(items),
+            "products": items,
+        })
+
+    return snapshot
+
+
+def get_catalog_snapshot():
+    key = CATALOG_SNAPSHOT_KEY.format(version=get_catalog_version())
+    snapshot = cache.get(key)
+
+    if snapshot is None:
+        snapshot = build_catalog_snapshot()
+        cache.set(key, snapshot, CATALOG_CACHE_TIMEOUT)
+
+    return snapshot
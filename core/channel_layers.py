@@ -0,0 +1,171 @@
+import asyncio
+import json
+import logging
+import uuid
+
+from asgiref.sync import sync_to_async
+from channels.layers import InMemoryChannelLayer
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+
+# Postgres recusa NOTIFY com payload de 8000 bytes ou mais
+NOTIFY_PAYLOAD_LIMIT = 7999
+
+
+class PostgresChannelLayer(InMemoryChannelLayer):
+    """Channel layer multi-processo sobre LISTEN/NOTIFY do Postgres.
+
+    Filas e grupos continuam em memória (os sockets vivem no processo que
+    os aceitou). O que cruza processos vai por ``NOTIFY``:
+
+    - ``group_send``: todo processo recebe e entrega aos canais locais
+      que estão no grupo;
+    - ``send`` para canal de outro processo: só o dono entrega.
+
+    Cada processo mantém uma conexão dedicada com ``LISTEN``, aberta no
+    primeiro ``new_channel``/``group_add``/``receive`` e refeita se cair.
+    Mensagens precisam ser serializáveis em JSON. O NOTIFY sai pela
+    conexão do Django: dentro de ``atomic`` só é entregue no commit.
+    """
+
+    def __init__(
+        self,
+        database="default",
+        channel="channels_layer",
+        reconnect_delay=1.0,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.database = database
+        self.notify_channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.client_prefix = "pg" + uuid.uuid4().hex[:12]
+
+        self._listener = None
+        self._listener_loop = None
+
+    # ======================
+    # API DO CHANNEL LAYER
+    # ======================
+
+    async def new_channel(self, prefix="specific."):
+        self._ensure_listener()
+        return f"{prefix}.{self.client_prefix}!{uuid.uuid4().hex[:12]}"
+
+    async def receive(self, channel):
+        self._ensure_listener()
+        return await super().receive(channel)
+
+    async def send(self, channel, message):
+        if self._is_local(channel):
+            await super().send(channel, message)
+            return
+
+        assert isinstance(message, dict), "message is not a dict"
+        self.require_valid_channel_name(channel)
+        await self._notify({"c": channel, "m": message})
+
+    async def group_add(self, group, channel):
+        self._ensure_listener()
+        await super().group_add(group, channel)
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), "Message is not a dict"
+        self.require_valid_group_name(group)
+        await self._notify({"g": group, "m": message})
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+
+    # ======================
+    # NOTIFY (envio)
+    # ======================
+
+    async def _notify(self, envelope):
+        payload = json.dumps(envelope, separators=(",", ":"))
+
+        if len(payload.encode()) > NOTIFY_PAYLOAD_LIMIT:
+            raise ValueError(f"Mensagem grande demais para NOTIFY ({len(payload)} bytes)")
+
+        # thread_sensitive: dentro de uma view usa a mesma conexão (e
+        # transação) do request
+        await sync_to_async(self._notify_sync, thread_sensitive=True)(payload)
+
+    def _notify_sync(self, payload):
+        with connections[self.database].cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.notify_channel, payload])
+
+    # ======================
+    # LISTEN (recebimento)
+    # ======================
+
+    def _is_local(self, channel):
+        return "!" in channel and channel.split("!", 1)[0].endswith(self.client_prefix)
+
+    def _ensure_listener(self):
+        loop = asyncio.get_running_loop()
+
+        if (
+            self._listener is None
+            or self._listener.done()
+            or self._listener_loop is not loop
+        ):
+            self._listener = loop.create_task(self._listen())
+            self._listener_loop = loop
+
+    def _listen_params(self):
+        params = connections[self.database].get_connection_params()
+
+        # cursor/adaptadores do Django são síncronos
+        params.pop("cursor_factory", None)
+        params.pop("context", None)
+        return params
+
+    async def _listen(self):
+        import psycopg
+        from psycopg import sql
+
+        while True:
+            try:
+                conn = await psycopg.AsyncConnection.connect(
+                    autocommit=True,
+                    **self._listen_params(),
+                )
+
+                async with conn:
+                    await conn.execute(
+                        sql.SQL("LISTEN {}").format(sql.Identifier(self.notify_channel))
+                    )
+
+                    async for notify in conn.notifies():
+                        await self._deliver(notify.payload)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # 🔥 o que for publicado enquanto isso se perde; as telas
+                # ainda têm o polling como reserva
+                logger.exception("LISTEN caiu; reconectando")
+                await asyncio.sleep(self.reconnect_delay)
+
+    async def _deliver(self, payload):
+        try:
+            envelope = json.loads(payload)
+            message = envelope["m"]
+        except (ValueError, KeyError, TypeError):
+            logger.warning("NOTIFY inválido ignorado: %.200s", payload)
+            return
+
+        if "g" in envelope:
+            await InMemoryChannelLayer.group_send(self, envelope["g"], message)
+
+        elif self._is_local(envelope.get("c", "")):
+            try:
+                await InMemoryChannelLayer.send(self, envelope["c"], message)
+            except Exception:
+                logger.warning("Canal %s cheio; mensagem descartada", envelope["c"])
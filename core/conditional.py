@@ -0,0 +1,62 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from core.catalog import get_catalog_version
+
+
+# ==========================================================
+# GET CONDICIONAL (ETag / Last-Modified -> 304)
+# ==========================================================
+#
+# O ETag sai da versão do pedido (TransferOrder.version), lida numa
+# query só; com a cópia do cliente em dia nada mais é consultado.
+# "no-cache" obriga o navegador a revalidar em todo acesso.
+
+def weak_etag(*parts):
+    return "W/" + quote_etag("-".join(str(p) for p in parts))
+
+
+def order_etag(order):
+    return weak_etag("o", order.id, order.version)
+
+
+def order_page_etag(request, order):
+    """ETag da página de detalhe: além do pedido, o que o layout mostra.
+
+    Usuário/papel (menu), versão do catálogo (nomes de produto) e o
+    segredo CSRF (formulários) mudam o HTML sem mudar o pedido.
+    """
+    csrf = request.META.get("CSRF_COOKIE") or ""
+
+    return weak_etag(
+        "p",
+        order.id,
+        order.version,
+        request.user.pk,
+        request.branch_role or "",
+        get_catalog_version(),
+        hashlib.sha1(csrf.encode()).hexdigest()[:8],
+    )
+
+
+def not_modified(request, etag, last_modified=None):
+    """Resposta 304 (ou 412) se a cópia do cliente vale; senão None."""
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    response.headers["ETag"] = etag
+    if last_modified:
+        response.headers["Last-Modified"] = http_date(last_modified.timestamp())
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
@@ -1,24 +1,130 @@
+import logging
+from collections import deque
+
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 import json
 
+from core.badge import apending_count
+from core.models import Branch, TransferOrder
+from core.realtime import branch_group, user_group, order_group
+from core.roles import aload_user_groups
+
+
+logger = logging.getLogger(__name__)
+
 
 class OrderConsumer(AsyncWebsocketConsumer):
+    """Socket de pedidos.
+
+    Ao conectar entra no grupo da filial e no grupo do usuário. O detalhe
+    de um pedido é seguido sob demanda:
+
+        {"action": "subscribe", "order_id": 12}
+        {"action": "unsubscribe", "order_id": 12}
+    """
 
     async def connect(self):
-        print("🔥 CONECTOU")
-        await self.channel_layer.group_add(
-            "orders_group",
-            self.channel_name
-        )
+        user = self.scope.get("user")
+
+        if user is None or not user.is_authenticated:
+            await self.close()
+            return
+
+        self.joined = set()
+        self.seen_events = deque(maxlen=64)
+        self.branch = await self._get_branch(user)
+
+        await self._join(user_group(user.id))
+
+        if self.branch:
+            await self._join(branch_group(self.branch))
+
+        logger.debug("socket conectado: user=%s filial=%s", user.pk, self.branch)
         await self.accept()
 
+        # Austin recebe o contador atual já na conexão (sem polling)
+        if self.branch == Branch.AUSTIN:
+            await self._reply("badge_update", count=await apending_count())
+
     async def disconnect(self, close_code):
-        print("❌ DESCONECTOU")
-        await self.channel_layer.group_discard(
-            "orders_group",
-            self.channel_name
-        )
+        logger.debug("socket desconectado: code=%s", close_code)
+        for group in list(getattr(self, "joined", ())):
+            await self._leave(group)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        try:
+            message = json.loads(text_data or "")
+            action = message["action"]
+            order_id = int(message["order_id"])
+        except (ValueError, TypeError, KeyError):
+            await self._reply("error", detail="Mensagem inválida.")
+            return
+
+        if action == "subscribe":
+            if not await self._can_follow(order_id):
+                await self._reply("error", order_id=order_id, detail="Sem acesso ao pedido.")
+                return
+
+            await self._join(order_group(order_id))
+            await self._reply("subscribed", order_id=order_id)
+
+        elif action == "unsubscribe":
+            await self._leave(order_group(order_id))
+            await self._reply("unsubscribed", order_id=order_id)
+
+        else:
+            await self._reply("error", detail="Ação desconhecida.")
 
     async def order_update(self, event):
-        print("📩 RECEBEU EVENTO:", event)
-        await self.send(text_data=json.dumps(event))
\ No newline at end of file
+        event_id = event.get("event_id")
+
+        if event_id:
+            if event_id in self.seen_events:
+                return
+            self.seen_events.append(event_id)
+
+        await self.send(text_data=json.dumps(event))
+
+    async def badge_update(self, event):
+        await self.send(text_data=json.dumps(event))
+
+    # ======================
+    # HELPERS
+    # ======================
+
+    async def _join(self, group):
+        if group not in self.joined:
+            await self.channel_layer.group_add(group, self.channel_name)
+            self.joined.add(group)
+
+    async def _leave(self, group):
+        if group in self.joined:
+            await self.channel_layer.group_discard(group, self.channel_name)
+            self.joined.discard(group)
+
+    async def _reply(self, kind, **data):
+        await self.send(text_data=json.dumps({"type": kind, **data}))
+
+    async def _get_branch(self, user):
+        # mesmo cache por sessão (e mesma invalidação) das views HTTP
+        session = self.scope.get("session")
+        names = await aload_user_groups(user, session)
+
+        if session is not None and session.modified:
+            await session.asave()
+
+        for branch in (Branch.AUSTIN, Branch.QUEIMADOS):
+            if branch in names:
+                return branch
+        return None
+
+    @database_sync_to_async
+    def _can_follow(self, order_id):
+        if self.branch == Branch.AUSTIN:
+            return TransferOrder.objects.filter(id=order_id).exists()
+
+        return TransferOrder.objects.filter(
+            id=order_id,
+            created_by=self.scope["user"],
+        ).exists()
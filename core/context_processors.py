@@ -1,23 +1,30 @@
+from django.utils.functional import SimpleLazyObject
+
 from core.models import TransferOrder, OrderStatus
+from core.roles import has_group
+
+
+def _cart_totals(user):
+    # Um único SELECT indexado no rascunho (totais já desnormalizados)
+    totals = TransferOrder.objects.filter(
+        created_by=user,
+        status=OrderStatus.DRAFT
+    ).values("item_count", "qty_requested_total").first()
+
+    return totals or {"item_count": 0, "qty_requested_total": 0}
+
 
 def cart_badge(request):
     if not request.user.is_authenticated:
         return {}
 
-    if request.user.groups.filter(name="QUEIMADOS").exists():
-
-        cart = TransferOrder.objects.filter(
-            created_by=request.user,
-            status=OrderStatus.DRAFT
-        ).first()
-
-        if cart:
-            total = sum(item.qty_requested for item in cart.items.all())
-        else:
-            total = 0
+    if not has_group(request, "QUEIMADOS"):
+        return {}
 
-        return {
-            "cart_count": total
-        }
+    # Lazy: só consulta se o template realmente mostrar o badge
+    totals = SimpleLazyObject(lambda: _cart_totals(request.user))
 
-    return {}
+    return {
+        "cart_count": SimpleLazyObject(lambda: totals["qty_requested_total"]),
+        "cart_lines": SimpleLazyObject(lambda: totals["item_count"]),
+    }
@@ -0,0 +1,258 @@
+import logging
+import queue
+import threading
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import OutboxEvent
+
+
+logger = logging.getLogger(__name__)
+
+
+# ==========================================================
+# OUTBOX DE EVENTOS (TEMPO REAL)
+# ==========================================================
+#
+# publish_event() grava o evento na transação corrente. Depois do
+# commit, todos os eventos da transação seguem juntos para o dispatcher:
+#
+#   thread  -> fila de uma thread do processo (o request não espera)
+#   inline  -> publica no próprio on_commit (dev, InMemoryChannelLayer)
+#
+# Rollback descarta o evento junto com a mudança. O que falhar no
+# channel layer fica pendente e é reenviado por dispatch_due() (a
+# própria thread ou o comando dispatch_outbox).
+#
+# A limpeza dos antigos (prune_outbox) nunca roda no request: só na
+# thread do dispatcher e no comando dispatch_outbox.
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class _Batch:
+    """Callback do on_commit com os eventos de uma transação."""
+
+    def __init__(self):
+        self.ids = []
+
+    def __call__(self):
+        if _setting("OUTBOX_DISPATCH", "inline") == "thread":
+            _enqueue(self.ids)
+            return
+
+        try:
+            dispatch_events(self.ids)
+        except Exception:
+            # continua pendente: dispatch_due() tenta de novo
+            logger.exception("Falha ao publicar eventos %s", self.ids)
+
+
+def _pending_batch(using):
+    # O on_commit já registrado nesta transação (se ainda valer)
+    for _, func, _ in connections[using].run_on_commit:
+        if isinstance(func, _Batch):
+            return func
+    return None
+
+
+def publish_event(groups, event, using=DEFAULT_DB_ALIAS):
+    """API única de publicação: grava no outbox, envia depois do commit."""
+    now = timezone.now()
+
+    row = OutboxEvent.objects.using(using).create(
+        groups=list(groups),
+        payload=event,
+        # a varredura só pega o evento se o envio imediato não acontecer
+        next_attempt_at=now + timedelta(seconds=_setting("OUTBOX_RETRY_DELAY", 10)),
+    )
+
+    batch = _pending_batch(using) if connections[using].in_atomic_block else None
+
+    if batch is None:
+        batch = _Batch()
+        batch.ids.append(row.id)
+        transaction.on_commit(batch, using=using, robust=True)
+    else:
+        batch.ids.append(row.id)
+
+    return row
+
+
+# ==========================================================
+# ENVIO PARA O CHANNEL LAYER
+# ==========================================================
+
+async def _send_rows(channel_layer, rows):
+    failures = {}
+
+    for row in rows:
+        try:
+            for group in row.groups:
+                await channel_layer.group_send(group, row.payload)
+        except Exception as exc:
+            failures[row.id] = exc
+
+    return failures
+
+
+def _deliver(rows):
+    """Publica as linhas e marca enviadas/falhas. Retorna (ok, falhas)."""
+    if not rows:
+        return 0, 0
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        failures = {}
+    else:
+        failures = async_to_sync(_send_rows)(channel_layer, rows)
+
+    now = timezone.now()
+    sent = [row.id for row in rows if row.id not in failures]
+
+    if sent:
+        OutboxEvent.objects.filter(id__in=sent).update(sent_at=now)
+
+    retry_delay = _setting("OUTBOX_RETRY_DELAY", 10)
+
+    for row in rows:
+        if row.id not in failures:
+            continue
+
+        # backoff exponencial (10s, 20s, 40s... até 1h)
+        row.attempts += 1
+        row.next_attempt_at = now + timedelta(
+            seconds=min(retry_delay * 2 ** (row.attempts - 1), 3600)
+        )
+        row.last_error = repr(failures[row.id])[:1000]
+
+    if failures:
+        OutboxEvent.objects.bulk_update(
+            [row for row in rows if row.id in failures],
+            ["attempts", "next_attempt_at", "last_error"],
+        )
+
+    return len(sent), len(failures)
+
+
+def dispatch_events(ids):
+    rows = list(
+        OutboxEvent.objects.filter(id__in=ids, sent_at__isnull=True).order_by("id")
+    )
+    return _deliver(rows)
+
+
+def dispatch_due(limit=None):
+    """Reenvia pendentes vencidos (falhas ou envios que não aconteceram)."""
+    limit = limit or _setting("OUTBOX_BATCH_SIZE", 100)
+
+    with transaction.atomic():
+        # skip_locked: vários processos varrendo não pegam o mesmo evento
+        rows = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(
+                sent_at__isnull=True,
+                next_attempt_at__lte=timezone.now(),
+                attempts__lt=_setting("OUTBOX_MAX_ATTEMPTS", 10),
+            )
+            .order_by("next_attempt_at")[:limit]
+        )
+        return _deliver(rows)
+
+
+def prune_outbox():
+    """Apaga enviados (e desistidos) mais velhos que OUTBOX_RETENTION."""
+    cutoff = timezone.now() - timedelta(seconds=_setting("OUTBOX_RETENTION", 24 * 3600))
+
+    deleted, _ = OutboxEvent.objects.filter(created_at__lt=cutoff).filter(
+        Q(sent_at__isnull=False)
+        | Q(attempts__gte=_setting("OUTBOX_MAX_ATTEMPTS", 10))
+    ).delete()
+    return deleted
+
+
+_last_prune = None
+
+
+def prune_if_due():
+    """prune_outbox() no máximo uma vez por OUTBOX_PRUNE_INTERVAL neste
+    processo (a primeira logo na primeira volta do dispatcher)."""
+    global _last_prune
+
+    now = timezone.now()
+    interval = timedelta(seconds=_setting("OUTBOX_PRUNE_INTERVAL", 3600))
+
+    if _last_prune is not None and now - _last_prune < interval:
+        return 0
+
+    _last_prune = now
+    return prune_outbox()
+
+
+# ==========================================================
+# DISPATCHER EM THREAD (UM POR PROCESSO)
+# ==========================================================
+
+_queue = queue.Queue()
+_thread = None
+_thread_lock = threading.Lock()
+
+
+def _enqueue(ids):
+    _ensure_dispatcher()
+    _queue.put(list(ids))
+
+
+def _ensure_dispatcher():
+    global _thread
+
+    with _thread_lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(
+                target=_dispatcher_loop,
+                name="outbox-dispatcher",
+                daemon=True,
+            )
+            _thread.start()
+
+
+def _dispatcher_loop():
+    interval = _setting("OUTBOX_SWEEP_INTERVAL", 5)
+    batch_size = _setting("OUTBOX_BATCH_SIZE", 100)
+    last_sweep = timezone.now()
+
+    while True:
+        try:
+            ids = _queue.get(timeout=interval)
+        except queue.Empty:
+            ids = []
+
+        # junta o que mais chegou enquanto isso (vários requests, um envio)
+        while len(ids) < batch_size:
+            try:
+                ids.extend(_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        try:
+            if ids:
+                dispatch_events(ids)
+
+            if timezone.now() - last_sweep >= timedelta(seconds=interval):
+                dispatch_due()
+                last_sweep = timezone.now()
+
+            # sem o comando dispatch_outbox rodando, a limpeza é daqui
+            prune_if_due()
+        except Exception:
+            logger.exception("Dispatcher do outbox falhou")
+        finally:
+            # devolve a conexão (pool) entre um lote e outro
+            connections.close_all()
@@ -0,0 +1,297 @@
+import csv
+import os
+import re
+import zipfile
+from datetime import datetime, timedelta
+from xml.sax.saxutils import escape
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from core.models import OrderStatus
+from core.report_query import REPORTS, report_items
+
+
+# ==========================================================
+# EXPORTAÇÃO CSV / XLSX DOS RELATÓRIOS (STREAMING)
+# ==========================================================
+#
+# Uma linha por item de pedido. Os itens saem do banco em blocos
+# (.iterator(): cursor de servidor no Postgres) e cada bloco vira bytes
+# e segue para o cliente antes do próximo ser lido — memória constante
+# para qualquer período, primeiro byte logo após a primeira consulta.
+#
+# O XLSX é montado à mão (zip + XML da planilha em streaming), sem
+# dependência nova: zipfile escreve num destino sem seek usando
+# data descriptors.
+
+EXPORT_CHUNK_SIZE = getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+
+# Bytes acumulados antes de entregar um pedaço da resposta
+EXPORT_FLUSH_SIZE = 64 * 1024
+
+COLUMNS = (
+    "Pedido",
+    "Status",
+    "Criado em",
+    "Enviado em",
+    "Despachado em",
+    "Recebido em",
+    "Operador",
+    "Produto",
+    "SKU",
+    "Unidade",
+    "Qtd pedida",
+    "Qtd enviada",
+)
+
+# cronológica, itens de um pedido juntos
+EXPORT_ORDERING = ("order__created_at", "order_id", "id")
+
+STATUS_LABELS = dict(OrderStatus.choices)
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def export_rows(kind, query):
+    """Tuplas na ordem de COLUMNS (datas locais), lidas em blocos."""
+    operator = REPORTS[kind]["operator_field"]
+    tz = timezone.get_current_timezone()
+
+    rows = report_items(kind, query).order_by(*EXPORT_ORDERING).values_list(
+        "order_id",
+        "order__status",
+        "order__created_at",
+        "order__submitted_at",
+        "order__dispatched_at",
+        "order__received_at",
+        f"order__{operator}__username",
+        "product__name",
+        "product__sku",
+        "product__unit",
+        "qty_requested",
+        "qty_sent",
+    )
+
+    for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        order_id, status, *dates, username, name, sku, unit, requested, sent = row
+
+        yield (
+            order_id,
+            STATUS_LABELS.get(status, status),
+            *(d.astimezone(tz) if d else None for d in dates),
+            username or "",
+            name,
+            sku or "",
+            unit,
+            requested,
+            sent,
+        )
+
+
+class _Sink:
+    """Destino de escrita que só acumula; o gerador esvazia com take()."""
+
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.parts.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b"".join(self.parts)
+        self.parts, self.size = [], 0
+        return data
+
+
+# ======================
+# CSV
+# ======================
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.strftime("%d/%m/%Y %H:%M")
+    return "" if value is None else value
+
+
+def csv_chunks(rows):
+    sink = _Sink()
+    # ";" e BOM: o Excel em pt-BR abre direto, com acentos
+    writer = csv.writer(sink, delimiter=";")
+
+    sink.write("\ufeff")
+    writer.writerow(COLUMNS)
+
+    for row in rows:
+        writer.writerow([_csv_value(v) for v in row])
+
+        if sink.size >= EXPORT_FLUSH_SIZE:
+            yield sink.take()
+
+    yield sink.take()
+
+
+# ======================
+# XLSX
+# ======================
+
+_XLSX_STATIC = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Relatório" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    # estilo 1 = data/hora, estilo 2 = cabeçalho em negrito
+    "xl/styles.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<numFmts count="1"><numFmt numFmtId="164" formatCode="dd/mm/yyyy hh:mm"/></numFmts>'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+        '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+        '</styleSheet>'
+    ),
+}
+
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetData>'
+)
+
+_SHEET_TAIL = "</sheetData></worksheet>"
+
+_EXCEL_EPOCH = datetime(1899, 12, 30)
+
+# caracteres de controle não são válidos em XML 1.0
+_XML_INVALID = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _xlsx_cell(value, style=0):
+    if value is None:
+        return "<c/>"
+
+    if isinstance(value, datetime):
+        serial = (value.replace(tzinfo=None) - _EXCEL_EPOCH) / timedelta(days=1)
+        return f'<c s="1"><v>{serial:.6f}</v></c>'
+
+    if isinstance(value, int):
+        return f"<c><v>{value}</v></c>"
+
+    text = escape(_XML_INVALID.sub("", str(value)))
+    style = f' s="{style}"' if style else ""
+    return f'<c t="inlineStr"{style}><is><t>{text}</t></is></c>'
+
+
+def _xlsx_row(values, style=0):
+    return "<row>" + "".join(_xlsx_cell(v, style) for v in values) + "</row>"
+
+
+def xlsx_chunks(rows):
+    sink = _Sink()
+
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_STATIC.items():
+            archive.writestr(name, content)
+
+        with archive.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            sheet.write(_SHEET_HEAD.encode())
+            sheet.write(_xlsx_row(COLUMNS, style=2).encode())
+
+            for row in rows:
+                sheet.write(_xlsx_row(row).encode("utf-8"))
+
+                # o zip comprime aos poucos: o sink enche sozinho
+                if sink.size >= EXPORT_FLUSH_SIZE:
+                    yield sink.take()
+
+            sheet.write(_SHEET_TAIL.encode())
+
+    yield sink.take()
+
+
+# ======================
+# RESPOSTA
+# ======================
+
+WRITERS = {
+    "csv": csv_chunks,
+    "xlsx": xlsx_chunks,
+}
+
+
+async def _aiter(chunks):
+    """Consome o gerador síncrono (banco) fora do event loop.
+
+    Sob ASGI o Django junta um iterador síncrono inteiro em memória
+    antes de enviar; async, cada bloco sai assim que fica pronto.
+    """
+    next_chunk = sync_to_async(next)
+
+    try:
+        # StopIteration não atravessa a thread: fim = None
+        while (chunk := await next_chunk(chunks, None)) is not None:
+            yield chunk
+    finally:
+        # cliente desistiu: fecha o cursor do banco
+        await sync_to_async(chunks.close)()
+
+
+def export_response(request, kind, fmt, query):
+    chunks = WRITERS[fmt](export_rows(kind, query))
+
+    if isinstance(request, ASGIRequest):
+        chunks = _aiter(chunks)
+
+    filename = os.path.splitext(REPORTS[kind]["filename"])[0]
+    if query.start or query.end:
+        filename += f"_{query.start or 'inicio'}_{query.end or 'hoje'}"
+
+    response = StreamingHttpResponse(chunks, content_type=FORMATS[fmt])
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+    return response
@@ -0,0 +1,113 @@
+import asyncio
+import math
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+from core.models import TransferOrder
+from core.realtime import order_group
+
+
+# ==========================================================
+# LONG-POLL DO STATUS DO PEDIDO
+# ==========================================================
+#
+# Reserva para quem não consegue manter o WebSocket (proxy que derruba
+# o upgrade). O cliente manda a última versão que conhece:
+#
+#   GET /pedido/<id>/poll/?since=<version>[&wait=<segundos>]
+#
+# Se o pedido já mudou, responde na hora. Senão a resposta fica parada
+# até chegar um order_update no grupo order_<id> do channel layer ou
+# estourar o tempo. Sem ?since= é o poll comum.
+#
+# A view é síncrona (async_to_sync): a espera ocupa a thread do request
+# por até LONGPOLL_TIMEOUT.
+
+POLL_FIELDS = ("status", "version", "updated_at")
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def longpoll_params(params):
+    """(since, timeout) a partir da query string. ValueError se inválido."""
+    since = params.get("since")
+    if since in (None, ""):
+        return None, 0
+
+    since = int(since)
+    limit = _setting("LONGPOLL_TIMEOUT", 25)
+
+    wait = params.get("wait")
+    timeout = limit if wait in (None, "") else float(wait)
+
+    if since < 0 or timeout < 0:
+        raise ValueError("since/wait negativos")
+
+    # float() aceita "nan"/"inf": o prazo da espera viraria NaN
+    if not math.isfinite(timeout):
+        raise ValueError("wait não finito")
+
+    # 🔥 nunca acima do limite: proxies cortam conexão ociosa (~30s)
+    return since, min(timeout, limit)
+
+
+async def _load(order_id):
+    return await TransferOrder.objects.only(*POLL_FIELDS).filter(id=order_id).afirst()
+
+
+async def poll_order(order_id, since=None, timeout=0):
+    """O pedido (só POLL_FIELDS) assim que sair da versão `since`.
+
+    None se o pedido não existe. Estourado o tempo, devolve o pedido
+    como está (mesma versão).
+    """
+    if since is None:
+        return await _load(order_id)
+
+    channel_layer = get_channel_layer()
+    group = order_group(order_id)
+    channel = None
+
+    # Entra no grupo ANTES de ler: um commit entre a leitura e o
+    # group_add não passa despercebido
+    if channel_layer is not None:
+        channel = await channel_layer.new_channel()
+        await channel_layer.group_add(group, channel)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    # Nem toda mudança publica evento (ex.: quantidades salvas por
+    # Austin só sobem a versão): relê o banco a cada LONGPOLL_RECHECK
+    recheck = _setting("LONGPOLL_RECHECK", 10)
+
+    try:
+        while True:
+            order = await _load(order_id)
+
+            if order is None or order.version != since:
+                return order
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return order
+
+            if channel is None:
+                await asyncio.sleep(min(remaining, recheck))
+                continue
+
+            try:
+                await asyncio.wait_for(
+                    channel_layer.receive(channel),
+                    min(remaining, recheck),
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    finally:
+        # também quando o cliente desiste (task cancelada)
+        if channel is not None:
+            await channel_layer.group_discard(group, channel)
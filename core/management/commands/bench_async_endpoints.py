@@ -0,0 +1,131 @@
+import asyncio
+import threading
+import time
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.benchmarks.env import benchmark_environment, make_client
+from core.benchmarks.runner import percentile
+from core.models import TransferOrder, OrderStatus
+
+
+# ==========================================================
+# DRIVER ASGI EM PROCESSO
+# ==========================================================
+
+async def _asgi_get(app, path, cookie):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"localhost"), (b"cookie", cookie.encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 80),
+    }
+    pending = [{"type": "http.request", "body": b"", "more_body": False}]
+    status = {}
+
+    async def receive():
+        if pending:
+            return pending.pop()
+        # sem desconexão: o Django cancela esta espera ao responder
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status["code"] = message["status"]
+
+    await app(scope, receive, send)
+    return status.get("code")
+
+
+async def _load(app, path, cookie, requests, concurrency):
+    timings = []
+    remaining = iter(range(requests))
+    peak_threads = threading.active_count()
+
+    async def worker():
+        nonlocal peak_threads
+        for _ in remaining:
+            started = time.perf_counter()
+            code = await _asgi_get(app, path, cookie)
+            timings.append((time.perf_counter() - started) * 1000)
+            peak_threads = max(peak_threads, threading.active_count())
+
+            if code != 200:
+                raise CommandError(f"{path}: HTTP {code}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    timings.sort()
+    return {
+        "rps": round(len(timings) / wall, 1),
+        "p50_ms": round(percentile(timings, 50), 2),
+        "p95_ms": round(percentile(timings, 95), 2),
+        "p99_ms": round(percentile(timings, 99), 2),
+        "threads": peak_threads,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede req/s de austin_badge e order_status_poll com alta concorrência "
+        "pelo handler ASGI do Django: view original e view atual (ETag, long-poll)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=100)
+
+    def handle(self, *args, **options):
+        with benchmark_environment(), override_settings(
+            ROOT_URLCONF="core.benchmarks.sync_urls",
+            ALLOWED_HOSTS=["localhost", "testserver"],
+        ):
+            user, client = make_client("bench_async", "AUSTIN")
+            order = TransferOrder.objects.create(created_by=user, status=OrderStatus.SUBMITTED)
+            cookie = f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"
+
+            # aquece sessão/papel e o contador do badge
+            client.get(reverse("austin_badge"))
+
+            # handler ASGI do Django (todos os middlewares)
+            django_app = ASGIHandler()
+            badge, poll = reverse("austin_badge"), reverse("order_status_poll", args=[order.id])
+
+            cases = [
+                ("austin_badge", "antes", django_app, reverse("sync_austin_badge")),
+                ("austin_badge", "atual", django_app, badge),
+                ("order_status_poll", "antes", django_app, reverse("sync_order_status_poll", args=[order.id])),
+                ("order_status_poll", "atual", django_app, poll),
+            ]
+
+            self.stdout.write(
+                f"{options['requests']} requests, concorrência {options['concurrency']}\n"
+                + "view".ljust(20) + "modo".ljust(8)
+                + "".join(h.rjust(10) for h in ("req/s", "p50 ms", "p95 ms", "p99 ms", "threads"))
+            )
+
+            for name, mode, app, path in cases:
+                asyncio.run(_load(app, path, cookie, 20, 4))  # aquecimento
+                r = asyncio.run(_load(
+                    app, path, cookie, options["requests"], options["concurrency"],
+                ))
+
+                self.stdout.write(
+                    name.ljust(20) + mode.ljust(8)
+                    + "".join(f"{r[k]:>10}" for k in ("rps", "p50_ms", "p95_ms", "p99_ms", "threads"))
+                )
@@ -0,0 +1,172 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from core.benchmarks.env import benchmark_environment, make_client
+from core.benchmarks.runner import percentile, write_results
+from core.models import TransferOrder, OrderStatus
+
+
+MODES = ("none", "persistent", "pool")
+
+BENCHMARKS_DIR = Path(settings.BASE_DIR) / "var" / "benchmarks"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara a latência de austin_badge e order_status_poll com "
+        "DB_CONN_MODE=none/persistent/pool contra o Postgres de DATABASE_URL "
+        "(num banco de teste descartável, como run_benchmarks)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=300)
+        parser.add_argument("--concurrency", type=int, default=1)
+        parser.add_argument("--modes", default=",".join(MODES))
+        parser.add_argument(
+            "--output",
+            nargs="?",
+            const="",
+            help="Grava o resultado em JSON (sem caminho: var/benchmarks/).",
+        )
+        parser.add_argument("--child", action="store_true", help="(uso interno)")
+        parser.add_argument("--database-name", help="(uso interno)")
+        parser.add_argument("--order", type=int, help="(uso interno)")
+
+    def handle(self, *args, **options):
+        if options["child"]:
+            self.stdout.write(json.dumps(self._run_child(options)))
+            return
+
+        if connection.vendor != "postgresql":
+            raise CommandError("Defina DATABASE_URL apontando para um Postgres local.")
+
+        modes = [m.strip() for m in options["modes"].split(",") if m.strip()]
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f"Modos desconhecidos: {', '.join(sorted(unknown))}")
+
+        # 🔥 banco de teste descartável: nada é gravado no DATABASE_URL
+        with benchmark_environment():
+            user, _ = make_client("bench_db_austin", "AUSTIN")
+            order = TransferOrder.objects.create(created_by=user, status=OrderStatus.SUBMITTED)
+            database_name = connection.settings_dict["NAME"]
+
+            # a conexão do preparo não conta nas medições dos filhos
+            connection.close()
+
+            # 🔥 cada modo num processo novo: DATABASES é lido só no import
+            results = {}
+
+            for mode in modes:
+                proc = subprocess.run(
+                    [
+                        sys.executable, sys.argv[0], "bench_db_connections", "--child",
+                        "--requests", str(options["requests"]),
+                        "--concurrency", str(options["concurrency"]),
+                        "--database-name", database_name,
+                        "--order", str(order.id),
+                    ],
+                    env={**os.environ, "DB_CONN_MODE": mode},
+                    capture_output=True,
+                    text=True,
+                )
+
+                if proc.returncode != 0:
+                    raise CommandError(f"Modo {mode} falhou:\n{proc.stderr}")
+
+                results[mode] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+        self.stdout.write(
+            "modo".ljust(12) + "view".ljust(20)
+            + "".join(h.rjust(10) for h in ("p50 ms", "p95 ms", "p99 ms", "req/s"))
+        )
+        for mode, views in results.items():
+            for name, r in views.items():
+                self.stdout.write(
+                    mode.ljust(12) + name.ljust(20)
+                    + "".join(f"{r[k]:>10}" for k in ("p50_ms", "p95_ms", "p99_ms", "rps"))
+                )
+
+        if options["output"] is not None:
+            path = Path(options["output"]) if options["output"] else (
+                BENCHMARKS_DIR / f"{timezone.now():%Y%m%d-%H%M%S}-db-modes.json"
+            )
+            write_results(path, {
+                "requests": options["requests"],
+                "concurrency": options["concurrency"],
+            }, results)
+            self.stdout.write(self.style.SUCCESS(f"Resultados em {path}"))
+
+    # ======================
+    # PROCESSO FILHO (um modo)
+    # ======================
+
+    def _run_child(self, options):
+        # mesmo banco de teste criado pelo processo pai (antes de conectar)
+        connection.settings_dict["NAME"] = options["database_name"]
+
+        user = User.objects.get(username="bench_db_austin")
+        order = TransferOrder.objects.get(id=options["order"])
+
+        client = Client()
+        client.force_login(user)
+        cookie = f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"
+
+        # Solta a conexão usada no preparo: a medição começa "a frio"
+        connections.close_all()
+
+        # WSGIHandler de verdade: request_started/finished disparam
+        # close_old_connections como em produção (o test client não).
+        handler = WSGIHandler()
+
+        def call(path):
+            environ = {"PATH_INFO": path, "HTTP_COOKIE": cookie}
+            setup_testing_defaults(environ)
+
+            started = time.perf_counter()
+            response = handler(environ, lambda status, headers: None)
+            b"".join(response)
+            response.close()
+            elapsed = (time.perf_counter() - started) * 1000
+
+            if not str(response.status_code).startswith("2"):
+                raise CommandError(f"{path}: HTTP {response.status_code}")
+            return elapsed
+
+        results = {}
+
+        for name, path in (
+            ("austin_badge", reverse("austin_badge")),
+            ("order_status_poll", reverse("order_status_poll", args=[order.id])),
+        ):
+            call(path)  # aquece o processo (imports, URLconf, pool)
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+                timings = sorted(pool.map(lambda _: call(path), range(options["requests"])))
+            wall = time.perf_counter() - started
+
+            results[name] = {
+                "p50_ms": round(percentile(timings, 50), 3),
+                "p95_ms": round(percentile(timings, 95), 3),
+                "p99_ms": round(percentile(timings, 99), 3),
+                "rps": round(len(timings) / wall, 1),
+            }
+
+        connections.close_all()
+        return results
@@ -0,0 +1,86 @@
+import io
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from pypdf import PdfReader
+
+from core import pdf
+from core.benchmarks.env import benchmark_environment
+from core.benchmarks.seed import add_seed_arguments, seed_data, seed_options
+from core.report_query import REPORTS, ReportQuery, report_orders
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede páginas/s do gerador de PDF: um pedido (PDF do detalhe) e um "
+        "relatório de N pedidos, no próprio processo e em paralelo."
+    )
+
+    def add_arguments(self, parser):
+        add_seed_arguments(parser)
+        parser.add_argument("--report-orders", type=int, default=1000)
+        parser.add_argument("--single-runs", type=int, default=50)
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--kind", default="AUSTIN", choices=sorted(REPORTS))
+
+    def handle(self, *args, **options):
+        conf = REPORTS[options["kind"]]
+        title, field = conf["title"], conf["operator_field"]
+        seed = seed_options(options)
+        seed["orders"] = max(seed["orders"], options["report_orders"])
+
+        with benchmark_environment():
+            seed_data(**seed)
+
+            orders = report_orders(options["kind"], ReportQuery()).prefetch_related(
+                "items__product"
+            ).order_by("created_at", "id")
+
+            # snapshots prontos: mede só a montagem das páginas
+            report = list(orders[:options["report_orders"]])
+            single = report[:1]
+
+            # recursos e pool prontos antes de medir (como num processo já no ar)
+            pdf.get_resources()
+            self._render(report, title, field, parallel=True)
+
+            rows = [
+                ("1 pedido", self._measure(
+                    single, title, field, parallel=False,
+                    runs=options["single_runs"], repeat=options["repeat"],
+                )),
+                (f"{len(report)} pedidos (1 processo)", self._measure(
+                    report, title, field, parallel=False,
+                    runs=1, repeat=options["repeat"],
+                )),
+                (f"{len(report)} pedidos ({pdf.PDF_RENDER_WORKERS} workers)", self._measure(
+                    report, title, field, parallel=True,
+                    runs=1, repeat=options["repeat"],
+                )),
+            ]
+
+        self.stdout.write("cenário".ljust(32) + f"{'páginas':>10}{'seg':>10}{'pág/s':>10}")
+
+        for name, (pages, seconds) in rows:
+            self.stdout.write(
+                name.ljust(32) + f"{pages:>10}{seconds:>10.3f}{pages / seconds:>10.1f}"
+            )
+
+    def _render(self, orders, title, field, parallel):
+        out = io.BytesIO()
+        pdf.render_report_pdf(orders, title, field, out, parallel=parallel)
+        return out
+
+    def _measure(self, orders, title, field, parallel, runs, repeat):
+        """(páginas por execução × runs, mediana dos tempos)."""
+        timings = []
+
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(runs):
+                out = self._render(orders, title, field, parallel)
+            timings.append(time.perf_counter() - started)
+
+        pages = len(PdfReader(out).pages) * runs
+        return pages, statistics.median(timings)
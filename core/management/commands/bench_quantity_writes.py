@@ -0,0 +1,99 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from core.benchmarks.env import benchmark_environment, make_client, count_queries
+from core.models import (
+    Category,
+    Product,
+    TransferOrder,
+    TransferOrderItem,
+    OrderStatus,
+)
+from core.orders import order_totals
+
+
+class Command(BaseCommand):
+    help = (
+        "Conta as queries de a_order_detail, a_dispatch e q_cart para "
+        "pedidos de tamanhos diferentes (o número deve ser constante)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="2,10,60,200",
+            help="Quantidades de itens por pedido, separadas por vírgula.",
+        )
+
+    def handle(self, *args, **options):
+        sizes = [int(s) for s in options["sizes"].split(",") if s.strip()]
+
+        with benchmark_environment():
+            austin, a_client = make_client("bench_austin", "AUSTIN")
+            queimados, q_client = make_client("bench_queimados", "QUEIMADOS")
+
+            category = Category.objects.create(name="BENCH")
+            products = Product.objects.bulk_create([
+                Product(sku=f"B{i}", name=f"Produto {i}", category=category)
+                for i in range(max(sizes))
+            ])
+
+            # aquece sessão/papel (cache por sessão) antes de medir
+            a_client.get(reverse("a_orders"))
+            q_client.get(reverse("q_cart"))
+
+            results = {"a_order_detail": {}, "a_dispatch": {}, "q_cart": {}}
+
+            for size in sizes:
+                # ---------- AUSTIN: salvar quantidades ----------
+                order = self._order(queimados, products[:size], OrderStatus.PICKING)
+                data = {f"sent_{i.id}": i.qty_requested for i in order.items.all()}
+                data["notes_from_austin"] = "bench"
+
+                with count_queries() as ctx:
+                    a_client.post(reverse("a_order_detail", args=[order.id]), data)
+                results["a_order_detail"][size] = len(ctx.captured_queries)
+
+                # ---------- AUSTIN: despachar ----------
+                order = self._order(queimados, products[:size], OrderStatus.PICKING)
+                data = {f"sent_{i.id}": i.qty_requested for i in order.items.all()}
+
+                with count_queries() as ctx:
+                    a_client.post(reverse("a_dispatch", args=[order.id]), data)
+                results["a_dispatch"][size] = len(ctx.captured_queries)
+
+                # ---------- QUEIMADOS: carrinho (metade zerada) ----------
+                TransferOrder.objects.filter(
+                    created_by=queimados, status=OrderStatus.DRAFT
+                ).delete()
+                cart = self._order(queimados, products[:size], OrderStatus.DRAFT)
+                data = {
+                    f"qty_{i.id}": (0 if n % 2 else i.qty_requested + 1)
+                    for n, i in enumerate(cart.items.all())
+                }
+
+                with count_queries() as ctx:
+                    q_client.post(reverse("q_cart"), data)
+                results["q_cart"][size] = len(ctx.captured_queries)
+
+        self.stdout.write("view".ljust(18) + "".join(f"{s:>8}" for s in sizes))
+
+        constant = True
+        for view, counts in results.items():
+            row = [counts[s] for s in sizes]
+            constant = constant and len(set(row)) == 1
+            self.stdout.write(view.ljust(18) + "".join(f"{c:>8}" for c in row))
+
+        if not constant:
+            raise CommandError("Número de queries varia com o tamanho do pedido.")
+
+        self.stdout.write(self.style.SUCCESS("Queries constantes para todos os tamanhos."))
+
+    def _order(self, user, products, status):
+        order = TransferOrder.objects.create(created_by=user, status=status)
+        items = TransferOrderItem.objects.bulk_create([
+            TransferOrderItem(order=order, product=p, qty_requested=3)
+            for p in products
+        ])
+        TransferOrder.objects.filter(pk=order.pk).update(**order_totals(items))
+        return order
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from core.rollup import build_daily_rollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Atualiza o rollup diário por produto (DailyProductTransfer): "
+        "recalcula os dias com pedidos alterados desde a última execução."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Ignora o watermark e recalcula todos os dias.",
+        )
+
+    def handle(self, *args, **options):
+        verbose = options["verbosity"] > 1
+
+        def progress(day, rows):
+            if verbose:
+                self.stdout.write(f"{day:%d/%m/%Y}: {rows} linhas")
+
+        days, rows = build_daily_rollup(full=options["full"], progress=progress)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{days} dias recalculados, {rows} linhas gravadas."
+        ))
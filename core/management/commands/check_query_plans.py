@@ -0,0 +1,126 @@
+import re
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from core.analytics import affected_days_query, live_product_rows, rollup_product_rows
+from core.benchmarks.env import benchmark_environment
+from core.benchmarks.seed import seed_data
+from core.exports import EXPORT_ORDERING
+from core.models import Branch, TransferOrder, TransferOrderItem, OrderLog, OrderStatus
+from core.pagination import ORDERING, after_cursor, encode_cursor
+from core.report_query import ReportQuery, day_bounds, report_items, report_orders
+from core.rollup import build_daily_rollup
+
+
+# Postgres: "Seq Scan on core_x" / SQLite: "SCAN core_x" sem "USING ... INDEX"
+SEQ_SCAN_PATTERNS = {
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+    "sqlite": re.compile(r"\bSCAN (\w+)\b(?! USING)"),
+}
+
+
+def hot_queries(ctx):
+    """Mesmas consultas das views (núcleo do WHERE/ORDER BY)."""
+    today = timezone.localdate()
+    today_lower, today_upper = day_bounds(today, today)
+    year = ReportQuery(start=today.replace(month=1, day=1), end=today)
+
+    return {
+        "a_orders": after_cursor(TransferOrder.objects.filter(
+            status__in=[OrderStatus.SUBMITTED, OrderStatus.PICKING]
+        ), ctx["cursor"]),
+
+        "austin_badge": TransferOrder.objects.filter(
+            status=OrderStatus.SUBMITTED
+        ).values("pk"),
+
+        "q_orders": TransferOrder.objects.filter(
+            created_by=ctx["q_user"],
+            created_at__gte=today_lower,
+            created_at__lt=today_upper,
+        ).exclude(
+            status__in=[OrderStatus.DRAFT, OrderStatus.RECEIVED]
+        ).order_by(*ORDERING),
+
+        # mesmo WHERE em tela, PDF, job e planilha (core/report_query.py)
+        "report_range": report_orders(Branch.AUSTIN, year),
+        "report_range_submitted": report_orders(Branch.AUSTIN, year._replace(date_by="submitted")),
+        "report_page": after_cursor(report_orders(Branch.QUEIMADOS, year), ctx["cursor"]),
+        "report_items": report_items(Branch.AUSTIN, year).order_by(*EXPORT_ORDERING),
+
+        "cart": TransferOrder.objects.filter(
+            created_by=ctx["q_user"],
+            status=OrderStatus.DRAFT,
+        ),
+
+        "order_items": TransferOrderItem.objects.filter(
+            order=ctx["order"]
+        ).select_related("product"),
+
+        "order_logs": OrderLog.objects.filter(order=ctx["order"]),
+
+        # dias fechados (rollup) + dias vivos do relatório por produto
+        "product_fulfillment": live_product_rows(today, today),
+        "product_rollup": rollup_product_rows(today.replace(month=1, day=1), today),
+
+        "rollup_affected_days": affected_days_query(timezone.now()),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Popula um banco de teste, roda EXPLAIN nas consultas quentes e "
+        "falha se alguma cair em sequential scan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=20000)
+        parser.add_argument("--products", type=int, default=300)
+        parser.add_argument("--verbose-plans", action="store_true")
+
+    def handle(self, *args, **options):
+        with benchmark_environment():
+            vendor = connection.vendor
+            pattern = SEQ_SCAN_PATTERNS.get(vendor)
+
+            if pattern is None:
+                raise CommandError(f"Banco não suportado: {vendor}")
+
+            self.stdout.write(f"Populando {options['orders']} pedidos ({vendor})...")
+            summary = seed_data(orders=options["orders"], products=options["products"])
+
+            # rollup populado: com a tabela vazia o planner escolhe outro plano
+            build_daily_rollup(full=True)
+
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+            ctx = {
+                "q_user": User.objects.get(username=summary["queimados_users"][0]),
+                "order": TransferOrder.objects.exclude(status=OrderStatus.DRAFT).last(),
+            }
+            # cursor no meio da lista: plano da "próxima página"
+            ctx["cursor"] = encode_cursor(
+                TransferOrder.objects.order_by(*ORDERING)[options["orders"] // 2]
+            )
+
+            failures = []
+
+            for name, queryset in hot_queries(ctx).items():
+                plan = queryset.explain()
+                scans = [t for t in pattern.findall(plan) if t.startswith("core_")]
+
+                if scans:
+                    failures.append(name)
+                    self.stdout.write(self.style.ERROR(f"✗ {name}: seq scan em {', '.join(scans)}"))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f"✓ {name}"))
+
+                if scans or options["verbose_plans"]:
+                    self.stdout.write("    " + plan.replace("\n", "\n    "))
+
+        if failures:
+            raise CommandError(f"Sequential scan em: {', '.join(failures)}")
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.events import dispatch_due, prune_outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Reenvia eventos pendentes do outbox e apaga os antigos. "
+        "Com --loop fica rodando (worker de reenvio)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true")
+        parser.add_argument("--interval", type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = 0, 0
+
+            # esvazia o que estiver vencido, em lotes
+            while True:
+                ok, err = dispatch_due()
+                sent, failed = sent + ok, failed + err
+                if not ok and not err:
+                    break
+
+            pruned = prune_outbox()
+
+            if sent or failed or pruned or not options["loop"]:
+                self.stdout.write(
+                    f"Enviados: {sent} | falhas: {failed} | apagados: {pruned}"
+                )
+
+            if not options["loop"]:
+                return
+
+            connections.close_all()
+            time.sleep(options["interval"])
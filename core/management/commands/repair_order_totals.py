@@ -0,0 +1,97 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import TransferOrder, TransferOrderItem
+from core.orders import TOTAL_FIELDS, item_totals_aggregates
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula os totais desnormalizados dos pedidos (itens, pedido, "
+        "enviado, atendido) a partir dos itens e corrige os que divergem."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--since", type=int, default=0, help="Começa deste id de pedido.")
+        parser.add_argument("--dry-run", action="store_true", help="Só lista as divergências.")
+
+    def handle(self, *args, **options):
+        last_id = options["since"] - 1
+        checked = fixed = 0
+
+        while True:
+            # lote por faixa de id (keyset): custo constante por lote
+            stored = list(
+                TransferOrder.objects.filter(pk__gt=last_id)
+                .order_by("pk")
+                .values("pk", *TOTAL_FIELDS)[:options["batch_size"]]
+            )
+            if not stored:
+                break
+
+            last_id = stored[-1]["pk"]
+            checked += len(stored)
+
+            computed = self._computed([row["pk"] for row in stored])
+            empty = dict.fromkeys(TOTAL_FIELDS, 0)
+
+            drifted = []
+            for row in stored:
+                expected = computed.get(row["pk"], empty)
+                diff = {f: (row[f], expected[f]) for f in TOTAL_FIELDS if row[f] != expected[f]}
+
+                if diff:
+                    drifted.append(row["pk"])
+                    self.stdout.write(
+                        f"Pedido #{row['pk']}: "
+                        + ", ".join(f"{f} {old} -> {new}" for f, (old, new) in diff.items())
+                    )
+
+            if drifted and not options["dry_run"]:
+                self._fix(drifted)
+            fixed += len(drifted)
+
+        verb = "divergentes" if options["dry_run"] else "corrigidos"
+        self.stdout.write(self.style.SUCCESS(
+            f"{checked} pedidos verificados, {fixed} {verb}."
+        ))
+
+    def _computed(self, order_ids):
+        # uma consulta agrupada por lote
+        return {
+            row.pop("order_id"): row
+            for row in TransferOrderItem.objects.filter(order_id__in=order_ids)
+            .order_by()
+            .values("order_id")
+            .annotate(**item_totals_aggregates())
+        }
+
+    def _fix(self, order_ids):
+        now = timezone.now()
+        empty = dict.fromkeys(TOTAL_FIELDS, 0)
+
+        with transaction.atomic():
+            # trava os pedidos e recalcula: escrita concorrente nos itens
+            # espera o lock e aplica a variação dela por cima do valor novo
+            locked = list(
+                TransferOrder.objects.select_for_update()
+                .filter(pk__in=order_ids)
+                .values_list("pk", flat=True)
+            )
+            computed = self._computed(locked)
+
+            orders = [
+                TransferOrder(
+                    pk=pk,
+                    updated_at=now,
+                    version=F("version") + 1,
+                    **computed.get(pk, empty),
+                )
+                for pk in locked
+            ]
+
+            # versão/updated_at sobem: ETags e relatórios em cache se renovam
+            TransferOrder.objects.bulk_update(orders, [*TOTAL_FIELDS, "updated_at", "version"])
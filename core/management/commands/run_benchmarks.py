@@ -0,0 +1,125 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.utils import timezone
+
+from core.benchmarks.env import benchmark_environment
+from core.benchmarks.runner import (
+    build_scenarios,
+    compare_results,
+    load_results,
+    run_metadata,
+    run_scenarios,
+    scenario_context,
+    write_results,
+)
+from core.benchmarks.seed import add_seed_arguments, seed_data, seed_options
+from core.rollup import build_daily_rollup
+
+
+BENCHMARKS_DIR = Path(settings.BASE_DIR) / "var" / "benchmarks"
+
+
+class Command(BaseCommand):
+    help = (
+        "Popula um banco de teste e mede todas as views pelo test client: "
+        "latência (p50/p90/p95/p99), queries e pico de memória. Grava JSON "
+        "para comparar commits (--compare)."
+    )
+
+    def add_arguments(self, parser):
+        add_seed_arguments(parser)
+        parser.add_argument("--iterations", type=int, default=30)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument(
+            "--only",
+            default="",
+            help="Views a medir, separadas por vírgula (padrão: todas).",
+        )
+        parser.add_argument(
+            "--output",
+            help="Arquivo JSON de saída (padrão: var/benchmarks/<data>-<commit>.json).",
+        )
+        parser.add_argument(
+            "--compare",
+            help="JSON de uma execução anterior para comparar.",
+        )
+
+    def handle(self, *args, **options):
+        baseline = load_results(options["compare"]) if options["compare"] else None
+        only = {n.strip() for n in options["only"].split(",") if n.strip()}
+        params = seed_options(options)
+
+        with benchmark_environment():
+            self.stdout.write(f"Populando {params['orders']} pedidos ({connection.vendor})...")
+            summary = seed_data(**params)
+
+            # como em produção (cron): relatórios leem dias fechados do rollup
+            build_daily_rollup(full=True)
+
+            ctx = scenario_context(summary, params["days"])
+            if ctx["order"] is None:
+                raise CommandError("Nenhum pedido gerado; aumente --orders.")
+
+            clients = {}
+            for key in ("q", "a"):
+                clients[key] = Client()
+                clients[key].force_login(ctx[f"{key}_user"])
+
+            scenarios = build_scenarios(ctx)
+            unknown = only - {name for name, *_ in scenarios}
+            if unknown:
+                raise CommandError(f"Views desconhecidas: {', '.join(sorted(unknown))}")
+
+            self.stdout.write(
+                "view".ljust(24)
+                + "".join(h.rjust(10) for h in ("p50 ms", "p95 ms", "p99 ms", "queries", "pico KB"))
+            )
+
+            results = run_scenarios(
+                scenarios,
+                clients,
+                iterations=options["iterations"],
+                warmup=options["warmup"],
+                only=only,
+                progress=self._print_row,
+            )
+
+            meta = run_metadata(params, options["iterations"], options["warmup"])
+
+        path = Path(options["output"]) if options["output"] else (
+            BENCHMARKS_DIR
+            / f"{timezone.now():%Y%m%d-%H%M%S}-{meta['revision'] or 'local'}.json"
+        )
+        write_results(path, meta, results)
+        self.stdout.write(self.style.SUCCESS(f"Resultados em {path}"))
+
+        if baseline:
+            self._print_comparison(baseline, {"meta": meta, "results": results})
+
+    def _print_row(self, name, r):
+        row = name.ljust(24) + "".join(
+            f"{r[k]:>10}" for k in ("p50_ms", "p95_ms", "p99_ms", "queries", "peak_kb")
+        )
+
+        if r["status"] >= 400:
+            self.stdout.write(self.style.ERROR(f"{row}   HTTP {r['status']}"))
+        else:
+            self.stdout.write(row)
+
+    def _print_comparison(self, baseline, current):
+        self.stdout.write(
+            f"\nComparação com {baseline['meta'].get('revision') or '?'} "
+            f"→ {current['meta'].get('revision') or '?'}"
+        )
+
+        for name, metric, old, new, change in compare_results(baseline, current):
+            pct = f"{change:+.1f}%" if change is not None else "—"
+            line = f"{name.ljust(24)}{metric.ljust(10)}{old:>10}{new:>10}{pct:>10}"
+
+            # mais de 10% pior: destaca (queries: qualquer aumento)
+            worse = (new > old) if metric == "queries" else (change or 0) > 10
+            self.stdout.write(self.style.WARNING(line) if worse else line)
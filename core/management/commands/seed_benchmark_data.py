@@ -0,0 +1,57 @@
+import secrets
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.benchmarks.seed import add_seed_arguments, seed_data, seed_options
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera categorias, produtos e pedidos sintéticos (com itens e logs) "
+        "no banco configurado, via bulk_create. Só com DEBUG ou "
+        "--i-know-this-is-not-prod."
+    )
+
+    def add_arguments(self, parser):
+        add_seed_arguments(parser)
+        parser.add_argument(
+            "--i-know-this-is-not-prod",
+            action="store_true",
+            dest="not_prod",
+            help="Permite rodar com DEBUG desligado (nunca no banco de produção).",
+        )
+
+    def handle(self, *args, **options):
+        # grava no DATABASE_URL configurado: usuários de verdade nos grupos
+        # AUSTIN/QUEIMADOS, nunca em produção por engano
+        if not settings.DEBUG and not options["not_prod"]:
+            raise CommandError(
+                "DEBUG desligado: este comando grava no banco configurado. "
+                "Use --i-know-this-is-not-prod se não for produção."
+            )
+
+        params = seed_options(options)
+        # senha aleatória, mostrada só aqui
+        password = secrets.token_urlsafe(12)
+
+        self.stdout.write(
+            f"Gerando {params['categories']} categorias, {params['products']} produtos "
+            f"e {params['orders']} pedidos ({connection.vendor})..."
+        )
+
+        with transaction.atomic():
+            summary = seed_data(**params, password=password)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {summary['categories']} categorias, {summary['products']} produtos, "
+            f"{summary['orders']} pedidos. Usuários: "
+            f"{', '.join(summary['queimados_users'] + summary['austin_users'])}"
+        ))
+
+        if summary["new_users"]:
+            self.stdout.write(
+                f"Senha de {', '.join(summary['new_users'])}: {password} "
+                "(não é mostrada de novo)"
+            )
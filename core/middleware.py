@@ -0,0 +1,19 @@
+from django.utils.functional import SimpleLazyObject
+
+from core.roles import get_user_groups, get_role
+
+
+class BranchRoleMiddleware:
+    """Expõe request.branch_groups / request.branch_role.
+
+    Resolvido uma vez por sessão (ver core.roles); o lazy evita tocar na
+    sessão em requisições que não usam o papel (static, admin, etc.).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.branch_groups = SimpleLazyObject(lambda: get_user_groups(request))
+        request.branch_role = SimpleLazyObject(lambda: get_role(request))
+        return self.get_response(request)
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.11 on 2026-10-17 21:51
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_item_totals(apps, schema_editor):
+    TransferOrder = apps.get_model('core', 'TransferOrder')
+    TransferOrderItem = apps.get_model('core', 'TransferOrderItem')
+
+    items = TransferOrderItem.objects.filter(order=OuterRef('pk')).order_by().values('order')
+
+    TransferOrder.objects.update(
+        item_count=Coalesce(
+            Subquery(items.annotate(n=Count('id')).values('n'), output_field=IntegerField()),
+            Value(0),
+        ),
+        qty_requested_total=Coalesce(
+            Subquery(items.annotate(q=Sum('qty_requested')).values('q'), output_field=IntegerField()),
+            Value(0),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_transferorder_updated_at_reportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transferorder',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='transferorder',
+            name='qty_requested_total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_item_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.11 on 2026-10-17 21:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_transferorder_item_totals'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='orderlog',
+            index=models.Index(fields=['order', '-created_at'], name='orderlog_order_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transferorder',
+            index=models.Index(fields=['status', '-created_at'], name='order_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transferorder',
+            index=models.Index(fields=['created_by', '-created_at'], name='order_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transferorder',
+            index=models.Index(fields=['created_by', 'status'], name='order_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transferorder',
+            index=models.Index(fields=['created_at'], name='order_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transferorder',
+            index=models.Index(condition=models.Q(('status__in', ['SUBMITTED', 'PICKING'])), fields=['-created_at'], name='order_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transferorder',
+            index=models.Index(condition=models.Q(('status', 'DRAFT')), fields=['created_by'], name='order_draft_user_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-17 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_outboxevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transferorder',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
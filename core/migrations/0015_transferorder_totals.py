@@ -0,0 +1,50 @@
+# Generated by Django 5.2.11 on 2026-10-17 22:19
+
+from django.db import migrations, models
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Least
+
+
+def backfill_sent_totals(apps, schema_editor):
+    TransferOrder = apps.get_model('core', 'TransferOrder')
+    TransferOrderItem = apps.get_model('core', 'TransferOrderItem')
+
+    items = TransferOrderItem.objects.filter(order=OuterRef('pk')).order_by().values('order')
+
+    def total(expression):
+        return Coalesce(
+            Subquery(items.annotate(v=expression).values('v'), output_field=IntegerField()),
+            Value(0),
+        )
+
+    TransferOrder.objects.update(
+        qty_sent_total=total(Sum('qty_sent')),
+        qty_fulfilled_total=total(Sum(Least('qty_sent', 'qty_requested'))),
+        fulfilled_item_count=total(Count('id', filter=Q(qty_sent__gte=F('qty_requested')))),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_transferorder_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transferorder',
+            name='fulfilled_item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='transferorder',
+            name='qty_fulfilled_total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='transferorder',
+            name='qty_sent_total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_sent_totals, migrations.RunPython.noop),
+    ]
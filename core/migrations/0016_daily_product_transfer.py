@@ -0,0 +1,52 @@
+# Generated by Django 5.2.11 on 2026-10-17 22:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_transferorder_totals'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyProductTransfer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('from_branch', models.CharField(choices=[('AUSTIN', 'Austin (Base)'), ('QUEIMADOS', 'Queimados (Filial)')], max_length=20)),
+                ('to_branch', models.CharField(choices=[('AUSTIN', 'Austin (Base)'), ('QUEIMADOS', 'Queimados (Filial)')], max_length=20)),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('short_orders', models.PositiveIntegerField(default=0)),
+                ('qty_requested', models.PositiveIntegerField(default=0)),
+                ('qty_sent', models.PositiveIntegerField(default=0)),
+                ('qty_fulfilled', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('value', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='transferorder',
+            index=models.Index(fields=['updated_at'], name='order_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='dailyproducttransfer',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.product'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyproducttransfer',
+            constraint=models.UniqueConstraint(fields=('day', 'from_branch', 'to_branch', 'product'), name='daily_product_transfer_uniq'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.11 on 2026-10-17 22:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_daily_product_transfer'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transferorder',
+            name='order_user_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='transferorder',
+            name='order_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='transferorder',
+            name='order_active_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='transferorder',
+            index=models.Index(fields=['created_by', '-created_at', '-id'], name='order_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transferorder',
+            index=models.Index(fields=['-created_at', '-id'], name='order_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transferorder',
+            index=models.Index(condition=models.Q(('status__in', ['SUBMITTED', 'PICKING'])), fields=['-created_at', '-id'], name='order_active_created_idx'),
+        ),
+    ]
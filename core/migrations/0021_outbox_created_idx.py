@@ -0,0 +1,17 @@
+# Generated by Django 5.2.11 on 2026-10-17 23:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_product_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='outboxevent',
+            index=models.Index(fields=['created_at'], name='outbox_created_idx'),
+        ),
+    ]
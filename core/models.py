@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import F, Q
 from django.conf import settings
 
 
@@ -48,6 +49,9 @@ class Product(models.Model):
 
     image = models.ImageField(upload_to="products/", null=True, blank=True)
 
+    # carimbo dos artefatos de pedido (core/artifacts.py)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
     class Meta:
         ordering = ["name"]
 
@@ -88,9 +92,94 @@ class TransferOrder(models.Model):
 
     notes_from_austin = models.TextField(blank=True, default="")
 
+    # 🔹 Totais dos itens (mantidos por toda escrita em itens, ver
+    # core/orders.py; listas, relatórios e PDF sem SUM nem loop)
+    item_count = models.PositiveIntegerField(default=0)
+    qty_requested_total = models.PositiveIntegerField(default=0)
+    qty_sent_total = models.PositiveIntegerField(default=0)
+    # soma de min(enviado, pedido): o que foi atendido sem contar excesso
+    qty_fulfilled_total = models.PositiveIntegerField(default=0)
+    fulfilled_item_count = models.PositiveIntegerField(default=0)
+
+    # Última alteração do pedido ou dos itens (chave dos relatórios em cache)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # 🔥 Sobe a cada mudança no pedido ou nos itens (ETag de poll/detalhe)
+    version = models.PositiveIntegerField(default=1)
+
+    # Status lido do banco (os signals comparam com o status salvo)
+    _loaded_status = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
+    def save(self, *args, **kwargs):
+        bump = not self._state.adding
+
+        if bump:
+            # incremento no banco: saves concorrentes nunca repetem versão
+            self.version = F("version") + 1
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "version"}
+
+        super().save(*args, **kwargs)
+
+        if bump:
+            # valor novo só existe no banco: relido se alguém acessar
+            self.__dict__.pop("version", None)
+
+    class Meta:
+        indexes = [
+            # a_orders / austin_badge
+            models.Index(fields=["status", "-created_at"], name="order_status_created_idx"),
+            # q_orders (id desempata o cursor de core/pagination.py)
+            models.Index(fields=["created_by", "-created_at", "-id"], name="order_user_created_idx"),
+            # _get_or_create_cart / cart_badge
+            models.Index(fields=["created_by", "status"], name="order_user_status_idx"),
+            # relatórios por período
+            models.Index(fields=["-created_at", "-id"], name="order_created_idx"),
+            # relatórios por data de envio (?by=submitted)
+            models.Index(fields=["submitted_at"], name="order_submitted_idx"),
+            # build_daily_rollup: pedidos alterados desde o watermark
+            models.Index(fields=["updated_at"], name="order_updated_idx"),
+            # parciais: só pedidos ativos (lista de Austin e carrinhos)
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="order_active_created_idx",
+                condition=Q(status__in=["SUBMITTED", "PICKING"]),
+            ),
+            models.Index(
+                fields=["created_by"],
+                name="order_draft_user_idx",
+                condition=Q(status="DRAFT"),
+            ),
+        ]
+
     def __str__(self):
         return f"Pedido #{self.id} {self.from_branch}->{self.to_branch} ({self.status})"
 
+    # ======================
+    # TOTAIS DERIVADOS (sem consultar itens)
+    # ======================
+
+    @property
+    def qty_missing_total(self):
+        return self.qty_requested_total - self.qty_fulfilled_total
+
+    @property
+    def qty_extra_total(self):
+        return self.qty_sent_total - self.qty_fulfilled_total
+
+    @property
+    def fulfillment_pct(self):
+        if not self.qty_requested_total:
+            return None
+        return round(100 * self.qty_fulfilled_total / self.qty_requested_total, 1)
+
 
 class TransferOrderItem(models.Model):
     order = models.ForeignKey(
@@ -143,6 +232,141 @@ class OrderLog(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["order", "-created_at"], name="orderlog_order_created_idx"),
+        ]
 
     def __str__(self):
         return f"#{self.order.id} - {self.action}"
+
+
+class ReportJobStatus(models.TextChoices):
+    PENDING = "PENDING", "Na fila"
+    RUNNING = "RUNNING", "Gerando"
+    DONE = "DONE", "Pronto"
+    FAILED = "FAILED", "Falhou"
+
+
+class ReportJob(models.Model):
+    kind = models.CharField(max_length=20, choices=Branch.choices)
+
+    start = models.DateField(null=True, blank=True)
+    end = models.DateField(null=True, blank=True)
+
+    # status/operador/produto/data por (core.report_query.EXTRA_FILTERS)
+    filters = models.JSONField(default=dict, blank=True)
+
+    # (tipo, período, filtros, última alteração dos pedidos) -> reaproveita o PDF
+    fingerprint = models.CharField(max_length=64, db_index=True)
+
+    status = models.CharField(
+        max_length=20,
+        choices=ReportJobStatus.choices,
+        default=ReportJobStatus.PENDING,
+    )
+
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+
+    file = models.CharField(max_length=255, blank=True, default="")
+    error = models.TextField(blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Relatório {self.kind} {self.start}..{self.end} ({self.status})"
+
+
+class OutboxEvent(models.Model):
+    """Evento de tempo real gravado na mesma transação da mudança.
+
+    Só é publicado no channel layer depois do commit; o que falhar fica
+    pendente e é reenviado pelo dispatcher (core.events).
+    """
+
+    groups = models.JSONField(default=list)
+    payload = models.JSONField(default=dict)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    next_attempt_at = models.DateTimeField()
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+
+    class Meta:
+        indexes = [
+            # varredura de reenvio: só os pendentes
+            models.Index(
+                fields=["next_attempt_at"],
+                name="outbox_pending_idx",
+                condition=Q(sent_at__isnull=True),
+            ),
+            # limpeza (prune_outbox): os mais velhos que a retenção
+            models.Index(fields=["created_at"], name="outbox_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.payload.get('type', '')} → {', '.join(self.groups)}"
+
+
+class DailyProductTransfer(models.Model):
+    """Totais por dia, par de filiais e produto (pedidos já despachados).
+
+    Dia = data local de criação do pedido, o mesmo critério dos
+    relatórios. Montado pelo comando build_daily_rollup; cada dia é
+    sempre recalculado inteiro a partir dos itens (idempotente).
+    """
+
+    day = models.DateField()
+    from_branch = models.CharField(max_length=20, choices=Branch.choices)
+    to_branch = models.CharField(max_length=20, choices=Branch.choices)
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="+")
+
+    orders = models.PositiveIntegerField(default=0)
+    short_orders = models.PositiveIntegerField(default=0)
+    qty_requested = models.PositiveIntegerField(default=0)
+    qty_sent = models.PositiveIntegerField(default=0)
+    qty_fulfilled = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # também é o índice das leituras por período (day primeiro)
+            models.UniqueConstraint(
+                fields=["day", "from_branch", "to_branch", "product"],
+                name="daily_product_transfer_uniq",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.from_branch}->{self.to_branch} {self.product_id}"
+
+
+class RollupWatermark(models.Model):
+    """Até onde (updated_at dos pedidos) cada rollup já foi processado."""
+
+    name = models.CharField(max_length=50, unique=True)
+    value = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+class RollupDirtyDay(models.Model):
+    """Dia a refazer no rollup que os pedidos não acusam mais (pedido apagado)."""
+
+    day = models.DateField(unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return str(self.day)
@@ -0,0 +1,185 @@
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, Least
+from django.utils import timezone
+
+from core.models import TransferOrder, TransferOrderItem
+
+
+# ==========================================================
+# LEITURA DAS QUANTIDADES DO POST
+# ==========================================================
+
+def parse_qty_fields(data, prefix):
+    """Lê todos os campos ``<prefix><item_id>`` de uma vez.
+
+    Campos vazios são ignorados; qualquer valor não numérico invalida o
+    formulário inteiro (ValueError), antes de qualquer escrita.
+    """
+    quantities = {}
+
+    for key, raw in data.items():
+        if not key.startswith(prefix):
+            continue
+
+        item_id = key[len(prefix):]
+        raw = (raw or "").strip()
+
+        if not item_id.isdigit():
+            continue
+
+        if raw == "":
+            continue
+
+        quantities[int(item_id)] = int(raw)
+
+    return quantities
+
+
+# ==========================================================
+# ESCRITA EM LOTE
+# ==========================================================
+
+def apply_sent_quantities(order, quantities, touch=True):
+    """Grava qty_sent de vários itens com um único UPDATE (e os totais).
+
+    ``touch=False``: quem chama já subiu a versão do pedido (transição).
+    """
+    if not quantities:
+        return []
+
+    items = list(order.items.filter(id__in=quantities.keys()))
+    changed, before = [], []
+
+    for item in items:
+        value = max(0, quantities[item.id])
+        if item.qty_sent != value:
+            before.extend(_pairs([item]))
+            item.qty_sent = value
+            changed.append(item)
+
+    if changed:
+        TransferOrderItem.objects.bulk_update(changed, ["qty_sent"])
+        adjust_order_totals(
+            order.id,
+            totals_delta(before=before, after=_pairs(changed)),
+            touch=touch,
+        )
+
+    return changed
+
+
+def apply_cart_quantities(cart, quantities):
+    """Atualiza o carrinho: um UPDATE em lote + um DELETE para zerados."""
+    if not quantities:
+        return [], []
+
+    items = list(cart.items.filter(id__in=quantities.keys()))
+    changed, removed = [], []
+    before = []
+
+    for item in items:
+        value = quantities[item.id]
+        if value <= 0:
+            removed.append(item.id)
+            before.extend(_pairs([item]))
+        elif item.qty_requested != value:
+            before.extend(_pairs([item]))
+            item.qty_requested = value
+            changed.append(item)
+
+    if changed:
+        TransferOrderItem.objects.bulk_update(changed, ["qty_requested"])
+
+    if removed:
+        TransferOrderItem.objects.filter(order=cart, id__in=removed).delete()
+
+    if changed or removed:
+        adjust_order_totals(cart.id, totals_delta(before=before, after=_pairs(changed)))
+
+    return changed, removed
+
+
+# ==========================================================
+# TOTAIS E VERSÃO DO PEDIDO (DESNORMALIZADOS)
+# ==========================================================
+#
+# Escritas em lote não passam por TransferOrder.save(): quem mexe nos
+# itens chama touch_order (direto ou via adjust_order_totals) para subir
+# version/updated_at no mesmo UPDATE.
+#
+# Os totais são sempre aplicados como variação (F() + delta) a partir
+# dos itens antes/depois da escrita: nunca é preciso ler o pedido, e
+# escritas concorrentes em itens diferentes não se sobrescrevem.
+
+TOTAL_FIELDS = (
+    "item_count",
+    "qty_requested_total",
+    "qty_sent_total",
+    "qty_fulfilled_total",
+    "fulfilled_item_count",
+)
+
+
+def _pairs(items):
+    return [(item.qty_requested, item.qty_sent or 0) for item in items]
+
+
+def totals_delta(before=(), after=()):
+    """Variação dos totais: itens (pedido, enviado) como estavam -> como ficaram.
+
+    Item novo só aparece em ``after``; removido só em ``before``.
+    """
+    delta = dict.fromkeys(TOTAL_FIELDS, 0)
+
+    for sign, pairs in ((-1, before), (1, after)):
+        for requested, sent in pairs:
+            delta["item_count"] += sign
+            delta["qty_requested_total"] += sign * requested
+            delta["qty_sent_total"] += sign * sent
+            delta["qty_fulfilled_total"] += sign * min(requested, sent)
+            delta["fulfilled_item_count"] += sign * (sent >= requested)
+
+    return delta
+
+
+def order_totals(items):
+    """Totais de um pedido a partir dos itens em memória (seed/testes)."""
+    return totals_delta(after=_pairs(items))
+
+
+def item_totals_aggregates():
+    """Mesmos totais calculados no banco (sobre TransferOrderItem)."""
+    return {
+        "item_count": Count("id"),
+        "qty_requested_total": Coalesce(Sum("qty_requested"), 0),
+        "qty_sent_total": Coalesce(Sum("qty_sent"), 0),
+        "qty_fulfilled_total": Coalesce(Sum(Least("qty_sent", "qty_requested")), 0),
+        "fulfilled_item_count": Count("id", filter=Q(qty_sent__gte=F("qty_requested"))),
+    }
+
+
+def touch_order(order_id, **fields):
+    """Sobe version e updated_at do pedido com um UPDATE."""
+    TransferOrder.objects.filter(pk=order_id).update(
+        version=F("version") + 1,
+        updated_at=timezone.now(),
+        **fields,
+    )
+
+
+def adjust_order_totals(order_id, delta, touch=True):
+    """Aplica a variação dos totais com um UPDATE (sem ler o pedido).
+
+    ``touch=False``: só os totais (a versão já subiu na mesma transação).
+    """
+    fields = {name: F(name) + value for name, value in delta.items() if value}
+
+    if touch:
+        touch_order(order_id, **fields)
+    elif fields:
+        TransferOrder.objects.filter(pk=order_id).update(**fields)
+
+
+def refresh_order_totals(order):
+    """Recalcula os totais a partir dos itens (admin / reparo)."""
+    touch_order(order.pk, **order.items.aggregate(**item_totals_aggregates()))
@@ -0,0 +1,110 @@
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+
+
+# ==========================================================
+# PAGINAÇÃO POR CURSOR (KEYSET) EM (created_at, id)
+# ==========================================================
+#
+# Listas ordenadas por -created_at, -id. A próxima página não usa
+# OFFSET: parte da última linha vista,
+#
+#   WHERE created_at <= :c AND (created_at < :c OR id < :id)
+#   ORDER BY created_at DESC, id DESC LIMIT :tamanho + 1
+#
+# e o banco desce o índice direto até ela — custo O(página) em qualquer
+# profundidade. O "created_at <= :c" repetido deixa o OR indexável.
+#
+# Cursor na URL: "<microssegundos UTC>.<id>" da última linha da página.
+
+ORDERING = ("-created_at", "-id")
+
+Page = namedtuple("Page", "items next_url first_url size")
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+_PK_MAX = 2 ** 63 - 1
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def encode_cursor(obj):
+    micros = (obj.created_at - _EPOCH) // timedelta(microseconds=1)
+    return f"{micros}.{obj.pk}"
+
+
+def decode_cursor(value):
+    """(created_at, id). ValueError se o cursor não for válido."""
+    micros, _, pk = value.partition(".")
+
+    try:
+        # fora do alcance de timedelta/datetime: OverflowError
+        created_at = _EPOCH + timedelta(microseconds=int(micros))
+    except OverflowError:
+        raise ValueError(f"cursor inválido: {value!r}") from None
+
+    # fora de um bigint o banco recusa o parâmetro (500, não 400)
+    pk = int(pk)
+    if not 1 <= pk <= _PK_MAX:
+        raise ValueError(f"cursor inválido: {value!r}")
+
+    return created_at, pk
+
+
+def page_size(params):
+    """?size= limitado a [1, PAGE_SIZE_MAX]. ValueError se inválido."""
+    size = params.get("size")
+    if size in (None, ""):
+        return _setting("PAGE_SIZE", 50)
+
+    return max(1, min(int(size), _setting("PAGE_SIZE_MAX", 200)))
+
+
+def after_cursor(queryset, cursor=None):
+    """Lista ordenada a partir da linha seguinte ao cursor (None: do início)."""
+    queryset = queryset.order_by(*ORDERING)
+
+    if not cursor:
+        return queryset
+
+    created_at, pk = decode_cursor(cursor)
+    return queryset.filter(created_at__lte=created_at).filter(
+        Q(created_at__lt=created_at) | Q(pk__lt=pk)
+    )
+
+
+def keyset_page(request, queryset):
+    """Página da lista a partir de ?cursor=/?size=. ValueError se inválidos.
+
+    ``next_url``/``first_url`` mantêm os outros parâmetros (período do
+    relatório etc.); None quando não há para onde ir.
+    """
+    params = request.GET
+    size = page_size(params)
+    cursor = params.get("cursor")
+
+    queryset = after_cursor(queryset, cursor)
+    first_url = None
+
+    if cursor:
+        query = params.copy()
+        del query["cursor"]
+        first_url = f"?{query.urlencode()}"
+
+    # uma linha a mais só para saber se há próxima página
+    items = list(queryset[:size + 1])
+    next_url = None
+
+    if len(items) > size:
+        items = items[:size]
+
+        query = params.copy()
+        query["cursor"] = encode_cursor(items[-1])
+        next_url = f"?{query.urlencode()}"
+
+    return Page(items, next_url, first_url, size)
@@ -0,0 +1,315 @@
+import io
+import multiprocessing
+import os
+from collections import deque, namedtuple
+from itertools import chain, islice
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.utils import timezone
+from PIL import Image as PILImage
+from pypdf import PdfWriter
+from reportlab.platypus import (
+    Flowable,
+    SimpleDocTemplate,
+    Paragraph,
+    Spacer,
+    Table,
+    TableStyle,
+)
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+
+from core.report_worker import init_worker
+
+
+# Pedidos lidos do banco por vez nos relatórios por período (e por
+# bloco renderizado em paralelo)
+REPORT_CHUNK_SIZE = getattr(settings, "REPORT_CHUNK_SIZE", 100)
+
+# Processos que montam blocos de páginas (1 = tudo no próprio processo)
+PDF_RENDER_WORKERS = getattr(settings, "PDF_RENDER_WORKERS", 1)
+
+# Acima disso o relatório é montado no próprio processo: a concatenação
+# dos blocos fica inteira em memória
+PDF_PARALLEL_MAX_ORDERS = getattr(settings, "PDF_PARALLEL_MAX_ORDERS", 2000)
+
+
+# =========================================================
+# HELPER DATA FORMAT
+# =========================================================
+
+def _fmt(dt):
+    if not dt:
+        return "-"
+    return timezone.localtime(dt).strftime("%d/%m/%Y %H:%M")
+
+
+# =========================================================
+# RECURSOS (UMA VEZ POR PROCESSO)
+# =========================================================
+#
+# Folha de estilos, logo já decodificado e estilo da tabela não mudam
+# entre relatórios: são montados no primeiro PDF do processo (ou do
+# worker) e reaproveitados, sem getSampleStyleSheet() nem leitura do
+# PNG a cada request.
+
+Resources = namedtuple("Resources", "styles logo table_style")
+
+ITEM_COL_WIDTHS = [250, 80, 80]
+
+# Logo em pontos; pixels = pontos × LOGO_SCALE (nítido na impressão)
+LOGO_SIZE = (120, 80)
+LOGO_SCALE = 3
+ITEM_HEADER = ["Produto", "Pedido", "Enviado"]
+
+_resources = None
+
+
+class _Logo(Flowable):
+    """Logo a partir do ImageReader compartilhado (o Image do reportlab
+    só aceita caminho/arquivo e relê a imagem)."""
+
+    def __init__(self, image, width, height):
+        super().__init__()
+        self.image = image
+        self.width = width
+        self.height = height
+        self.hAlign = "RIGHT"
+
+    def wrap(self, available_width, available_height):
+        return self.width, self.height
+
+    def draw(self):
+        self.canv.drawImage(self.image, 0, 0, self.width, self.height)
+
+
+def get_resources():
+    global _resources
+
+    if _resources is None:
+        logo = None
+        logo_path = os.path.join(settings.BASE_DIR, "static", "xodo.png")
+
+        if os.path.exists(logo_path):
+            # o PNG original tem milhares de pixels por lado e cada PDF
+            # o recomprimiria inteiro: reduz uma vez para o tamanho impresso
+            with PILImage.open(logo_path) as image:
+                image = image.convert("RGB")
+                image.thumbnail((LOGO_SIZE[0] * LOGO_SCALE, LOGO_SIZE[1] * LOGO_SCALE))
+
+            logo = ImageReader(image)
+            logo.getRGBData()  # decodifica agora, não no primeiro PDF
+
+        _resources = Resources(
+            styles=getSampleStyleSheet(),
+            logo=logo,
+            table_style=TableStyle([
+                ("BACKGROUND", (0, 0), (-1, 0), colors.red),
+                ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+                ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+                ("ALIGN", (1, 1), (-1, -1), "CENTER"),
+            ]),
+        )
+
+    return _resources
+
+
+# =========================================================
+# ====================== GERADOR PDF ======================
+# =========================================================
+
+class _LazyStory(list):
+    """Lista de flowables que se reabastece de um gerador.
+
+    O reportlab consome a story pela frente (``len``/``[0]``/``del``);
+    aqui só ficam em memória os próximos ``low_water`` flowables, e os
+    pedidos vão sendo lidos do banco conforme as páginas são montadas.
+    """
+
+    def __init__(self, source, low_water=64):
+        super().__init__()
+        self._source = iter(source)
+        self._low_water = low_water
+
+    def __len__(self):
+        while self._source is not None and list.__len__(self) < self._low_water:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+        return list.__len__(self)
+
+
+def order_snapshot(order, operator_field):
+    """O que o PDF mostra do pedido, em tipos simples (vai para os workers)."""
+    operator = getattr(order, operator_field)
+    pct = order.fulfillment_pct
+
+    return {
+        "id": order.id,
+        "operator": operator.username if operator else "-",
+        "created_at": _fmt(order.created_at),
+        "picking_at": _fmt(order.picking_at),
+        "dispatched_at": _fmt(order.dispatched_at),
+        # totais desnormalizados: sem somar os itens aqui
+        "totals": (
+            f"Itens: {order.item_count} | Pedido: {order.qty_requested_total} | "
+            f"Enviado: {order.qty_sent_total} | Atendido: {'-' if pct is None else f'{pct}%'}"
+        ),
+        "items": [
+            (item.product.name, str(item.qty_requested), str(item.qty_sent or 0))
+            for item in order.items.all()
+        ],
+    }
+
+
+def _order_flowables(order, res):
+    styles = res.styles
+
+    yield Paragraph(f"<b>Pedido #{order['id']}</b>", styles["Heading2"])
+    yield Spacer(1, 0.2 * inch)
+
+    yield Paragraph(f"Operador: {order['operator']}", styles["Normal"])
+    yield Paragraph(f"Data Pedido: {order['created_at']}", styles["Normal"])
+    yield Paragraph(f"Início Separação: {order['picking_at']}", styles["Normal"])
+    yield Paragraph(f"Despacho: {order['dispatched_at']}", styles["Normal"])
+    yield Paragraph(order["totals"], styles["Normal"])
+
+    yield Spacer(1, 0.2 * inch)
+
+    table = Table([ITEM_HEADER, *order["items"]], colWidths=ITEM_COL_WIDTHS)
+    table.setStyle(res.table_style)
+
+    yield table
+    yield Spacer(1, 0.5 * inch)
+
+
+def _story(snapshots, title):
+    res = get_resources()
+
+    if title is not None:
+        # LOGO
+        if res.logo is not None:
+            yield _Logo(res.logo, *LOGO_SIZE)
+            yield Spacer(1, 0.2 * inch)
+
+        # TÍTULO
+        yield Paragraph(f"<b>{title}</b>", res.styles["Title"])
+        yield Spacer(1, 0.3 * inch)
+
+    # PEDIDOS
+    for order in snapshots:
+        yield from _order_flowables(order, res)
+
+
+def _build(snapshots, title, out):
+    doc = SimpleDocTemplate(out)
+    doc.build(_LazyStory(_story(snapshots, title)))
+    return out
+
+
+def render_chunk(snapshots, title=None):
+    """Bloco de pedidos -> bytes de um PDF (roda nos workers).
+
+    ``title`` só no primeiro bloco: logo e título abrem o relatório.
+    """
+    return _build(snapshots, title, io.BytesIO()).getvalue()
+
+
+def render_pdf(orders, title, operator_field, out):
+    """Tudo no próprio processo, lendo os pedidos conforme as páginas saem."""
+    return _build((order_snapshot(o, operator_field) for o in orders), title, out)
+
+
+# =========================================================
+# RELATÓRIOS GRANDES: BLOCOS EM PARALELO
+# =========================================================
+#
+# O processo do request lê os pedidos em blocos de REPORT_CHUNK_SIZE e
+# só monta os snapshots (barato); o layout de cada bloco (caro) roda
+# num pool de processos. Os PDFs dos blocos voltam na ordem e são
+# concatenados. Cada bloco começa numa página nova. No máximo
+# 2 × workers blocos ficam em voo.
+#
+# 🔥 A concatenação (PdfWriter) guarda o relatório inteiro em memória:
+# só relatórios de até PDF_PARALLEL_MAX_ORDERS pedidos vão para o pool.
+# Os maiores (e os jobs em segundo plano, que já rodam fora do request)
+# seguem no próprio processo, gravando direto no arquivo.
+
+_pool = None
+
+
+def _get_pool():
+    global _pool
+
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=PDF_RENDER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+        )
+
+    return _pool
+
+
+def _chunks(orders, operator_field):
+    chunk = []
+
+    for order in orders:
+        chunk.append(order_snapshot(order, operator_field))
+
+        if len(chunk) >= REPORT_CHUNK_SIZE:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def render_report_pdf(orders, title, operator_field, out, parallel=True):
+    """Como render_pdf; com mais de um bloco (e até PDF_PARALLEL_MAX_ORDERS
+    pedidos), monta os blocos em paralelo."""
+    global _pool
+
+    chunks = _chunks(orders, operator_field)
+
+    if not parallel or PDF_RENDER_WORKERS <= 1:
+        return _build((s for chunk in chunks for s in chunk), title, out)
+
+    max_chunks = max(2, PDF_PARALLEL_MAX_ORDERS // REPORT_CHUNK_SIZE)
+    head = list(islice(chunks, max_chunks + 1))
+
+    if len(head) < 2 or len(head) > max_chunks:
+        # um bloco só (ex.: pedido único) ou grande demais para concatenar
+        snapshots = (s for chunk in chain(head, chunks) for s in chunk)
+        return _build(snapshots, title, out)
+
+    pool = _get_pool()
+    merged = PdfWriter()
+    pending = deque()
+
+    try:
+        for index, chunk in enumerate(head):
+            pending.append(pool.submit(render_chunk, chunk, title if index == 0 else None))
+
+            while len(pending) >= 2 * PDF_RENDER_WORKERS:
+                merged.append(io.BytesIO(pending.popleft().result()))
+
+        while pending:
+            merged.append(io.BytesIO(pending.popleft().result()))
+
+    except BrokenProcessPool:
+        # worker morreu: o próximo relatório recria o pool
+        _pool = None
+        raise
+
+    finally:
+        for future in pending:
+            future.cancel()
+
+    merged.write(out)
+    return out
@@ -1,9 +1,11 @@
 from django.shortcuts import redirect
 
+from core.roles import has_group
+
 def require_group(name):
     def decorator(view):
         def wrapped(request, *args, **kwargs):
-            if request.user.is_authenticated and request.user.groups.filter(name=name).exists():
+            if request.user.is_authenticated and has_group(request, name):
                 return view(request, *args, **kwargs)
             return redirect("home")
         return wrapped
@@ -0,0 +1,68 @@
+import uuid
+
+from core.events import publish_event
+from core.models import Branch, OrderStatus
+
+
+# ==========================================================
+# GRUPOS DO WEBSOCKET
+# ==========================================================
+#
+# branch_<FILIAL>  -> telas de lista da filial (ex.: Austin recebendo pedidos)
+# user_<id>        -> pedidos do próprio usuário (lista "Meus Pedidos")
+# order_<id>       -> quem está com o detalhe do pedido aberto (subscribe)
+
+# Status que aparecem (ou acabam de sair) da lista de Austin
+AUSTIN_LIST_STATUSES = (
+    OrderStatus.SUBMITTED,
+    OrderStatus.PICKING,
+    OrderStatus.DISPATCHED,
+)
+
+
+def branch_group(branch):
+    return f"branch_{branch}"
+
+
+def user_group(user_id):
+    return f"user_{user_id}"
+
+
+def order_group(order_id):
+    return f"order_{order_id}"
+
+
+def order_groups(order):
+    groups = [
+        order_group(order.id),
+        user_group(order.created_by_id),
+    ]
+
+    if order.status in AUSTIN_LIST_STATUSES:
+        groups.append(branch_group(Branch.AUSTIN))
+
+    return groups
+
+
+def order_event(order, **extra):
+    # event_id: o mesmo evento pode chegar por mais de um grupo no socket
+    return {
+        "type": "order_update",
+        "event_id": uuid.uuid4().hex,
+        "order_id": order.id,
+        "status": order.status,
+        "status_display": order.get_status_display(),
+        **extra,
+    }
+
+
+def publish_order_update(order, **extra):
+    # Vai para o outbox: publicado só depois do commit (core.events)
+    publish_event(order_groups(order), order_event(order, **extra))
+
+
+def publish_badge_update(count):
+    publish_event(
+        [branch_group(Branch.AUSTIN)],
+        {"type": "badge_update", "count": count},
+    )
@@ -0,0 +1,204 @@
+import hashlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from core.models import ReportJob, ReportJobStatus
+from core.pdf import REPORT_CHUNK_SIZE, render_report_pdf
+from core.report_query import REPORTS, ReportQuery, query_filters, report_orders
+from core.report_worker import init_worker, run_job
+
+
+REPORT_JOBS_DIR = getattr(settings, "REPORT_JOBS_DIR", os.path.join(settings.BASE_DIR, "var", "reports"))
+REPORT_JOB_WORKERS = getattr(settings, "REPORT_JOB_WORKERS", 1)
+
+# Job na fila/gerando há mais tempo que isso é considerado perdido
+REPORT_JOB_TIMEOUT = timedelta(seconds=getattr(settings, "REPORT_JOB_TIMEOUT", 600))
+
+# PDFs prontos ficam disponíveis para reuso por esse tempo
+REPORT_JOB_TTL = timedelta(seconds=getattr(settings, "REPORT_JOB_TTL", 24 * 3600))
+
+
+# ==========================================================
+# IMPRESSÃO DIGITAL (REAPROVEITA PDF PRONTO)
+# ==========================================================
+
+def report_fingerprint(kind, query):
+    stats = report_orders(kind, query).order_by().aggregate(
+        last=Max("updated_at"),
+        total=Count("id"),
+    )
+
+    last = stats["last"].isoformat() if stats["last"] else "-"
+    filters = urlencode(sorted(query_filters(query).items()))
+    raw = f"{kind}|{query.start or '-'}|{query.end or '-'}|{filters}|{last}|{stats['total']}"
+
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def job_path(job):
+    return os.path.join(REPORT_JOBS_DIR, job.file)
+
+
+# ==========================================================
+# POOL DE PROCESSOS
+# ==========================================================
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=REPORT_JOB_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+        )
+
+    return _executor
+
+
+def _on_job_done(future):
+    global _executor
+
+    # processo filho morreu: recria o pool na próxima submissão
+    if isinstance(future.exception(), BrokenProcessPool):
+        _executor = None
+
+
+def _dispatch(job_id):
+    global _executor
+
+    try:
+        future = _get_executor().submit(run_job, job_id)
+    except (BrokenProcessPool, RuntimeError):
+        _executor = None
+        future = _get_executor().submit(run_job, job_id)
+
+    future.add_done_callback(_on_job_done)
+
+
+# ==========================================================
+# API
+# ==========================================================
+
+def is_stale(job):
+    return (
+        job.status in (ReportJobStatus.PENDING, ReportJobStatus.RUNNING)
+        and job.created_at < timezone.now() - REPORT_JOB_TIMEOUT
+    )
+
+
+def _reusable_job(fingerprint):
+    candidates = ReportJob.objects.filter(fingerprint=fingerprint).filter(
+        Q(status=ReportJobStatus.DONE)
+        | Q(
+            status__in=[ReportJobStatus.PENDING, ReportJobStatus.RUNNING],
+            created_at__gte=timezone.now() - REPORT_JOB_TIMEOUT,
+        )
+    ).order_by("-created_at")
+
+    for job in candidates:
+        if job.status != ReportJobStatus.DONE or os.path.exists(job_path(job)):
+            return job
+
+    return None
+
+
+def prune_report_jobs():
+    expired = ReportJob.objects.filter(created_at__lt=timezone.now() - REPORT_JOB_TTL)
+
+    for job in expired.exclude(file=""):
+        try:
+            os.remove(job_path(job))
+        except OSError:
+            pass
+
+    expired.delete()
+
+
+def job_query(job):
+    return ReportQuery(start=job.start, end=job.end, **job.filters)
+
+
+def submit_report_job(kind, query, user=None):
+    fingerprint = report_fingerprint(kind, query)
+
+    job = _reusable_job(fingerprint)
+    if job:
+        return job
+
+    prune_report_jobs()
+
+    job = ReportJob.objects.create(
+        kind=kind,
+        start=query.start,
+        end=query.end,
+        filters=query_filters(query),
+        fingerprint=fingerprint,
+        requested_by=user if user and user.is_authenticated else None,
+    )
+
+    transaction.on_commit(lambda: _dispatch(job.id))
+    return job
+
+
+def run_report_job(job_id):
+    claimed = ReportJob.objects.filter(
+        id=job_id,
+        status=ReportJobStatus.PENDING,
+    ).update(status=ReportJobStatus.RUNNING)
+
+    if not claimed:
+        return
+
+    job = ReportJob.objects.get(id=job_id)
+    conf = REPORTS[job.kind]
+
+    os.makedirs(REPORT_JOBS_DIR, exist_ok=True)
+
+    name = f"{job.kind.lower()}_{job.id}_{job.fingerprint[:16]}.pdf"
+    path = os.path.join(REPORT_JOBS_DIR, name)
+    tmp_path = f"{path}.tmp"
+
+    try:
+        orders = report_orders(job.kind, job_query(job)).prefetch_related("items__product")
+
+        with open(tmp_path, "wb") as out:
+            render_report_pdf(
+                orders.iterator(chunk_size=REPORT_CHUNK_SIZE),
+                conf["title"],
+                conf["operator_field"],
+                out,
+                # já é um processo à parte: sem pool dentro do pool
+                parallel=False,
+            )
+
+        os.replace(tmp_path, path)
+
+    except Exception as exc:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+        ReportJob.objects.filter(id=job_id).update(
+            status=ReportJobStatus.FAILED,
+            error=repr(exc),
+            finished_at=timezone.now(),
+        )
+        return
+
+    ReportJob.objects.filter(id=job_id).update(
+        status=ReportJobStatus.DONE,
+        file=name,
+        finished_at=timezone.now(),
+    )
@@ -0,0 +1,192 @@
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from core.models import Branch, OrderStatus, Product, TransferOrder, TransferOrderItem
+
+
+# ==========================================================
+# CONSULTA DOS RELATÓRIOS (TELA, PDF, JOB, PLANILHA)
+# ==========================================================
+#
+# Todo relatório por período passa por aqui: a query string é validada
+# uma vez (parse_report_query) e vira o mesmo WHERE em todas as
+# variantes. O período é sempre
+#
+#   created_at >= <início 00:00 local> AND created_at < <fim+1 00:00 local>
+#
+# (meio-aberto, America/Sao_Paulo) — nunca created_at__date, que
+# embrulha a coluna num cast de data e impede o uso do índice.
+
+REPORTS = {
+    Branch.AUSTIN: {
+        "title": "RELATÓRIO AUSTIN",
+        "filename": "relatorio_austin.pdf",
+        "operator_field": "picking_by",
+    },
+    Branch.QUEIMADOS: {
+        "title": "RELATÓRIO QUEIMADOS",
+        "filename": "relatorio_queimados.pdf",
+        "operator_field": "created_by",
+    },
+}
+
+# ?by= -> coluna usada no período
+DATE_FIELDS = {
+    "created": "created_at",
+    "submitted": "submitted_at",
+}
+
+# rascunho (carrinho) nunca entra em relatório
+REPORT_STATUSES = [s for s in OrderStatus.values if s != OrderStatus.DRAFT]
+
+ReportQuery = namedtuple(
+    "ReportQuery",
+    "start end status operator product date_by",
+    defaults=(None, None, None, None, None, "created"),
+)
+
+# filtros além do período (guardados no ReportJob)
+EXTRA_FILTERS = ("status", "operator", "product", "date_by")
+
+
+def day_bounds(start, end):
+    """Datas (inclusive) -> [início, fim) em datetime local."""
+    tz = timezone.get_current_timezone()
+
+    lower = timezone.make_aware(datetime.combine(start, time.min), tz) if start else None
+    upper = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz) if end else None
+    return lower, upper
+
+
+def parse_day(value):
+    """Data ISO (AAAA-MM-DD) ou None se vazia. ValueError se inválida."""
+    if not value:
+        return None
+
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(value)
+
+    try:
+        # 9999-12-31: o dia seguinte (fim do período) não existe
+        day_bounds(day, day)
+    except OverflowError:
+        raise ValueError(value) from None
+
+    return day
+
+
+def _parse_id(value):
+    if not value:
+        return None
+
+    pk = int(value)
+    if pk <= 0:
+        raise ValueError(value)
+    return pk
+
+
+def parse_report_query(params):
+    """ReportQuery a partir da query string. ValueError se inválida."""
+    start = parse_day(params.get("start"))
+    end = parse_day(params.get("end"))
+
+    if start and end and start > end:
+        raise ValueError("início depois do fim")
+
+    status = params.get("status") or None
+    if status and status not in REPORT_STATUSES:
+        raise ValueError(status)
+
+    date_by = params.get("by") or "created"
+    if date_by not in DATE_FIELDS:
+        raise ValueError(date_by)
+
+    return ReportQuery(
+        start=start,
+        end=end,
+        status=status,
+        operator=_parse_id(params.get("operator")),
+        product=_parse_id(params.get("product")),
+        date_by=date_by,
+    )
+
+
+def query_params(query):
+    """Query string (dict) equivalente, só com o que foi preenchido."""
+    params = {
+        "start": query.start.isoformat() if query.start else None,
+        "end": query.end.isoformat() if query.end else None,
+        "status": query.status,
+        "operator": query.operator,
+        "product": query.product,
+        "by": query.date_by if query.date_by != "created" else None,
+    }
+    return {key: value for key, value in params.items() if value is not None}
+
+
+def query_filters(query):
+    """Filtros além do período, para guardar em JSON (ReportJob.filters)."""
+    return {
+        name: getattr(query, name)
+        for name in EXTRA_FILTERS
+        if getattr(query, name) != ReportQuery._field_defaults[name]
+    }
+
+
+# ======================
+# WHERE
+# ======================
+
+def _conditions(kind, query, order="", product="items__product_id"):
+    """kwargs do filter(); ``order`` = caminho até o pedido ("order__" nos itens)."""
+    lower, upper = day_bounds(query.start, query.end)
+    date_field = order + DATE_FIELDS[query.date_by]
+
+    conditions = {}
+
+    if lower:
+        conditions[f"{date_field}__gte"] = lower
+    if upper:
+        conditions[f"{date_field}__lt"] = upper
+
+    if query.status:
+        conditions[f"{order}status"] = query.status
+    else:
+        conditions[f"{order}status__in"] = REPORT_STATUSES
+
+    if query.operator:
+        conditions[f"{order}{REPORTS[kind]['operator_field']}_id"] = query.operator
+
+    # (pedido, produto) é único: filtrar pelo item não duplica pedidos
+    if query.product:
+        conditions[product] = query.product
+
+    return conditions
+
+
+def report_orders(kind, query):
+    """Pedidos do relatório (com o operador já no JOIN)."""
+    return TransferOrder.objects.filter(
+        **_conditions(kind, query)
+    ).select_related(REPORTS[kind]["operator_field"])
+
+
+def report_items(kind, query):
+    """Itens dos pedidos do relatório (exportação em planilha)."""
+    return TransferOrderItem.objects.filter(
+        **_conditions(kind, query, order="order__", product="product_id")
+    )
+
+
+def filter_choices(kind):
+    """Opções dos filtros da tela (operadores da filial, produtos ativos)."""
+    return {
+        "statuses": [(s, OrderStatus(s).label) for s in REPORT_STATUSES],
+        "operators": User.objects.filter(groups__name=kind).order_by("username").values("id", "username"),
+        "products": Product.objects.filter(active=True).order_by("name").values("id", "name"),
+    }
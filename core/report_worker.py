@@ -0,0 +1,26 @@
+import os
+
+
+# ==========================================================
+# PROCESSO FILHO DO POOL DE RELATÓRIOS
+# ==========================================================
+#
+# Este módulo não importa nada do Django no topo: o pool usa "spawn",
+# então o filho precisa configurar o Django antes de carregar os models.
+
+def init_worker():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+    import django
+    django.setup()
+
+
+def run_job(job_id):
+    from django.db import close_old_connections
+    from core.report_jobs import run_report_job
+
+    close_old_connections()
+    try:
+        run_report_job(job_id)
+    finally:
+        close_old_connections()
@@ -0,0 +1,156 @@
+import time
+
+from django.core.cache import cache
+
+from core.async_cache import aadd, aget_many
+
+
+# ==========================================================
+# GRUPOS/FILIAL DO USUÁRIO (CACHE POR SESSÃO)
+# ==========================================================
+#
+# Os nomes dos grupos são lidos uma vez por sessão e guardados nela,
+# junto com uma versão. Alterar os grupos de um usuário (m2m_changed)
+# sobe a versão e a próxima requisição relê do banco.
+#
+# As versões ficam no cache default: com mais de um processo ele tem de
+# ser compartilhado (REDIS_URL), senão o bump feito num processo não é
+# visto pelos outros.
+
+SESSION_ROLE_KEY = "_branch_groups"
+
+ROLE_VERSION_KEY = "roles:version:{user_id}"
+ROLE_GLOBAL_VERSION_KEY = "roles:version"
+
+
+def _version_keys(user_id):
+    return [ROLE_GLOBAL_VERSION_KEY, ROLE_VERSION_KEY.format(user_id=user_id)]
+
+
+def _new_version():
+    # mesmo esquema de core.catalog: chave perdida (restart, LRU do
+    # LocMem) recomeça de um valor sempre maior, nunca de 0 — uma sessão
+    # gravada antes de revogarem os grupos não volta a casar
+    return int(time.time() * 1000)
+
+
+def _format_version(values, user_id):
+    """None se faltar alguma chave: quem chama relê do banco."""
+    keys = _version_keys(user_id)
+    if any(key not in values for key in keys):
+        return None
+    return "{}:{}".format(*(values[key] for key in keys))
+
+
+def _role_version(user_id):
+    keys = _version_keys(user_id)
+    values = cache.get_many(keys)
+
+    if len(values) < len(keys):
+        for key in keys:
+            if key not in values:
+                cache.add(key, _new_version(), None)
+        values = cache.get_many(keys)
+
+    return _format_version(values, user_id)
+
+
+async def _arole_version(user_id):
+    keys = _version_keys(user_id)
+    values = await aget_many(keys)
+
+    if len(values) < len(keys):
+        for key in keys:
+            if key not in values:
+                await aadd(key, _new_version(), None)
+        values = await aget_many(keys)
+
+    return _format_version(values, user_id)
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), None)
+
+
+def invalidate_user_roles(user_ids=None):
+    """Invalida o cache dos usuários informados (None = todos)."""
+    if user_ids is None:
+        _bump(ROLE_GLOBAL_VERSION_KEY)
+        return
+
+    for user_id in user_ids:
+        _bump(ROLE_VERSION_KEY.format(user_id=user_id))
+
+
+def _load_groups(user):
+    # mesma ordem de request.user.groups.first (pk)
+    return tuple(user.groups.order_by("pk").values_list("name", flat=True))
+
+
+def get_user_groups(request):
+    cached = getattr(request, "_branch_groups", None)
+    if cached is not None:
+        return cached
+
+    user = request.user
+
+    if not user.is_authenticated:
+        request._branch_groups = ()
+        return request._branch_groups
+
+    version = _role_version(user.pk)
+    session = getattr(request, "session", None)
+    stored = session.get(SESSION_ROLE_KEY) if session is not None else None
+
+    if version and stored and stored.get("uid") == user.pk and stored.get("v") == version:
+        groups = tuple(stored["groups"])
+    else:
+        groups = _load_groups(user)
+        if session is not None:
+            session[SESSION_ROLE_KEY] = {
+                "uid": user.pk,
+                "v": version,
+                "groups": list(groups),
+            }
+
+    request._branch_groups = groups
+    return groups
+
+
+async def aload_user_groups(user, session):
+    """Grupos do usuário pela sessão (async)."""
+    if not user.is_authenticated:
+        return ()
+
+    version = await _arole_version(user.pk)
+    stored = await session.aget(SESSION_ROLE_KEY) if session is not None else None
+
+    if version and stored and stored.get("uid") == user.pk and stored.get("v") == version:
+        return tuple(stored["groups"])
+
+    groups = tuple([
+        name async for name in
+        user.groups.order_by("pk").values_list("name", flat=True)
+    ])
+
+    if session is not None:
+        await session.aset(SESSION_ROLE_KEY, {
+            "uid": user.pk,
+            "v": version,
+            "groups": list(groups),
+        })
+
+    return groups
+
+
+def get_role(request):
+    groups = get_user_groups(request)
+    return groups[0] if groups else None
+
+
+def has_group(request, name):
+    return name in get_user_groups(request)
+
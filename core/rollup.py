@@ -0,0 +1,109 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.analytics import (
+    ROLLUP_WATERMARK,
+    SHIPPED_STATUSES,
+    affected_days_query,
+    get_rollup_watermark,
+    item_sums,
+)
+from core.models import DailyProductTransfer, RollupDirtyDay, RollupWatermark, TransferOrderItem
+from core.report_query import day_bounds
+
+
+# ==========================================================
+# ROLLUP DIÁRIO POR PRODUTO (DailyProductTransfer)
+# ==========================================================
+#
+# A cada execução:
+#
+#   1. dias afetados = dias de criação dos pedidos com updated_at >=
+#      watermark - ROLLUP_LAG (folga para transações que gravaram
+#      updated_at antes e commitaram depois da leitura anterior), mais
+#      os dias de pedidos apagados (RollupDirtyDay, gravado no
+#      post_delete — o pedido não existe mais para acusar o dia);
+#   2. cada dia é recalculado inteiro a partir dos itens e trocado numa
+#      transação (DELETE do dia + INSERT) — rodar de novo dá o mesmo;
+#   3. o watermark só avança para o início da execução no fim.
+#
+# Interrompido no meio, a próxima execução refaz os mesmos dias.
+#
+# Até lá, core/analytics.py lê esses dias ao vivo (stale_rollup_days).
+
+
+def affected_days(since=None, dirty=()):
+    """Dias a recalcular, em ordem (``since`` None = todos)."""
+    days = set(affected_days_query(since))
+    days.update(dirty)
+
+    if since is None:
+        # reconstrução: dias que sobraram no rollup sem pedido nenhum
+        days.update(DailyProductTransfer.objects.values_list("day", flat=True).distinct())
+
+    return sorted(days)
+
+
+def rebuild_day(day):
+    """Recalcula um dia inteiro. Devolve o número de linhas gravadas."""
+    lower, upper = day_bounds(day, day)
+
+    rows = (
+        TransferOrderItem.objects.filter(
+            order__status__in=SHIPPED_STATUSES,
+            order__created_at__gte=lower,
+            order__created_at__lt=upper,
+        )
+        .order_by()
+        .values("product_id", from_branch=F("order__from_branch"), to_branch=F("order__to_branch"))
+        .annotate(**item_sums())
+    )
+
+    objs = [
+        DailyProductTransfer(
+            day=day,
+            from_branch=row["from_branch"],
+            to_branch=row["to_branch"],
+            product_id=row["product_id"],
+            orders=row["orders"],
+            short_orders=row["short_orders"],
+            qty_requested=row["requested"],
+            qty_sent=row["sent"],
+            qty_fulfilled=row["fulfilled"],
+        )
+        for row in rows
+    ]
+
+    with transaction.atomic():
+        DailyProductTransfer.objects.filter(day=day).delete()
+        DailyProductTransfer.objects.bulk_create(objs)
+
+    return len(objs)
+
+
+def build_daily_rollup(full=False, progress=None):
+    """Processa o que mudou desde o watermark. Devolve (dias, linhas)."""
+    started_at = timezone.now()
+    since = None if full else get_rollup_watermark()
+
+    # lidos antes dos dias: marcação feita durante a execução fica para a próxima
+    dirty = dict(RollupDirtyDay.objects.values_list("id", "day"))
+
+    days = affected_days(since, dirty.values())
+    written = 0
+
+    for day in days:
+        count = rebuild_day(day)
+        written += count
+
+        if progress:
+            progress(day, count)
+
+    RollupWatermark.objects.update_or_create(
+        name=ROLLUP_WATERMARK,
+        defaults={"value": started_at},
+    )
+    RollupDirtyDay.objects.filter(id__in=dirty).delete()
+
+    return len(days), written
@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.artifacts import invalidate_order_artifacts, is_final
+from core.badge import adjust_pending_count
+from core.catalog import bump_catalog_version
+from core.models import Category, Product, RollupDirtyDay, TransferOrder, OrderStatus
+from core.roles import invalidate_user_roles
+
+
+# ==========================================================
+# CATÁLOGO — invalida o snapshot depois do commit
+# ==========================================================
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def catalog_changed(sender, **kwargs):
+    transaction.on_commit(bump_catalog_version)
+
+
+# ==========================================================
+# BADGE AUSTIN — pedido entrou/saiu de SUBMITTED
+# ==========================================================
+
+def _pending_delta(old_status, new_status):
+    return (
+        (new_status == OrderStatus.SUBMITTED)
+        - (old_status == OrderStatus.SUBMITTED)
+    )
+
+
+@receiver(post_save, sender=TransferOrder)
+def order_saved(sender, instance, **kwargs):
+    delta = _pending_delta(instance._loaded_status, instance.status)
+    instance._loaded_status = instance.status
+
+    if delta:
+        transaction.on_commit(lambda: adjust_pending_count(delta))
+
+
+@receiver(post_delete, sender=TransferOrder)
+def order_deleted(sender, instance, **kwargs):
+    if instance._loaded_status == OrderStatus.SUBMITTED:
+        transaction.on_commit(lambda: adjust_pending_count(-1))
+
+
+# ==========================================================
+# ARTEFATOS DE PEDIDO FECHADO — editado (admin) ou apagado
+# ==========================================================
+
+@receiver(post_save, sender=TransferOrder)
+@receiver(post_delete, sender=TransferOrder)
+def order_artifacts_changed(sender, instance, created=False, **kwargs):
+    # a versão nova já muda a chave; aqui só some o que ficou no disco
+    if created or not is_final(instance):
+        return
+
+    order_id = instance.pk
+    transaction.on_commit(lambda: invalidate_order_artifacts([order_id]))
+
+
+# ==========================================================
+# ROLLUP DIÁRIO — pedido apagado não acusa mais o próprio dia
+# ==========================================================
+
+@receiver(post_delete, sender=TransferOrder)
+def order_rollup_day_deleted(sender, instance, **kwargs):
+    # mesma transação do DELETE: rollback desfaz a marcação junto
+    RollupDirtyDay.objects.bulk_create(
+        [RollupDirtyDay(day=timezone.localdate(instance.created_at))],
+        ignore_conflicts=True,
+    )
+
+
+# ==========================================================
+# PAPEL DO USUÁRIO — grupos mudaram
+# ==========================================================
+
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        # user.groups.add/remove/clear
+        invalidate_user_roles([instance.pk])
+    elif pk_set:
+        # group.user_set.add/remove
+        invalidate_user_roles(pk_set)
+    else:
+        # group.user_set.clear: não sabemos quem era do grupo
+        invalidate_user_roles()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, **kwargs):
+    invalidate_user_roles()
@@ -0,0 +1,968 @@
+import asyncio
+import csv
+import io
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+from unittest import mock
+from xml.etree import ElementTree
+
+from django.contrib.auth.models import Group, User
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.analytics import (
+    fulfillment_totals,
+    live_product_rows,
+    product_fulfillment,
+    rollup_product_rows,
+    stale_rollup_days,
+)
+from core.artifacts import artifact_key, catalog_stamp, order_artifact
+from core.events import dispatch_due, publish_event
+from core.longpoll import longpoll_params, poll_order
+from core.models import (
+    Branch,
+    Category,
+    OrderLog,
+    DailyProductTransfer,
+    OrderStatus,
+    OutboxEvent,
+    Product,
+    RollupDirtyDay,
+    TransferOrder,
+    TransferOrderItem,
+)
+from core.orders import (
+    TOTAL_FIELDS,
+    apply_cart_quantities,
+    apply_sent_quantities,
+    item_totals_aggregates,
+    order_totals,
+    refresh_order_totals,
+    totals_delta,
+)
+from core.pagination import decode_cursor, encode_cursor, keyset_page
+from core.realtime import order_group
+from core.report_query import (
+    ReportQuery,
+    day_bounds,
+    parse_report_query,
+    query_params,
+    report_orders,
+)
+from core.rollup import build_daily_rollup
+from core.transitions import TransitionConflict, transition_order
+
+
+# ==========================================================
+# TOTAIS DESNORMALIZADOS (core/orders.py)
+# ==========================================================
+#
+# Os totais gravados no pedido são sempre ajustados por variação; aqui
+# eles são comparados com o mesmo cálculo feito do zero no banco
+# (item_totals_aggregates) depois de cada escrita.
+
+class TotalsDeltaTests(TestCase):
+
+    def test_extra_counts_as_fulfilled_only_up_to_requested(self):
+        delta = totals_delta(after=[(5, 7)])
+
+        self.assertEqual(delta, {
+            "item_count": 1,
+            "qty_requested_total": 5,
+            "qty_sent_total": 7,
+            "qty_fulfilled_total": 5,
+            "fulfilled_item_count": 1,
+        })
+
+    def test_removal_cancels_addition(self):
+        pairs = [(5, 7), (3, 1), (2, 0)]
+        delta = totals_delta(before=pairs, after=pairs)
+
+        self.assertEqual(delta, dict.fromkeys(TOTAL_FIELDS, 0))
+
+    def test_missing_sent_counts_as_zero(self):
+        items = [
+            TransferOrderItem(qty_requested=4, qty_sent=None),
+            TransferOrderItem(qty_requested=2, qty_sent=0),
+        ]
+
+        self.assertEqual(order_totals(items), {
+            "item_count": 2,
+            "qty_requested_total": 6,
+            "qty_sent_total": 0,
+            "qty_fulfilled_total": 0,
+            "fulfilled_item_count": 0,
+        })
+
+
+class StoredTotalsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("q")
+        category = Category.objects.create(name="Teste")
+        cls.products = Product.objects.bulk_create([
+            Product(sku=f"T{n}", name=f"P{n}", category=category) for n in range(4)
+        ])
+
+    def _order(self, status, requested):
+        order = TransferOrder.objects.create(created_by=self.user, status=status)
+        TransferOrderItem.objects.bulk_create([
+            TransferOrderItem(order=order, product=product, qty_requested=qty)
+            for product, qty in zip(self.products, requested)
+        ])
+        refresh_order_totals(order)
+        return order
+
+    def assertTotalsMatchItems(self, order):
+        stored = TransferOrder.objects.filter(pk=order.pk).values(*TOTAL_FIELDS).get()
+        computed = TransferOrderItem.objects.filter(order=order).aggregate(
+            **item_totals_aggregates()
+        )
+        self.assertEqual(stored, computed)
+
+    def test_sent_quantities_with_extras_and_shortfalls(self):
+        order = self._order(OrderStatus.PICKING, [5, 3, 2, 4])
+        items = list(order.items.order_by("id"))
+
+        apply_sent_quantities(order, {
+            items[0].id: 5,   # exato
+            items[1].id: 6,   # a mais
+            items[2].id: 1,   # faltou
+        })
+        self.assertTotalsMatchItems(order)
+
+        # volta atrás: a mais vira falta, falta vira zero, negativo vira 0
+        apply_sent_quantities(order, {
+            items[1].id: 2,
+            items[2].id: -3,
+            items[3].id: 4,
+        })
+        self.assertTotalsMatchItems(order)
+
+        totals = TransferOrder.objects.values(*TOTAL_FIELDS).get(pk=order.pk)
+        self.assertEqual(totals["qty_sent_total"], 5 + 2 + 0 + 4)
+        self.assertEqual(totals["fulfilled_item_count"], 2)
+
+    def test_unchanged_quantities_keep_version(self):
+        order = self._order(OrderStatus.PICKING, [5, 3])
+        version = TransferOrder.objects.values_list("version", flat=True).get(pk=order.pk)
+
+        apply_sent_quantities(order, {item.id: 0 for item in order.items.all()})
+
+        self.assertEqual(
+            TransferOrder.objects.values_list("version", flat=True).get(pk=order.pk),
+            version,
+        )
+        self.assertTotalsMatchItems(order)
+
+    def test_cart_change_and_removal(self):
+        cart = self._order(OrderStatus.DRAFT, [5, 3, 2])
+        items = list(cart.items.order_by("id"))
+
+        changed, removed = apply_cart_quantities(cart, {
+            items[0].id: 8,
+            items[1].id: 0,
+        })
+
+        self.assertEqual([item.id for item in changed], [items[0].id])
+        self.assertEqual(removed, [items[1].id])
+        self.assertTotalsMatchItems(cart)
+
+        # remover tudo zera os totais
+        apply_cart_quantities(cart, {items[0].id: 0, items[2].id: 0})
+        self.assertTotalsMatchItems(cart)
+        self.assertEqual(
+            TransferOrder.objects.values_list("item_count", flat=True).get(pk=cart.pk),
+            0,
+        )
+
+    def test_remove_item_view_counts_removal_once(self):
+        self.user.groups.add(Group.objects.get_or_create(name="QUEIMADOS")[0])
+        self.client.force_login(self.user)
+
+        cart = self._order(OrderStatus.DRAFT, [5, 3])
+        url = reverse("q_remove_item", args=[cart.items.order_by("id").first().id])
+
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        self.assertTotalsMatchItems(cart)
+        self.assertEqual(
+            TransferOrder.objects.values_list("qty_requested_total", flat=True).get(pk=cart.pk),
+            3,
+        )
+
+    def test_item_ok_view_writes_only_changes_during_picking(self):
+        self.user.groups.add(Group.objects.get_or_create(name="AUSTIN")[0])
+        self.client.force_login(self.user)
+
+        order = self._order(OrderStatus.PICKING, [5, 3])
+        item = order.items.order_by("id").first()
+        url = reverse("a_item_ok", args=[order.id, item.id])
+
+        self.client.get(url)
+        version = TransferOrder.objects.get(pk=order.pk).version
+
+        # já OK: sem versão nova, sem log
+        self.client.get(url)
+        self.assertEqual(TransferOrder.objects.get(pk=order.pk).version, version)
+        self.assertEqual(order.logs.count(), 1)
+        self.assertTotalsMatchItems(order)
+
+        # fora da separação: nada muda
+        TransferOrder.objects.filter(pk=order.pk).update(status=OrderStatus.DISPATCHED)
+        other = order.items.order_by("id").last()
+        self.client.get(reverse("a_item_ok", args=[order.id, other.id]))
+        self.assertEqual(TransferOrderItem.objects.get(pk=other.pk).qty_sent, other.qty_sent)
+        self.assertEqual(TransferOrder.objects.get(pk=order.pk).version, version)
+
+
+# ==========================================================
+# PAGINAÇÃO POR CURSOR (core/pagination.py)
+# ==========================================================
+
+class KeysetPageTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("p")
+        cls.user.groups.add(Group.objects.create(name="AUSTIN"))
+
+        orders = TransferOrder.objects.bulk_create([
+            TransferOrder(created_by=cls.user, status=OrderStatus.SUBMITTED)
+            for _ in range(7)
+        ])
+
+        # três pedidos no mesmo instante: o id desempata
+        stamps = [
+            datetime(2025, 3, day, 12, 0, 0, 123456, tzinfo=dt_timezone.utc)
+            for day in (1, 2, 2, 2, 3, 4, 5)
+        ]
+        for order, stamp in zip(orders, stamps):
+            TransferOrder.objects.filter(pk=order.pk).update(created_at=stamp)
+
+        cls.expected = list(
+            TransferOrder.objects.order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+
+    def _walk(self, size):
+        seen, url = [], f"/?size={size}"
+
+        while url:
+            page = keyset_page(RequestFactory().get(url), TransferOrder.objects.all())
+            seen.extend(order.id for order in page.items)
+            url = page.next_url and f"/{page.next_url}"
+
+        return seen
+
+    def test_cursor_round_trip(self):
+        for order in TransferOrder.objects.all():
+            self.assertEqual(decode_cursor(encode_cursor(order)), (order.created_at, order.pk))
+
+    def test_pages_cover_every_row_once(self):
+        for size in (1, 2, 3, 7, 50):
+            self.assertEqual(self._walk(size), self.expected)
+
+    def test_bad_cursor_raises_value_error(self):
+        for cursor in (
+            "", "abc", "12.", ".3",
+            "99999999999999999999.1", "-99999999999999999.1",
+            "1.99999999999999999999999", "1.0", "1.-5",
+        ):
+            with self.subTest(cursor=cursor), self.assertRaises(ValueError):
+                decode_cursor(cursor)
+
+    def test_bad_cursor_is_bad_request(self):
+        self.client.force_login(self.user)
+
+        for cursor in ("99999999999999999999.1", "1.99999999999999999999999"):
+            response = self.client.get(reverse("a_orders"), {"cursor": cursor})
+            self.assertEqual(response.status_code, 400)
+
+
+# ==========================================================
+# TRANSIÇÕES DE STATUS (core/transitions.py)
+# ==========================================================
+
+class TransitionOrderTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("dono")
+        cls.other = User.objects.create_user("outro")
+
+    def setUp(self):
+        self.order = TransferOrder.objects.create(created_by=self.owner, status=OrderStatus.SUBMITTED)
+        self.version = TransferOrder.objects.get(pk=self.order.pk).version
+
+    def _stored(self):
+        return TransferOrder.objects.get(pk=self.order.pk)
+
+    def test_transition_writes_status_stamp_version_and_log(self):
+        order = transition_order(self.order.id, "start_picking", self.other, fields={
+            "picking_by": self.other,
+        })
+
+        stored = self._stored()
+        self.assertEqual(stored.status, OrderStatus.PICKING)
+        self.assertIsNotNone(stored.picking_at)
+        self.assertEqual(stored.picking_by, self.other)
+        self.assertEqual(stored.version, self.version + 1)
+
+        # a instância devolvida já traz o que o UPDATE gravou/devolveu
+        self.assertEqual(order.version, stored.version)
+        self.assertEqual(order.created_by_id, self.owner.id)
+        self.assertEqual(
+            list(OrderLog.objects.filter(order=self.order).values_list("action", flat=True)),
+            ["Iniciou separação"],
+        )
+
+    def test_conflict_reports_current_status_and_writes_nothing(self):
+        with self.assertRaises(TransitionConflict) as ctx:
+            transition_order(self.order.id, "dispatch", self.other)
+
+        self.assertEqual(ctx.exception.current, OrderStatus.SUBMITTED)
+        self.assertEqual(self._stored().version, self.version)
+        self.assertFalse(OrderLog.objects.filter(order=self.order).exists())
+
+    def test_second_of_two_equal_transitions_conflicts(self):
+        transition_order(self.order.id, "start_picking", self.other)
+
+        with self.assertRaises(TransitionConflict):
+            transition_order(self.order.id, "start_picking", self.owner)
+
+        self.assertEqual(self._stored().version, self.version + 1)
+        self.assertEqual(OrderLog.objects.filter(order=self.order).count(), 1)
+
+    def test_scope_hides_orders_of_other_users(self):
+        with self.assertRaises(TransferOrder.DoesNotExist):
+            transition_order(self.order.id, "start_picking", self.other, scope={
+                "created_by": self.other,
+            })
+
+        self.assertEqual(self._stored().status, OrderStatus.SUBMITTED)
+        self.assertEqual(self._stored().version, self.version)
+
+    def test_fallback_without_returning(self):
+        with mock.patch("core.transitions._update_returning", return_value=False):
+            order = transition_order(self.order.id, "start_picking", self.other)
+
+            with self.assertRaises(TransitionConflict):
+                transition_order(self.order.id, "start_picking", self.other)
+
+        self.assertEqual(order.version, self.version + 1)
+        self.assertEqual(self._stored().status, OrderStatus.PICKING)
+
+
+# ==========================================================
+# OUTBOX DE EVENTOS (core/events.py)
+# ==========================================================
+
+@override_settings(
+    OUTBOX_DISPATCH="inline",
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+)
+class OutboxTests(TestCase):
+
+    def setUp(self):
+        self.layer = get_channel_layer()
+        self.channel = async_to_sync(self.layer.new_channel)()
+        async_to_sync(self.layer.group_add)("teste", self.channel)
+
+    def _receive_all(self):
+        # InMemoryChannelLayer.receive espera para sempre com a fila vazia
+        queue = self.layer.channels.get(self.channel)
+        events = []
+        while queue is not None and not queue.empty():
+            events.append(queue.get_nowait()[1])
+        return events
+
+    def test_rollback_discards_the_event(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                publish_event(["teste"], {"type": "order_update", "n": 1})
+                raise RuntimeError
+
+        self.assertEqual(callbacks, [])
+        self.assertFalse(OutboxEvent.objects.exists())
+        self.assertEqual(self._receive_all(), [])
+
+    def test_events_are_sent_after_commit_in_one_batch(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                publish_event(["teste"], {"type": "order_update", "n": 1})
+                publish_event(["teste"], {"type": "order_update", "n": 2})
+
+            # gravado, ainda não publicado
+            self.assertEqual(OutboxEvent.objects.filter(sent_at__isnull=True).count(), 2)
+            self.assertEqual(self._receive_all(), [])
+
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+
+        self.assertEqual([event["n"] for event in self._receive_all()], [1, 2])
+        self.assertFalse(OutboxEvent.objects.filter(sent_at__isnull=True).exists())
+
+    def test_failed_send_stays_pending_for_the_sweep(self):
+        # o envio roda na saída do captureOnCommitCallbacks
+        with mock.patch.object(self.layer, "group_send", side_effect=OSError("fora")):
+            with self.captureOnCommitCallbacks(execute=True):
+                publish_event(["teste"], {"type": "order_update", "n": 1})
+
+        row = OutboxEvent.objects.get()
+        self.assertIsNone(row.sent_at)
+        self.assertEqual(row.attempts, 1)
+
+        OutboxEvent.objects.update(next_attempt_at=row.created_at)
+        self.assertEqual(dispatch_due(), (1, 0))
+        self.assertEqual([event["n"] for event in self._receive_all()], [1])
+
+
+# ==========================================================
+# VERSÃO DO PEDIDO / ETAG (core/models.py, core/conditional.py)
+# ==========================================================
+
+class OrderVersionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("v")
+        cls.user.groups.add(Group.objects.create(name="AUSTIN"))
+
+    def setUp(self):
+        self.order = TransferOrder.objects.create(created_by=self.user, status=OrderStatus.SUBMITTED)
+        self.client.force_login(self.user)
+
+    def _version(self):
+        return TransferOrder.objects.values_list("version", flat=True).get(pk=self.order.pk)
+
+    def test_save_bumps_version_in_the_database(self):
+        self.assertEqual(self._version(), 1)
+
+        self.order.save()
+        self.assertEqual(self._version(), 2)
+
+        # update_fields sem "version" também sobe; o valor é relido
+        self.order.notes_from_austin = "x"
+        self.order.save(update_fields=["notes_from_austin"])
+        self.assertEqual(self._version(), 3)
+        self.assertEqual(self.order.version, 3)
+
+    def test_poll_answers_304_until_the_order_changes(self):
+        url = reverse("order_status_poll", args=[self.order.id])
+
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()["version"], 1)
+
+        cached = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached["ETag"], first["ETag"])
+
+        self.order.save()
+
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], first["ETag"])
+        self.assertEqual(changed.json()["version"], 2)
+
+    def test_badge_answers_304_while_the_count_is_the_same(self):
+        url = reverse("austin_badge")
+
+        first = self.client.get(url)
+        self.assertEqual(first.json(), {"count": 1})
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+
+
+# ==========================================================
+# LONG-POLL (core/longpoll.py)
+# ==========================================================
+
+@override_settings(
+    LONGPOLL_TIMEOUT=25,
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+)
+class LongPollTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("lp")
+
+    def setUp(self):
+        self.order = TransferOrder.objects.create(created_by=self.user, status=OrderStatus.SUBMITTED)
+
+    def _poll(self, since, timeout):
+        started = time.monotonic()
+        order = async_to_sync(poll_order)(self.order.id, since, timeout)
+        return order, time.monotonic() - started
+
+    def test_params(self):
+        self.assertEqual(longpoll_params({}), (None, 0))
+        self.assertEqual(longpoll_params({"since": "3"}), (3, 25))
+        self.assertEqual(longpoll_params({"since": "3", "wait": "99"}), (3, 25))
+        self.assertEqual(longpoll_params({"since": "3", "wait": "1.5"}), (3, 1.5))
+
+        for params in ({"since": "x"}, {"since": "-1"}, {"since": "1", "wait": "-1"},
+                       {"since": "1", "wait": "nan"}, {"since": "1", "wait": "inf"}):
+            with self.subTest(params=params), self.assertRaises(ValueError):
+                longpoll_params(params)
+
+    def test_changed_order_answers_at_once(self):
+        order, elapsed = self._poll(since=0, timeout=5)
+
+        self.assertEqual(order.version, 1)
+        self.assertLess(elapsed, 1)
+
+    def test_timeout_returns_the_same_version(self):
+        order, elapsed = self._poll(since=1, timeout=0.2)
+
+        self.assertEqual(order.version, 1)
+        self.assertGreaterEqual(elapsed, 0.2)
+        self.assertEqual(get_channel_layer().groups, {})
+
+    def test_event_wakes_the_poll(self):
+        layer = get_channel_layer()
+
+        async def scenario():
+            poll = asyncio.ensure_future(poll_order(self.order.id, 1, 5))
+            await asyncio.sleep(0.05)
+
+            await sync_to_async(self.order.save)()
+            await layer.group_send(order_group(self.order.id), {"type": "order_update"})
+            return await poll
+
+        started = time.monotonic()
+        order = async_to_sync(scenario)()
+
+        self.assertEqual(order.version, 2)
+        self.assertLess(time.monotonic() - started, 2)
+        # saiu do grupo ao responder
+        self.assertEqual(layer.groups, {})
+
+    def test_missing_order(self):
+        self.assertIsNone(async_to_sync(poll_order)(self.order.id + 1000, 1, 0.1))
+
+
+# ==========================================================
+# ATENDIMENTO POR PRODUTO (core/analytics.py)
+# ==========================================================
+
+def _shipped_order(user, day, lines, status=OrderStatus.RECEIVED):
+    """Pedido criado ao meio-dia (local) de ``day``; lines = [(produto, pedido, enviado)]."""
+    order = TransferOrder.objects.create(created_by=user, status=status)
+    TransferOrderItem.objects.bulk_create([
+        TransferOrderItem(order=order, product=product, qty_requested=requested, qty_sent=sent)
+        for product, requested, sent in lines
+    ])
+
+    created_at = timezone.make_aware(datetime.combine(day, dt_time(12)))
+    TransferOrder.objects.filter(pk=order.pk).update(created_at=created_at, updated_at=created_at)
+    order.refresh_from_db()
+    return order
+
+
+class ProductFulfillmentTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("pf")
+        category = Category.objects.create(name="Atendimento")
+        cls.a, cls.b = Product.objects.bulk_create([
+            Product(sku="PA", name="A", category=category),
+            Product(sku="PB", name="B", category=category),
+        ])
+        cls.day = timezone.localdate() - timedelta(days=3)
+
+        _shipped_order(cls.user, cls.day, [(cls.a, 10, 8), (cls.b, 4, 4)])
+        _shipped_order(cls.user, cls.day, [(cls.a, 5, 7)], status=OrderStatus.DISPATCHED)
+        # não saiu de Austin: fora do relatório
+        _shipped_order(cls.user, cls.day, [(cls.b, 9, 0)], status=OrderStatus.SUBMITTED)
+        # fora do período
+        _shipped_order(cls.user, cls.day - timedelta(days=10), [(cls.b, 9, 0)])
+
+    def test_rows_per_product(self):
+        rows = product_fulfillment(self.day, self.day)
+
+        self.assertEqual([row["product_id"] for row in rows], [self.a.id, self.b.id])
+
+        a, b = rows
+        expected = {
+            "orders": 2,
+            "short_orders": 1,
+            "requested": 15,
+            "sent": 15,
+            "fulfilled": 13,
+            "missing": 2,
+            "extra": 2,
+        }
+        self.assertEqual({key: a[key] for key in expected}, expected)
+        self.assertAlmostEqual(a["fill_rate"], 100 * 13 / 15)
+        self.assertEqual((b["orders"], b["missing"], b["fill_rate"]), (1, 0, 100))
+
+    def test_sort_and_totals(self):
+        rows = product_fulfillment(self.day, self.day, sort="fill_rate")
+        self.assertEqual([row["product_id"] for row in rows], [self.a.id, self.b.id])
+
+        rows = product_fulfillment(self.day, self.day, sort="product")
+        totals = fulfillment_totals(rows)
+        self.assertEqual((totals["requested"], totals["fulfilled"], totals["missing"]), (19, 17, 2))
+
+    def test_day_bounds_are_local(self):
+        self.assertEqual(product_fulfillment(self.day + timedelta(days=1), None), [])
+        self.assertEqual(len(product_fulfillment(None, self.day)), 2)
+
+
+# ==========================================================
+# ROLLUP DIÁRIO (core/rollup.py)
+# ==========================================================
+
+SUM_KEYS = ("product_id", "orders", "short_orders", "requested", "sent", "fulfilled")
+
+
+def _sums(rows):
+    return sorted(tuple(row[key] for key in SUM_KEYS) for row in rows)
+
+
+class DailyRollupTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("ru")
+        category = Category.objects.create(name="Rollup")
+        cls.a, cls.b = Product.objects.bulk_create([
+            Product(sku="RA", name="A", category=category),
+            Product(sku="RB", name="B", category=category),
+        ])
+        cls.day = timezone.localdate() - timedelta(days=3)
+        cls.start = cls.day - timedelta(days=2)
+
+        cls.first = _shipped_order(cls.user, cls.day, [(cls.a, 10, 8), (cls.b, 4, 4)])
+        cls.second = _shipped_order(cls.user, cls.day, [(cls.a, 5, 7)])
+        _shipped_order(cls.user, cls.start, [(cls.b, 6, 1)])
+
+    def assertRollupDayIsLive(self, day):
+        self.assertEqual(_sums(rollup_product_rows(day, day)), _sums(live_product_rows(day, day)))
+
+    def assertReportIsLive(self):
+        self.assertEqual(
+            _sums(product_fulfillment(self.start, timezone.localdate())),
+            _sums(live_product_rows(self.start, timezone.localdate())),
+        )
+
+    def test_full_build_matches_live(self):
+        days, _ = build_daily_rollup(full=True)
+
+        self.assertEqual(days, 2)
+        self.assertRollupDayIsLive(self.day)
+        self.assertEqual(stale_rollup_days(self.start, self.day), [])
+        self.assertReportIsLive()
+
+    def test_closed_days_come_from_the_rollup(self):
+        build_daily_rollup(full=True)
+
+        # rollup adulterado aparece no relatório: é ele que é lido
+        DailyProductTransfer.objects.filter(day=self.day, product=self.b).update(qty_requested=99)
+
+        row = next(r for r in product_fulfillment(self.day, self.day) if r["product_id"] == self.b.id)
+        self.assertEqual(row["requested"], 99)
+
+    def test_changed_order_is_read_live_until_the_next_build(self):
+        build_daily_rollup(full=True)
+
+        TransferOrderItem.objects.filter(order=self.first, product=self.a).update(qty_sent=10)
+        self.first.save()
+
+        self.assertEqual(stale_rollup_days(self.start, self.day), [self.day])
+        self.assertReportIsLive()
+
+        build_daily_rollup()
+
+        # fora da folga (ROLLUP_LAG) do watermark novo
+        TransferOrder.objects.update(
+            updated_at=timezone.make_aware(datetime.combine(self.start, dt_time(12)))
+        )
+
+        self.assertEqual(stale_rollup_days(self.start, self.day), [])
+        self.assertRollupDayIsLive(self.day)
+        self.assertReportIsLive()
+
+    def test_deleted_order_day_is_rebuilt(self):
+        build_daily_rollup(full=True)
+
+        self.second.delete()
+
+        self.assertEqual(list(RollupDirtyDay.objects.values_list("day", flat=True)), [self.day])
+        self.assertEqual(stale_rollup_days(self.start, self.day), [self.day])
+        self.assertReportIsLive()
+
+        build_daily_rollup()
+
+        self.assertFalse(RollupDirtyDay.objects.exists())
+        self.assertRollupDayIsLive(self.day)
+        self.assertReportIsLive()
+
+
+# ==========================================================
+# EXPORTAÇÃO CSV / XLSX (core/exports.py)
+# ==========================================================
+
+_SHEET_NS = {"s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+class ExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("exp")
+        cls.user.groups.add(Group.objects.create(name="AUSTIN"))
+        cls.picker = User.objects.create_user("separador")
+
+        category = Category.objects.create(name="Exportação")
+        cls.a, cls.b = Product.objects.bulk_create([
+            Product(sku="EA", name='Açúcar; "refinado"', unit="kg", category=category),
+            Product(sku="", name="Café", category=category),
+        ])
+        cls.day = timezone.localdate() - timedelta(days=2)
+
+        cls.order = _shipped_order(cls.user, cls.day, [(cls.a, 10, 8), (cls.b, 4, 4)])
+        TransferOrder.objects.filter(pk=cls.order.pk).update(picking_by=cls.picker)
+        # rascunho nunca sai na planilha
+        _shipped_order(cls.user, cls.day, [(cls.a, 1, 0)], status=OrderStatus.DRAFT)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _export(self, fmt, **params):
+        response = self.client.get(reverse("a_report_export"), {"format": fmt, **params})
+        self.assertEqual(response.status_code, 200)
+        return response, b"".join(response.streaming_content)
+
+    def test_csv_contents(self):
+        response, body = self._export("csv", start=self.day.isoformat(), end=self.day.isoformat())
+
+        self.assertTrue(response["Content-Type"].startswith("text/csv"))
+        self.assertIn(f"_{self.day}_{self.day}.csv", response["Content-Disposition"])
+
+        rows = list(csv.reader(io.StringIO(body.decode("utf-8-sig")), delimiter=";"))
+        created = timezone.localtime(self.order.created_at).strftime("%d/%m/%Y %H:%M")
+        status = OrderStatus.RECEIVED.label
+
+        self.assertEqual(rows[0][:2], ["Pedido", "Status"])
+        self.assertEqual(rows[1:], [
+            [str(self.order.id), status, created, "", "", "", "separador",
+             'Açúcar; "refinado"', "EA", "kg", "10", "8"],
+            [str(self.order.id), status, created, "", "", "", "separador",
+             "Café", "", "un", "4", "4"],
+        ])
+
+    def test_xlsx_contents(self):
+        response, body = self._export("xlsx")
+
+        self.assertIn("spreadsheetml", response["Content-Type"])
+
+        with zipfile.ZipFile(io.BytesIO(body)) as archive:
+            self.assertIsNone(archive.testzip())
+            sheet = ElementTree.fromstring(archive.read("xl/worksheets/sheet1.xml"))
+
+        rows = []
+        for row in sheet.iterfind("s:sheetData/s:row", _SHEET_NS):
+            rows.append([
+                cell.findtext("s:is/s:t", namespaces=_SHEET_NS) or cell.findtext("s:v", namespaces=_SHEET_NS)
+                for cell in row
+            ])
+
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0][0], "Pedido")
+        self.assertEqual(rows[1][0], str(self.order.id))
+        self.assertEqual(rows[1][7:], ['Açúcar; "refinado"', "EA", "kg", "10", "8"])
+        self.assertEqual(rows[2][7:], ["Café", None, "un", "4", "4"])
+
+        # data/hora como número de série do Excel (dias desde 1899-12-30)
+        serial = float(rows[1][2])
+        created = timezone.localtime(self.order.created_at).replace(tzinfo=None)
+        self.assertAlmostEqual(serial, (created - datetime(1899, 12, 30)) / timedelta(days=1), places=4)
+
+    def test_invalid_format_or_filter(self):
+        url = reverse("a_report_export")
+
+        self.assertEqual(self.client.get(url, {"format": "pdf"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"end": "9999-12-31"}).status_code, 400)
+
+
+# ==========================================================
+# ARTEFATOS DE PEDIDO FECHADO (core/artifacts.py, core/signals.py)
+# ==========================================================
+
+class OrderArtifactTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("artefato")
+        cls.user.groups.add(Group.objects.create(name="AUSTIN"))
+        cls.product = Product.objects.create(sku="AR", name="Arroz")
+        cls.order = _shipped_order(cls.user, timezone.localdate(), [(cls.product, 5, 5)])
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+
+        override = override_settings(ORDER_ARTIFACTS_DIR=directory)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.order_dir = os.path.join(directory, str(self.order.id))
+
+    def _build(self, order):
+        return order_artifact(order, "teste", "txt", lambda out: out.write(b"ok"))
+
+    def test_same_key_reuses_the_file(self):
+        path = self._build(TransferOrder.objects.get(pk=self.order.pk))
+        build = mock.Mock()
+
+        self.assertEqual(
+            order_artifact(TransferOrder.objects.get(pk=self.order.pk), "teste", "txt", build),
+            path,
+        )
+        build.assert_not_called()
+
+    def test_saving_a_closed_order_drops_its_files(self):
+        order = TransferOrder.objects.get(pk=self.order.pk)
+        old_key = artifact_key(order)
+        self._build(order)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order.notes_from_austin = "corrigido no admin"
+            order.save()
+
+        self.assertFalse(os.path.exists(self.order_dir))
+
+        order = TransferOrder.objects.get(pk=self.order.pk)
+        self.assertNotEqual(artifact_key(order), old_key)
+
+    def test_deleting_an_order_drops_its_files(self):
+        self._build(TransferOrder.objects.get(pk=self.order.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TransferOrder.objects.get(pk=self.order.pk).delete()
+
+        self.assertFalse(os.path.exists(self.order_dir))
+
+    def test_product_change_changes_the_key(self):
+        order = TransferOrder.objects.get(pk=self.order.pk)
+        old_path = self._build(order)
+        old_stamp = catalog_stamp()
+
+        # updated_at com resolução de microssegundos; garante o avanço
+        time.sleep(0.001)
+        self.product.name = "Arroz agulhinha"
+        self.product.save()
+
+        self.assertGreater(catalog_stamp(), old_stamp)
+
+        order = TransferOrder.objects.get(pk=self.order.pk)
+        new_path = self._build(order)
+
+        self.assertNotEqual(new_path, old_path)
+        # a versão anterior do mesmo artefato sai do disco
+        self.assertEqual(os.listdir(self.order_dir), [os.path.basename(new_path)])
+
+    def test_pdf_is_immutable_only_with_the_current_key(self):
+        self.client.force_login(self.user)
+        url = reverse("a_report_pdf_single", args=[self.order.id])
+        key = artifact_key(TransferOrder.objects.get(pk=self.order.pk))
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        self.assertEqual(b"".join(response.streaming_content)[:5], b"%PDF-")
+
+        self.assertIn("immutable", self.client.get(url, {"v": key})["Cache-Control"])
+        self.assertEqual(self.client.get(url, {"v": "v0-p0"})["Cache-Control"], "private, no-cache")
+
+        etag = response["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+# ==========================================================
+# CONSULTA DOS RELATÓRIOS (core/report_query.py)
+# ==========================================================
+
+class ReportQueryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("relatorio")
+        cls.picker = User.objects.create_user("separador")
+        cls.rice, cls.beans = Product.objects.bulk_create([
+            Product(sku="RQ1", name="Arroz"),
+            Product(sku="RQ2", name="Feijão"),
+        ])
+        cls.day = timezone.localdate() - timedelta(days=3)
+
+        cls.noon = _shipped_order(cls.user, cls.day, [(cls.rice, 1, 1)])
+        cls.cancelled = _shipped_order(
+            cls.user, cls.day, [(cls.beans, 1, 0)], status=OrderStatus.CANCELLED,
+        )
+        cls.draft = _shipped_order(cls.user, cls.day, [(cls.rice, 1, 0)], status=OrderStatus.DRAFT)
+        TransferOrder.objects.filter(pk=cls.noon.pk).update(picking_by=cls.picker)
+
+        # bordas do dia em horário local
+        cls.last_second = _shipped_order(cls.user, cls.day, [(cls.rice, 1, 1)])
+        cls.next_midnight = _shipped_order(cls.user, cls.day, [(cls.rice, 1, 1)])
+        _, end = day_bounds(cls.day, cls.day)
+        TransferOrder.objects.filter(pk=cls.last_second.pk).update(created_at=end - timedelta(seconds=1))
+        TransferOrder.objects.filter(pk=cls.next_midnight.pk).update(created_at=end)
+
+    def _ids(self, **params):
+        query = parse_report_query({"start": self.day.isoformat(), "end": self.day.isoformat(), **params})
+        return set(report_orders(Branch.AUSTIN, query).values_list("pk", flat=True))
+
+    def test_day_bounds_are_local_and_half_open(self):
+        start, end = day_bounds(self.day, self.day)
+
+        self.assertEqual(timezone.localtime(start).replace(tzinfo=None), datetime.combine(self.day, dt_time.min))
+        self.assertEqual(end - start, timedelta(days=1))
+        self.assertEqual(day_bounds(None, None), (None, None))
+
+    def test_period_keeps_the_whole_local_day(self):
+        self.assertEqual(
+            self._ids(),
+            {self.noon.pk, self.cancelled.pk, self.last_second.pk},
+        )
+
+    def test_filters(self):
+        self.assertEqual(self._ids(status=OrderStatus.CANCELLED), {self.cancelled.pk})
+        self.assertEqual(self._ids(product=str(self.beans.pk)), {self.cancelled.pk})
+        self.assertEqual(self._ids(operator=str(self.picker.pk)), {self.noon.pk})
+
+    def test_invalid_params_raise_value_error(self):
+        for params in (
+            {"start": "2024-02-30"},
+            {"start": "ontem"},
+            {"end": "9999-12-31"},
+            {"start": "2024-05-02", "end": "2024-05-01"},
+            {"status": OrderStatus.DRAFT},
+            {"by": "updated"},
+            {"operator": "0"},
+            {"product": "x"},
+        ):
+            with self.subTest(params=params), self.assertRaises(ValueError):
+                parse_report_query(params)
+
+    def test_query_params_round_trip(self):
+        params = {"start": "2024-05-01", "end": "2024-05-31", "status": OrderStatus.RECEIVED,
+                  "product": "7", "by": "submitted"}
+        query = parse_report_query(params)
+
+        self.assertEqual(parse_report_query(query_params(query)), query)
+        self.assertEqual(query_params(ReportQuery()), {})
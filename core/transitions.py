@@ -0,0 +1,179 @@
+import logging
+from collections import namedtuple
+
+from django.db import connections, router, transaction
+from django.db.models import F
+from django.db.models.sql import UpdateQuery
+from django.utils import timezone
+
+from core.badge import adjust_pending_count
+from core.models import OrderLog, OrderStatus, TransferOrder
+from core.realtime import publish_order_update
+
+
+logger = logging.getLogger(__name__)
+
+
+# ==========================================================
+# MÁQUINA DE ESTADOS DO PEDIDO (COMPARE-AND-SWAP)
+# ==========================================================
+#
+# Cada transição é um único
+#
+#   UPDATE core_transferorder SET status=<novo>, <carimbo>=now, ...
+#    WHERE id=<id> AND status=<esperado> RETURNING created_by_id, version
+#
+# que grava só as colunas da transição. Zero linhas = outro usuário
+# chegou antes (ou o pedido nunca esteve no status esperado): vira
+# TransitionConflict com o status atual, nada é gravado. Log, evento
+# (outbox) e badge saem na mesma transação, sem reler o pedido.
+
+Transition = namedtuple("Transition", "source target stamp action")
+
+TRANSITIONS = {
+    "submit": Transition(
+        OrderStatus.DRAFT, OrderStatus.SUBMITTED,
+        "submitted_at", "Enviou o pedido para Austin",
+    ),
+    "start_picking": Transition(
+        OrderStatus.SUBMITTED, OrderStatus.PICKING,
+        "picking_at", "Iniciou separação",
+    ),
+    "dispatch": Transition(
+        OrderStatus.PICKING, OrderStatus.DISPATCHED,
+        "dispatched_at", "Despachou o pedido",
+    ),
+    "receive": Transition(
+        OrderStatus.DISPATCHED, OrderStatus.RECEIVED,
+        "received_at", "Confirmou recebimento do pedido",
+    ),
+}
+
+# Colunas devolvidas pelo UPDATE (grupos do evento / versão nova)
+RETURNING = ("created_by_id", "version")
+
+
+class TransitionConflict(Exception):
+    """O pedido não estava no status esperado pela transição."""
+
+    def __init__(self, order_id, transition, current):
+        self.order_id = order_id
+        self.transition = transition
+        self.current = current
+        super().__init__(
+            f"Pedido #{order_id}: esperado {transition.source}, está {current}"
+        )
+
+    @property
+    def current_display(self):
+        return OrderStatus(self.current).label
+
+
+def _update_returning(connection):
+    """UPDATE ... RETURNING: Postgres e SQLite >= 3.35 (MySQL/MariaDB não;
+    a flag can_return_columns_from_insert do Django é só para INSERT)."""
+    if connection.vendor == "postgresql":
+        return True
+    if connection.vendor == "sqlite":
+        return connection.Database.sqlite_version_info >= (3, 35)
+    return False
+
+
+def _cas_update(order_id, filters, values):
+    """UPDATE ... RETURNING numa ida ao banco. None se nenhuma linha casou."""
+    using = router.db_for_write(TransferOrder)
+    connection = connections[using]
+    queryset = TransferOrder.objects.filter(pk=order_id, **filters)
+
+    if not _update_returning(connection):
+        # banco sem RETURNING: UPDATE + leitura (linha já travada pelo UPDATE)
+        if not queryset.update(**values):
+            return None
+        return TransferOrder.objects.filter(pk=order_id).values_list(*RETURNING).first()
+
+    # mesmo caminho do QuerySet.update(), só acrescenta o RETURNING
+    query = queryset.query.chain(UpdateQuery)
+    query.add_update_values(values)
+    sql, params = query.get_compiler(using).as_sql()
+
+    columns = ", ".join(
+        connection.ops.quote_name(TransferOrder._meta.get_field(name).column)
+        for name in RETURNING
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"{sql} RETURNING {columns}", params)
+        return cursor.fetchone()
+
+
+def transition_order(order_id, name, user, fields=None, scope=None):
+    """Aplica a transição ``name`` e devolve o pedido (só os campos gravados).
+
+    ``fields``: colunas extras da transição (ex.: observação do despacho).
+    ``scope``: filtros extras do WHERE (ex.: ``created_by=user``).
+
+    TransitionConflict se o status não era o esperado;
+    TransferOrder.DoesNotExist se o pedido não existe (no escopo).
+    """
+    transition = TRANSITIONS[name]
+    scope = scope or {}
+    now = timezone.now()
+
+    values = {
+        "status": transition.target,
+        transition.stamp: now,
+        "updated_at": now,
+        "version": F("version") + 1,
+        **(fields or {}),
+    }
+
+    with transaction.atomic():
+        row = _cas_update(order_id, {"status": transition.source, **scope}, values)
+
+        if row is None:
+            current = (
+                TransferOrder.objects.filter(pk=order_id, **scope)
+                .values_list("status", flat=True)
+                .first()
+            )
+            if current is None:
+                raise TransferOrder.DoesNotExist(f"Pedido #{order_id} não encontrado.")
+
+            logger.warning(
+                "Transição %s do pedido #%s recusada: status atual %s",
+                name, order_id, current,
+            )
+            raise TransitionConflict(order_id, transition, current)
+
+        written = {"id": order_id, **values, **dict(zip(RETURNING, row))}
+
+        # instância parcial: o que não foi gravado fica adiado (deferred)
+        data = {}
+        for field in TransferOrder._meta.concrete_fields:
+            for key in (field.name, field.attname):
+                if key in written:
+                    data[field.attname] = getattr(written[key], "pk", written[key])
+
+        order = TransferOrder.from_db(
+            router.db_for_write(TransferOrder),
+            list(data),
+            list(data.values()),
+        )
+
+        log = OrderLog.objects.create(order=order, user=user, action=transition.action)
+
+        publish_order_update(order, log={
+            "created_at": timezone.localtime(log.created_at).strftime("%d/%m/%Y %H:%M:%S"),
+            "user": user.username if user else None,
+            "action": log.action,
+        })
+
+        # 🔥 UPDATE direto não dispara post_save: o badge é ajustado aqui
+        delta = (
+            (transition.target == OrderStatus.SUBMITTED)
+            - (transition.source == OrderStatus.SUBMITTED)
+        )
+        if delta:
+            transaction.on_commit(lambda: adjust_pending_count(delta))
+
+    return order
@@ -28,6 +28,9 @@ urlpatterns = [
     path("queimados/relatorio/", views.q_report, name="q_report"),
     path("queimados/relatorio/pdf/", views.q_report_pdf, name="q_report_pdf"),
     path("queimados/relatorio/pdf/<int:order_id>/", views.q_report_pdf_single, name="q_report_pdf_single"),
+    path("queimados/relatorio/exportar/", views.q_report_export, name="q_report_export"),
+    path("queimados/relatorio/jobs/<int:job_id>/", views.q_report_job, name="q_report_job"),
+    path("queimados/relatorio/jobs/<int:job_id>/download/", views.q_report_job_download, name="q_report_job_download"),
 
     # Categorias
     path("queimados/categorias/", views.queimados_categories, name="q_categories"),
@@ -51,6 +54,10 @@ urlpatterns = [
     path("austin/relatorio/", views.a_report, name="a_report"),
     path("austin/relatorio/pdf/", views.a_report_pdf, name="a_report_pdf"),
     path("austin/relatorio/pdf/<int:order_id>/", views.a_report_pdf_single, name="a_report_pdf_single"),
+    path("austin/relatorio/exportar/", views.a_report_export, name="a_report_export"),
+    path("austin/relatorio/jobs/<int:job_id>/", views.a_report_job, name="a_report_job"),
+    path("austin/relatorio/jobs/<int:job_id>/download/", views.a_report_job_download, name="a_report_job_download"),
+    path("austin/relatorio/produtos/", views.a_product_report, name="a_product_report"),
 
 
 
@@ -60,6 +67,7 @@ urlpatterns = [
     # =====================
 
     path("austin/api/badge/", views.austin_badge, name="austin_badge"),
+    path("austin/api/produtos/", views.a_product_report_api, name="a_product_report_api"),
 
 
     # =====================
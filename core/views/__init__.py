@@ -44,9 +44,17 @@ from .reports import (
     a_report,
     a_report_pdf,
     a_report_pdf_single,
+    a_report_export,
+    a_report_job,
+    a_report_job_download,
+    a_product_report,
+    a_product_report_api,
     q_report,
     q_report_pdf,
     q_report_pdf_single,
+    q_report_export,
+    q_report_job,
+    q_report_job_download,
 )
 
 # =====================
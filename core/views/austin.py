@@ -1,85 +1,101 @@
 from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.utils import timezone
+from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.views.decorators.http import require_GET
-from django.http import JsonResponse
+from django.http import Http404, HttpResponseBadRequest, JsonResponse
 
+from core.artifacts import is_final, order_fragment
+from core.badge import pending_count
+from core.conditional import not_modified, order_etag, order_page_etag, set_validators, weak_etag
+from core.longpoll import longpoll_params, poll_order
 from core.models import TransferOrder, OrderStatus, TransferOrderItem, OrderLog
+from core.orders import parse_qty_fields, apply_sent_quantities
+from core.pagination import keyset_page
 from core.permissions import require_austin
+from core.realtime import publish_order_update
+from core.transitions import TransitionConflict, transition_order
 
 
 @require_austin
 def a_orders(request):
     orders = TransferOrder.objects.filter(
         status__in=[OrderStatus.SUBMITTED, OrderStatus.PICKING]
-    ).order_by("-created_at")
+    )
+
+    try:
+        page = keyset_page(request, orders)
+    except ValueError:
+        return HttpResponseBadRequest("Página inválida.")
 
-    return render(request, "austin/orders.html", {"orders": orders})
+    return render(request, "austin/orders.html", {"orders": page.items, "page": page})
 
 
 @require_austin
 def a_order_detail(request, order_id):
-    order = get_object_or_404(TransferOrder, id=order_id)
-    items = order.items.select_related("product")
-
     if request.method == "POST":
-        if order.status != OrderStatus.PICKING:
-            messages.error(request, "Só pode alterar durante separação.")
-            return redirect("a_order_detail", order_id=order.id)
+        try:
+            quantities = parse_qty_fields(request.POST, "sent_")
+        except ValueError:
+            messages.error(request, "Quantidade inválida.")
+            return redirect("a_order_detail", order_id=order_id)
 
-        for item in items:
-            field = f"sent_{item.id}"
-            if field in request.POST:
-                val = int(request.POST[field])
-                item.qty_sent = max(0, val)
-                item.save()
+        with transaction.atomic():
+            order = get_object_or_404(
+                TransferOrder.objects.select_for_update(),
+                id=order_id
+            )
 
-        order.notes_from_austin = request.POST.get("notes_from_austin", "")
-        order.save()
+            if order.status != OrderStatus.PICKING:
+                messages.error(request, "Só pode alterar durante separação.")
+                return redirect("a_order_detail", order_id=order.id)
 
-        messages.success(request, "Quantidades atualizadas.")
-        return redirect("a_order_detail", order_id=order.id)
+            apply_sent_quantities(order, quantities)
 
-    return render(request, "austin/order_detail.html", {
-        "order": order,
-        "items": items
-    })
+            order.notes_from_austin = request.POST.get("notes_from_austin", "")
+            order.save(update_fields=["notes_from_austin", "updated_at"])
 
+        messages.success(request, "Quantidades atualizadas.")
+        return redirect("a_order_detail", order_id=order.id)
 
-@require_austin
-def a_start_picking(request, order_id):
     order = get_object_or_404(TransferOrder, id=order_id)
 
-    if order.status != OrderStatus.SUBMITTED:
-        messages.error(request, "Só pode iniciar quando enviado.")
-        return redirect("a_order_detail", order_id=order.id)
-
-    order.status = OrderStatus.PICKING
-    order.picking_by = request.user
-    order.picking_at = timezone.now()
-    order.save()
+    # 🔥 Cópia do navegador em dia: 304 sem consultar itens
+    etag = order_page_etag(request, order)
+    cached = not_modified(request, etag, order.updated_at)
+    if cached:
+        return cached
 
-    channel_layer = get_channel_layer()
+    items = order.items.select_related("product")
+    context = {"order": order, "items": items}
 
-    async_to_sync(channel_layer.group_send)(
-        "orders_group",
-        {
-            "type": "order_update",
-            "order_id": order.id,
-            "status": order.status,
-            "status_display": order.get_status_display(),
+    # 🔥 Pedido fechado: tabela/observação renderizadas uma vez (core.artifacts)
+    if is_final(order):
+        context["fragments"] = {
+            "table": order_fragment(order, "detail-austin", "austin/order_table.html", context),
         }
-    )
 
-    OrderLog.objects.create(
-        order=order,
-        user=request.user,
-        action="Iniciou separação"
-    )
+    response = render(request, "austin/order_detail.html", context)
+    return set_validators(response, etag, order.updated_at)
 
-    return redirect("a_order_detail", order_id=order.id)
+
+@require_austin
+def a_start_picking(request, order_id):
+    # 🔥 UPDATE condicional: dois usuários não iniciam o mesmo pedido
+    try:
+        transition_order(order_id, "start_picking", request.user, fields={
+            "picking_by": request.user,
+        })
+    except TransferOrder.DoesNotExist:
+        raise Http404
+    except TransitionConflict as exc:
+        messages.error(
+            request,
+            f"Só pode iniciar quando enviado (pedido está: {exc.current_display}).",
+        )
+
+    return redirect("a_order_detail", order_id=order_id)
 
 
 @require_austin
@@ -88,104 +104,103 @@ def a_dispatch(request, order_id):
     if request.method != "POST":
         return redirect("a_order_detail", order_id=order_id)
 
-    order = get_object_or_404(TransferOrder, id=order_id)
-
-    if order.status != OrderStatus.PICKING:
-        messages.error(request, "Só pode despachar durante separação.")
-        return redirect("a_order_detail", order_id=order.id)
+    # 🔥 VALIDA TODAS AS QUANTIDADES ANTES DE GRAVAR
+    try:
+        quantities = parse_qty_fields(request.POST, "sent_")
+    except ValueError:
+        messages.error(request, "Quantidade inválida.")
+        return redirect("a_order_detail", order_id=order_id)
 
-    # 🔥 SALVAR QUANTIDADES ENVIADAS
-    for item in order.items.all():
-        field = f"sent_{item.id}"
-
-        if field in request.POST:
-            try:
-                val = int(request.POST.get(field))
-                item.qty_sent = max(0, val)
-                item.save()
-            except (ValueError, TypeError):
-                pass
-
-    # 🔥 SALVAR OBSERVAÇÃO
-    order.notes_from_austin = request.POST.get("notes_from_austin", "")
-
-    order.status = OrderStatus.DISPATCHED
-    order.dispatched_at = timezone.now()
-    order.save()
-
-    log = OrderLog.objects.create(
-        order=order,
-        user=request.user,
-        action="Despachou o pedido"
-    )
+    try:
+        with transaction.atomic():
+            # transição primeiro: quem perde a corrida não grava quantidades
+            order = transition_order(order_id, "dispatch", request.user, fields={
+                "notes_from_austin": request.POST.get("notes_from_austin", ""),
+            })
+
+            # 🔥 SALVAR QUANTIDADES ENVIADAS (UM UPDATE SÓ)
+            apply_sent_quantities(order, quantities, touch=False)
+
+    except TransferOrder.DoesNotExist:
+        raise Http404
+    except TransitionConflict as exc:
+        messages.error(
+            request,
+            f"Só pode despachar durante separação (pedido está: {exc.current_display}).",
+        )
 
-    channel_layer = get_channel_layer()
-
-    async_to_sync(channel_layer.group_send)(
-        "orders_group",
-        {
-            "type": "order_update",
-            "order_id": order.id,
-            "status": order.status,
-            "status_display": order.get_status_display(),
-            "log": {
-                "created_at": log.created_at.strftime("%d/%m/%Y %H:%M:%S"),
-                "user": log.user.username,
-                "action": log.action,
-            }
-        }
-    )
+    return redirect("a_order_detail", order_id=order_id)
 
-    return redirect("a_order_detail", order_id=order.id)
 
 @require_austin
 def a_item_ok(request, order_id, item_id):
-    order = get_object_or_404(TransferOrder, id=order_id)
-    item = get_object_or_404(TransferOrderItem, id=item_id, order=order)
-
-    if order.status != OrderStatus.PICKING:
-        messages.error(request, "Só pode marcar OK durante separação.")
-        return redirect("a_order_detail", order_id=order.id)
+    with transaction.atomic():
+        # 🔥 status conferido sob o lock: um despacho concorrente espera
+        order = get_object_or_404(
+            TransferOrder.objects.select_for_update(),
+            id=order_id
+        )
+        item = get_object_or_404(
+            TransferOrderItem.objects.select_related("product"),
+            id=item_id,
+            order=order,
+        )
 
-    item.qty_sent = item.qty_requested
-    item.save()
+        if order.status != OrderStatus.PICKING:
+            messages.error(request, "Só pode marcar OK durante separação.")
+            return redirect("a_order_detail", order_id=order.id)
 
-    channel_layer = get_channel_layer()
+        # qty_sent + totais do pedido; já estava OK: nada a gravar
+        if apply_sent_quantities(order, {item.id: item.qty_requested}, touch=False):
+            # o save sobe a versão
+            order.save(update_fields=["updated_at"])
 
-    async_to_sync(channel_layer.group_send)(
-            "orders_group",
-            {
-                "type": "order_update",
-                "order_id": order.id,
-                "status": order.status,
-                "status_display": order.get_status_display(),
-            }
-        )
+            publish_order_update(order)
 
-    OrderLog.objects.create(
-        order=order,
-        user=request.user,
-        action=f"Marcou OK para {item.product.name}"
-    )
+            OrderLog.objects.create(
+                order=order,
+                user=request.user,
+                action=f"Marcou OK para {item.product.name}"
+            )
 
     return redirect("a_order_detail", order_id=order.id)
+
+
 @require_austin
 @require_GET
 def austin_badge(request):
-    count = TransferOrder.objects.filter(
-        status=OrderStatus.SUBMITTED
-    ).count()
+    # Fallback de quem não mantém o WebSocket aberto (contador em cache).
+    # Síncrona: os middlewares do Django já passam por thread no ASGI,
+    # uma view async aqui não economiza nenhuma
+    count = pending_count()
+    etag = weak_etag("b", count)
 
-    return JsonResponse({"count": count})
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
 
+    return set_validators(JsonResponse({"count": count}), etag)
 
-from django.contrib.auth.decorators import login_required
 
 @login_required
 def order_status_poll(request, order_id):
-    order = get_object_or_404(TransferOrder, id=order_id)
-
-    return JsonResponse({
+    try:
+        since, timeout = longpoll_params(request.GET)
+    except ValueError:
+        return JsonResponse({"detail": "Parâmetros inválidos."}, status=400)
+
+    # 🔥 ?since=<version>: long-poll (espera a mudança, ver core/longpoll.py)
+    order = async_to_sync(poll_order)(order_id, since, timeout)
+    if order is None:
+        raise Http404
+
+    etag = order_etag(order)
+    cached = not_modified(request, etag, order.updated_at)
+    if cached:
+        return cached
+
+    return set_validators(JsonResponse({
         "status": order.status,
         "status_display": order.get_status_display(),
-    })
+        "version": order.version,
+    }), etag, order.updated_at)
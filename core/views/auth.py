@@ -3,8 +3,11 @@ from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 
-def _has_group(user, name: str) -> bool:
-    return user.is_authenticated and user.groups.filter(name=name).exists()
+from core.roles import has_group
+
+
+def _has_group(request, name: str) -> bool:
+    return request.user.is_authenticated and has_group(request, name)
 
 
 def login_view(request):
@@ -35,10 +38,10 @@ def logout_view(request):
 
 @login_required
 def home(request):
-    if _has_group(request.user, "QUEIMADOS"):
+    if _has_group(request, "QUEIMADOS"):
         return redirect("q_products")
 
-    if _has_group(request.user, "AUSTIN"):
+    if _has_group(request, "AUSTIN"):
         return redirect("a_orders")
 
     messages.error(request, "Usuário sem grupo.")
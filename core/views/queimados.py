@@ -1,21 +1,26 @@
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.db import transaction
+from django.db.models import F
+from django.http import Http404, HttpResponseBadRequest
 from django.utils import timezone
 
 from core.models import (
-    Category,
     Product,
     TransferOrder,
     TransferOrderItem,
     OrderStatus,
     Branch,
-    OrderLog,
 )
 
+from core.artifacts import is_final, order_fragment
+from core.catalog import get_catalog_snapshot
+from core.conditional import not_modified, order_page_etag, set_validators
+from core.orders import parse_qty_fields, apply_cart_quantities, adjust_order_totals, totals_delta
+from core.pagination import keyset_page
 from core.permissions import require_queimados
+from core.report_query import day_bounds
+from core.transitions import TransitionConflict, transition_order
 
 
 # ==========================================================
@@ -40,10 +45,8 @@ def _get_or_create_cart(user):
 
 @require_queimados
 def q_products(request):
-    cart = _get_or_create_cart(request.user)
-    categories = Category.objects.filter(active=True).prefetch_related("products")
-
     if request.method == "POST":
+        cart = _get_or_create_cart(request.user)
         product_id = int(request.POST["product_id"])
         qty = int(request.POST["qty"])
 
@@ -53,21 +56,29 @@ def q_products(request):
 
         product = get_object_or_404(Product, id=product_id, active=True)
 
-        item, created = TransferOrderItem.objects.get_or_create(
-            order=cart,
-            product=product,
-            defaults={"qty_requested": qty},
-        )
+        with transaction.atomic():
+            item, created = TransferOrderItem.objects.get_or_create(
+                order=cart,
+                product=product,
+                defaults={"qty_requested": qty},
+            )
+
+            if created:
+                delta = totals_delta(after=[(qty, 0)])
+            else:
+                delta = totals_delta(
+                    before=[(item.qty_requested, item.qty_sent)],
+                    after=[(item.qty_requested + qty, item.qty_sent)],
+                )
+                item.qty_requested = F("qty_requested") + qty
+                item.save(update_fields=["qty_requested"])
 
-        if not created:
-            item.qty_requested += qty
-            item.save()
+            adjust_order_totals(cart.id, delta)
 
         return redirect("q_products")
 
     return render(request, "queimados/products.html", {
-        "cart": cart,
-        "categories": categories,
+        "categories": get_catalog_snapshot(),
     })
 
 
@@ -78,23 +89,27 @@ def q_products(request):
 @require_queimados
 def q_cart(request):
     cart = _get_or_create_cart(request.user)
-    items = cart.items.select_related("product")
 
     if request.method == "POST":
-        for item in items:
-            field = f"qty_{item.id}"
-            if field in request.POST:
-                new_qty = int(request.POST[field])
+        try:
+            quantities = parse_qty_fields(request.POST, "qty_")
+        except ValueError:
+            messages.error(request, "Quantidade inválida.")
+            return redirect("q_cart")
 
-                if new_qty <= 0:
-                    item.delete()
-                else:
-                    item.qty_requested = new_qty
-                    item.save()
+        with transaction.atomic():
+            cart = get_object_or_404(
+                TransferOrder.objects.select_for_update(),
+                id=cart.id,
+                status=OrderStatus.DRAFT,
+            )
+            apply_cart_quantities(cart, quantities)
 
         messages.success(request, "Carrinho atualizado.")
         return redirect("q_cart")
 
+    items = cart.items.select_related("product")
+
     return render(request, "queimados/cart.html", {
         "cart": cart,
         "items": items,
@@ -114,32 +129,15 @@ def q_submit_order(request):
         messages.error(request, "Carrinho vazio.")
         return redirect("q_cart")
 
-    cart.status = OrderStatus.SUBMITTED
-    cart.submitted_at = timezone.now()
-    cart.save()
-
-    # 🔥 WebSocket protegido (não derruba sistema se Redis cair)
+    # 🔥 Evento vai para o outbox: só é publicado se a transação commitar
     try:
-        channel_layer = get_channel_layer()
-        if channel_layer:
-            async_to_sync(channel_layer.group_send)(
-                "orders_group",
-                {
-                    "type": "order_update",
-                    "order_id": cart.id,
-                    "status": cart.status,
-                    "status_display": cart.get_status_display(),
-                }
-            )
-    except Exception:
-        # Se Redis estiver offline, o sistema continua funcionando
-        pass
-
-    OrderLog.objects.create(
-        order=cart,
-        user=request.user,
-        action="Enviou o pedido para Austin",
-    )
+        transition_order(cart.id, "submit", request.user, scope={
+            "created_by": request.user,
+        })
+    except (TransferOrder.DoesNotExist, TransitionConflict):
+        # outra aba enviou o mesmo carrinho
+        messages.error(request, "Este carrinho já foi enviado.")
+        return redirect("q_cart")
 
     messages.success(request, f"Pedido #{cart.id} enviado com sucesso!")
     return redirect("q_cart")
@@ -152,16 +150,22 @@ def q_submit_order(request):
 @require_queimados
 def q_orders(request):
     today = timezone.localdate()
+    lower, upper = day_bounds(today, today)
 
     orders = (
         TransferOrder.objects
-        .filter(created_by=request.user, created_at__date=today)
+        .filter(created_by=request.user, created_at__gte=lower, created_at__lt=upper)
         .exclude(status__in=[OrderStatus.DRAFT, OrderStatus.RECEIVED])
-        .order_by("-created_at")
     )
 
+    try:
+        page = keyset_page(request, orders)
+    except ValueError:
+        return HttpResponseBadRequest("Página inválida.")
+
     return render(request, "queimados/orders.html", {
-        "orders": orders,
+        "orders": page.items,
+        "page": page,
     })
 
 
@@ -178,7 +182,15 @@ def q_remove_item(request, item_id):
         order__status=OrderStatus.DRAFT,
     )
 
-    item.delete()
+    with transaction.atomic():
+        # 🔥 mesmo lock do q_cart: o item é relido sob o lock e os totais
+        # só descontam o que foi apagado de fato (remoção dupla = nada)
+        cart = get_object_or_404(
+            TransferOrder.objects.select_for_update(),
+            id=item.order_id,
+            status=OrderStatus.DRAFT,
+        )
+        apply_cart_quantities(cart, {item.id: 0})
 
     messages.success(request, "Produto removido do carrinho.")
     return redirect("q_cart")
@@ -196,12 +208,24 @@ def q_order_detail(request, order_id):
         created_by=request.user,
     )
 
+    # 🔥 Cópia do navegador em dia: 304 sem consultar itens/histórico
+    etag = order_page_etag(request, order)
+    cached = not_modified(request, etag, order.updated_at)
+    if cached:
+        return cached
+
     items = order.items.select_related("product")
+    context = {"order": order, "items": items}
 
-    return render(request, "queimados/order_detail.html", {
-        "order": order,
-        "items": items,
-    })
+    # 🔥 Pedido fechado: tabela e histórico renderizados uma vez (core.artifacts)
+    if is_final(order):
+        context["fragments"] = {
+            "table": order_fragment(order, "detail-queimados", "queimados/order_table.html", context),
+            "history": order_fragment(order, "history-queimados", "queimados/order_history.html", context),
+        }
+
+    response = render(request, "queimados/order_detail.html", context)
+    return set_validators(response, etag, order.updated_at)
 
 
 # ==========================================================
@@ -210,44 +234,20 @@ def q_order_detail(request, order_id):
 
 @require_queimados
 def q_receive_order(request, order_id):
-    order = get_object_or_404(
-        TransferOrder,
-        id=order_id,
-    )
-    print("STATUS REAL NO B:", order.status)
-
-    if order.status != OrderStatus.DISPATCHED:
-        messages.error(request, "Só pode confirmar quando Austin despachar.")
-        return redirect("q_order_detail", order_id=order.id)
-
-    order.status = OrderStatus.RECEIVED
-    order.received_at = timezone.now()
-    order.save()
-
-    # 🔥 WebSocket protegido
+    # 🔥 UPDATE condicional + log + outbox (publicado depois do commit)
     try:
-        channel_layer = get_channel_layer()
-        if channel_layer:
-            async_to_sync(channel_layer.group_send)(
-                "orders_group",
-                {
-                    "type": "order_update",
-                    "order_id": order.id,
-                    "status": order.status,
-                    "status_display": order.get_status_display(),
-                }
-            )
-    except Exception:
-        pass
-
-    OrderLog.objects.create(
-        order=order,
-        user=request.user,
-        action="Confirmou recebimento do pedido",
-    )
+        transition_order(order_id, "receive", request.user)
+    except TransferOrder.DoesNotExist:
+        raise Http404
+    except TransitionConflict as exc:
+        messages.error(
+            request,
+            f"Só pode confirmar quando Austin despachar (pedido está: {exc.current_display}).",
+        )
+        return redirect("q_order_detail", order_id=order_id)
 
-    messages.success(request, f"Pedido #{order.id} confirmado.")
-    return redirect("q_order_detail", order_id=order.id)
+    messages.success(request, f"Pedido #{order_id} confirmado.")
+    return redirect("q_order_detail", order_id=order_id)
 
 
 # ==========================================================
@@ -256,10 +256,8 @@ def q_receive_order(request, order_id):
 
 @require_queimados
 def queimados_categories(request):
-    categories = Category.objects.filter(active=True).prefetch_related("products")
-
     return render(
         request,
         "queimados/categories.html",
-        {"categories": categories},
+        {"categories": get_catalog_snapshot()},
     )
\ No newline at end of file
@@ -1,35 +1,43 @@
 import os
-import io
+import tempfile
+from urllib.parse import urlencode
 
+from django.db.models import QuerySet, prefetch_related_objects
 from django.shortcuts import render, get_object_or_404
-from django.http import HttpResponse
-from django.utils import timezone
+from django.http import FileResponse, HttpResponseBadRequest, JsonResponse, Http404
+from django.urls import reverse
+from django.views.decorators.http import require_GET
 
 from config import settings
-from reportlab.platypus import (
-    SimpleDocTemplate,
-    Paragraph,
-    Spacer,
-    Table,
-    TableStyle,
-    Image,
-)
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
-from reportlab.lib.units import inch
 
-from core.models import TransferOrder, OrderStatus
+from core.analytics import SORTS, fulfillment_totals, product_fulfillment
+from core.artifacts import (
+    artifact_etag,
+    artifact_key,
+    catalog_stamp,
+    is_final,
+    order_artifact,
+    set_artifact_validators,
+)
+from core.conditional import not_modified
+from core.exports import FORMATS, export_response
+from core.models import TransferOrder, Branch, ReportJob, ReportJobStatus
+from core.pagination import keyset_page
+from core.pdf import REPORT_CHUNK_SIZE, render_report_pdf
 from core.permissions import require_austin, require_queimados
+from core.report_jobs import submit_report_job, is_stale, job_path
+from core.report_query import (
+    REPORTS,
+    filter_choices,
+    parse_day,
+    parse_report_query,
+    query_params,
+    report_orders,
+)
 
 
-# =========================================================
-# HELPER DATA FORMAT
-# =========================================================
-
-def _fmt(dt):
-    if not dt:
-        return "-"
-    return timezone.localtime(dt).strftime("%d/%m/%Y %H:%M")
+# Acima disso o PDF sai da memória e vai para um arquivo temporário
+REPORT_SPOOL_MAX_SIZE = getattr(settings, "REPORT_SPOOL_MAX_SIZE", 5 * 1024 * 1024)
 
 
 # =========================================================
@@ -38,218 +46,320 @@ def _fmt(dt):
 
 @require_austin
 def a_report(request):
-
-    start = request.GET.get("start")
-    end = request.GET.get("end")
-
-    orders = None  # Tela começa limpa
-
-    if start and end:
-        orders = TransferOrder.objects.exclude(
-            status=OrderStatus.DRAFT
-        ).filter(
-            created_at__date__gte=start,
-            created_at__date__lte=end
-        ).select_related("picking_by").order_by("-created_at")
-
-    return render(request, "austin/report.html", {
-        "orders": orders,
-        "start": start,
-        "end": end,
-    })
+    return _report_page(request, Branch.AUSTIN, "austin/report.html")
 
 
 @require_austin
 def a_report_pdf(request):
+    return _report_pdf_response(request, Branch.AUSTIN)
 
-    start = request.GET.get("start")
-    end = request.GET.get("end")
 
-    orders = TransferOrder.objects.exclude(
-        status=OrderStatus.DRAFT
-    ).select_related("picking_by").prefetch_related("items__product")
-
-    if start:
-        orders = orders.filter(created_at__date__gte=start)
+@require_austin
+@require_GET
+def a_report_job(request, job_id):
+    job = get_object_or_404(ReportJob, id=job_id, kind=Branch.AUSTIN)
+    return JsonResponse(_job_payload(job))
 
-    if end:
-        orders = orders.filter(created_at__date__lte=end)
 
-    return _generate_pdf_response(
-        orders,
-        "relatorio_austin.pdf",
-        "RELATÓRIO AUSTIN",
-        operator_field="picking_by"
-    )
+@require_austin
+@require_GET
+def a_report_job_download(request, job_id):
+    return _job_file_response(job_id, Branch.AUSTIN)
 
 
 @require_austin
 def a_report_pdf_single(request, order_id):
+    return _single_pdf_response(request, order_id, Branch.AUSTIN, f"pedido_{order_id}.pdf")
 
-    order = get_object_or_404(
-        TransferOrder.objects.select_related("picking_by")
-        .prefetch_related("items__product"),
-        id=order_id
-    )
 
-    return _generate_pdf_response(
-        [order],
-        f"pedido_{order.id}.pdf",
-        "RELATÓRIO AUSTIN",
-        operator_field="picking_by"
-    )
+@require_austin
+@require_GET
+def a_report_export(request):
+    return _export_response(request, Branch.AUSTIN)
 
 
 # =========================================================
-# ===================== QUEIMADOS =========================
+# ============ ATENDIMENTO POR PRODUTO (AUSTIN) ===========
 # =========================================================
 
-@require_queimados
-def q_report(request):
+def _fulfillment_params(request):
+    start = parse_day(request.GET.get("start"))
+    end = parse_day(request.GET.get("end"))
+
+    sort = request.GET.get("sort") or "missing"
+    if sort not in SORTS:
+        raise ValueError(sort)
+
+    return start, end, sort
+
 
-    start = request.GET.get("start")
-    end = request.GET.get("end")
+@require_austin
+def a_product_report(request):
+    try:
+        start, end, sort = _fulfillment_params(request)
+    except ValueError:
+        start = end = None
+        sort = "missing"
 
-    orders = None  # Tela começa limpa
+    products = totals = None  # Tela começa limpa
 
     if start and end:
-        orders = TransferOrder.objects.exclude(
-            status=OrderStatus.DRAFT
-        ).filter(
-            created_at__date__gte=start,
-            created_at__date__lte=end
-        ).select_related("created_by").order_by("-created_at")
-
-    return render(request, "queimados/report.html", {
-        "orders": orders,
-        "start": start,
-        "end": end,
+        products = list(product_fulfillment(start, end, sort))
+        totals = fulfillment_totals(products)
+
+    return render(request, "austin/product_report.html", {
+        "products": products,
+        "totals": totals,
+        "start": request.GET.get("start"),
+        "end": request.GET.get("end"),
+        "sort": sort,
+    })
+
+
+@require_austin
+@require_GET
+def a_product_report_api(request):
+    try:
+        start, end, sort = _fulfillment_params(request)
+    except ValueError:
+        return JsonResponse({"error": "Parâmetros inválidos."}, status=400)
+
+    products = list(product_fulfillment(start, end, sort))
+    totals = fulfillment_totals(products)
+
+    for row in [*products, totals]:
+        if row["fill_rate"] is not None:
+            row["fill_rate"] = round(row["fill_rate"], 1)
+
+    return JsonResponse({
+        "start": start.isoformat() if start else None,
+        "end": end.isoformat() if end else None,
+        "sort": sort,
+        "totals": totals,
+        "products": products,
     })
 
 
+# =========================================================
+# ===================== QUEIMADOS =========================
+# =========================================================
+
+@require_queimados
+def q_report(request):
+    return _report_page(request, Branch.QUEIMADOS, "queimados/report.html")
+
+
 @require_queimados
 def q_report_pdf(request):
+    return _report_pdf_response(request, Branch.QUEIMADOS)
 
-    start = request.GET.get("start")
-    end = request.GET.get("end")
 
-    orders = TransferOrder.objects.exclude(
-        status=OrderStatus.DRAFT
-    ).select_related("created_by").prefetch_related("items__product")
+@require_queimados
+@require_GET
+def q_report_job(request, job_id):
+    job = get_object_or_404(ReportJob, id=job_id, kind=Branch.QUEIMADOS)
+    return JsonResponse(_job_payload(job))
 
-    if start:
-        orders = orders.filter(created_at__date__gte=start)
 
-    if end:
-        orders = orders.filter(created_at__date__lte=end)
+@require_queimados
+@require_GET
+def q_report_job_download(request, job_id):
+    return _job_file_response(job_id, Branch.QUEIMADOS)
 
-    return _generate_pdf_response(
-        orders,
-        "relatorio_queimados.pdf",
-        "RELATÓRIO QUEIMADOS",
-        operator_field="created_by"
+
+@require_queimados
+def q_report_pdf_single(request, order_id):
+    return _single_pdf_response(
+        request, order_id, Branch.QUEIMADOS, f"pedido_queimados_{order_id}.pdf"
     )
 
 
 @require_queimados
-def q_report_pdf_single(request, order_id):
+@require_GET
+def q_report_export(request):
+    return _export_response(request, Branch.QUEIMADOS)
 
-    order = get_object_or_404(
-        TransferOrder.objects.select_related("created_by")
-        .prefetch_related("items__product"),
-        id=order_id
-    )
+
+# =========================================================
+# ============== RELATÓRIO POR PERÍODO (TELA) =============
+# =========================================================
+
+def _report_page(request, kind, template):
+    try:
+        query = parse_report_query(request.GET)
+    except ValueError:
+        return HttpResponseBadRequest("Filtro inválido.")
+
+    orders = page = None  # Tela começa limpa
+
+    if query.start and query.end:
+        try:
+            page = keyset_page(request, report_orders(kind, query))
+        except ValueError:
+            return HttpResponseBadRequest("Página inválida.")
+
+        orders = page.items
+
+        # ?v= dos links de PDF: mesma chave do arquivo gerado
+        if orders:
+            stamp = catalog_stamp()
+            for order in orders:
+                order.artifact_key = artifact_key(order, stamp)
+
+    return render(request, template, {
+        "orders": orders,
+        "page": page,
+        "query": query,
+        "filter_query": urlencode(query_params(query)),
+        "start": request.GET.get("start"),
+        "end": request.GET.get("end"),
+        **filter_choices(kind),
+    })
+
+
+def _report_pdf_response(request, kind):
+    try:
+        query = parse_report_query(request.GET)
+    except ValueError:
+        if request.GET.get("mode") == "job":
+            return JsonResponse({"error": "Filtro inválido."}, status=400)
+        return HttpResponseBadRequest("Filtro inválido.")
+
+    # 🔥 MODO JOB: gera em segundo plano e o navegador acompanha o status
+    if request.GET.get("mode") == "job":
+        job = submit_report_job(kind, query, request.user)
+        return JsonResponse(_job_payload(job), status=202)
+
+    conf = REPORTS[kind]
 
     return _generate_pdf_response(
-        [order],
-        f"pedido_queimados_{order.id}.pdf",
-        "RELATÓRIO QUEIMADOS",
-        operator_field="created_by"
+        report_orders(kind, query).prefetch_related("items__product"),
+        conf["filename"],
+        conf["title"],
+        operator_field=conf["operator_field"]
     )
 
 
 # =========================================================
-# ====================== GERADOR PDF ======================
+# ================== RELATÓRIO EM JOB =====================
 # =========================================================
 
-def _generate_pdf_response(orders, filename, title, operator_field):
+JOB_URLS = {
+    Branch.AUSTIN: ("a_report_job", "a_report_job_download"),
+    Branch.QUEIMADOS: ("q_report_job", "q_report_job_download"),
+}
+
 
-    response = HttpResponse(content_type="application/pdf")
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+def _job_payload(job):
+    status_url, download_url = JOB_URLS[job.kind]
 
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer)
-    elements = []
-    styles = getSampleStyleSheet()
+    status = ReportJobStatus.FAILED if is_stale(job) else job.status
 
-    # LOGO
-    logo_path = os.path.join(settings.BASE_DIR, "static", "xodo.png")
+    return {
+        "id": job.id,
+        "status": status,
+        "status_display": ReportJobStatus(status).label,
+        "status_url": reverse(status_url, args=[job.id]),
+        "download_url": (
+            reverse(download_url, args=[job.id])
+            if status == ReportJobStatus.DONE else None
+        ),
+    }
 
-    if os.path.exists(logo_path):
-        logo = Image(logo_path, width=120, height=80)
-        logo.hAlign = "RIGHT"
-        elements.append(logo)
-        elements.append(Spacer(1, 0.2 * inch))
 
-    # TÍTULO
-    elements.append(Paragraph(f"<b>{title}</b>", styles["Title"]))
-    elements.append(Spacer(1, 0.3 * inch))
+def _job_file_response(job_id, kind):
+    job = get_object_or_404(
+        ReportJob,
+        id=job_id,
+        kind=kind,
+        status=ReportJobStatus.DONE,
+    )
 
-    # PEDIDOS
-    for order in orders:
+    path = job_path(job)
+    if not os.path.exists(path):
+        raise Http404("Relatório expirado.")
 
-        operator = getattr(order, operator_field)
-        operator_name = operator.username if operator else "-"
+    return FileResponse(
+        open(path, "rb"),
+        as_attachment=True,
+        filename=REPORTS[kind]["filename"],
+        content_type="application/pdf",
+    )
 
-        elements.append(Paragraph(f"<b>Pedido #{order.id}</b>", styles["Heading2"]))
-        elements.append(Spacer(1, 0.2 * inch))
 
-        elements.append(Paragraph(
-            f"Operador: {operator_name}",
-            styles["Normal"]
-        ))
+# =========================================================
+# ================= PLANILHA (CSV / XLSX) =================
+# =========================================================
 
-        elements.append(Paragraph(
-            f"Data Pedido: {_fmt(order.created_at)}",
-            styles["Normal"]
-        ))
+def _export_response(request, kind):
+    fmt = request.GET.get("format", "csv")
 
-        elements.append(Paragraph(
-            f"Início Separação: {_fmt(order.picking_at)}",
-            styles["Normal"]
-        ))
+    try:
+        query = parse_report_query(request.GET)
+    except ValueError:
+        return HttpResponseBadRequest("Filtro inválido.")
 
-        elements.append(Paragraph(
-            f"Despacho: {_fmt(order.dispatched_at)}",
-            styles["Normal"]
-        ))
+    if fmt not in FORMATS:
+        return HttpResponseBadRequest("Formato inválido.")
 
-        elements.append(Spacer(1, 0.2 * inch))
+    # 🔥 Streaming: linhas saem do banco direto para o download
+    return export_response(request, kind, fmt, query)
 
-        data = [["Produto", "Pedido", "Enviado"]]
 
-        for item in order.items.all():
-            data.append([
-                item.product.name,
-                str(item.qty_requested),
-                str(item.qty_sent or 0)
-            ])
+# =========================================================
+# ====================== GERADOR PDF ======================
+# =========================================================
 
-        table = Table(data, colWidths=[250, 80, 80])
-        table.setStyle(TableStyle([
-            ("BACKGROUND", (0, 0), (-1, 0), colors.red),
-            ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-            ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-            ("ALIGN", (1, 1), (-1, -1), "CENTER"),
-        ]))
+def _single_pdf_response(request, order_id, kind, filename):
+    conf = REPORTS[kind]
+    operator_field = conf["operator_field"]
 
-        elements.append(table)
-        elements.append(Spacer(1, 0.5 * inch))
+    order = get_object_or_404(
+        TransferOrder.objects.select_related(operator_field),
+        id=order_id
+    )
 
-    doc.build(elements)
+    if not is_final(order):
+        prefetch_related_objects([order], "items__product")
+        return _generate_pdf_response([order], filename, conf["title"], operator_field)
 
-    pdf = buffer.getvalue()
-    buffer.close()
-    response.write(pdf)
+    # 🔥 Pedido fechado: PDF gerado uma vez, servido do disco
+    etag = artifact_etag(order, f"pdf-{kind.lower()}")
+    immutable = request.GET.get("v") == artifact_key(order)
 
-    return response
+    cached = not_modified(request, etag)
+    if cached:
+        return set_artifact_validators(cached, etag, immutable)
+
+    def build(out):
+        prefetch_related_objects([order], "items__product")
+        render_report_pdf([order], conf["title"], operator_field, out)
+
+    path = order_artifact(order, f"pdf-{kind.lower()}", "pdf", build)
+
+    response = FileResponse(
+        open(path, "rb"),
+        as_attachment=True,
+        filename=filename,
+        content_type="application/pdf",
+    )
+    return set_artifact_validators(response, etag, immutable)
+
+
+def _generate_pdf_response(orders, filename, title, operator_field):
+
+    # 🔥 Querysets são lidos em blocos (prefetch por bloco)
+    if isinstance(orders, QuerySet):
+        orders = orders.iterator(chunk_size=REPORT_CHUNK_SIZE)
+
+    out = tempfile.SpooledTemporaryFile(max_size=REPORT_SPOOL_MAX_SIZE)
+    # 🔥 Vários blocos: páginas montadas em paralelo (core.pdf)
+    render_report_pdf(orders, title, operator_field, out)
+    out.seek(0)
+
+    return FileResponse(
+        out,
+        as_attachment=True,
+        filename=filename,
+        content_type="application/pdf",
+    )
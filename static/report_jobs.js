@@ -0,0 +1,55 @@
+// Relatório em segundo plano: cria o job, acompanha o status e baixa
+// o PDF quando fica pronto. Sem JS o link continua gerando na hora.
+function startReportJob(link){
+
+    const label = link.innerText;
+    const url = link.href + (link.href.includes("?") ? "&" : "?") + "mode=job";
+
+    function reset(){
+        link.innerText = label;
+        link.classList.remove("loading");
+    }
+
+    function poll(job){
+        if (job.status === "DONE") {
+            reset();
+            window.location = job.download_url;
+            return;
+        }
+
+        if (job.status === "FAILED" || job.error) {
+            reset();
+            alert("Não foi possível gerar o relatório.");
+            return;
+        }
+
+        setTimeout(function(){
+            fetch(job.status_url, {credentials: "same-origin"})
+                .then(r => r.json())
+                .then(poll)
+                .catch(reset);
+        }, 1500);
+    }
+
+    link.innerText = "Gerando PDF...";
+    link.classList.add("loading");
+
+    fetch(url, {credentials: "same-origin"})
+        .then(r => r.json())
+        .then(poll)
+        .catch(function(){
+            reset();
+            window.location = link.href;
+        });
+}
+
+document.addEventListener("DOMContentLoaded", function(){
+    document.querySelectorAll("[data-report-job]").forEach(function(link){
+        link.addEventListener("click", function(e){
+            e.preventDefault();
+            if (!link.classList.contains("loading")) {
+                startReportJob(link);
+            }
+        });
+    });
+});